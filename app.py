@@ -1,18 +1,54 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression, LogisticRegression
-from sklearn.cluster import KMeans
-from sklearn.metrics import mean_squared_error, r2_score
-from sklearn.preprocessing import StandardScaler
-import yfinance as yf
 import datetime
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_message
+import importlib
+import os
+import re
+import threading
 import uuid
 import io
+import assets
+import profiling
+
+# Heavy modules are imported on first attribute access so the landing page
+# only pays for streamlit; see prewarm_heavy_modules()
+class LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+pd = LazyModule("pandas")
+np = LazyModule("numpy")
+px = LazyModule("plotly.express")
+go = LazyModule("plotly.graph_objects")
+yf = LazyModule("yfinance")
+engine = LazyModule("engine")
+
+HEAVY_MODULES = [pd, np, px, go, yf, engine] + [
+    LazyModule(name) for name in ("sklearn.model_selection", "sklearn.linear_model", "sklearn.cluster",
+                                  "sklearn.metrics", "sklearn.preprocessing", "tenacity")]
+_prewarm_started = threading.Event()
+
+def prewarm_heavy_modules():
+    # Once per process, import everything in the background after first paint
+    if _prewarm_started.is_set():
+        return
+    _prewarm_started.set()
+
+    def warm():
+        for module in HEAVY_MODULES:
+            try:
+                module._load()
+            except Exception:
+                pass
+    threading.Thread(target=warm, name="prewarm-imports", daemon=True).start()
 
 # Set page config ONCE at the very top
 st.set_page_config(page_title="Market Master", layout="wide", page_icon="💹")
@@ -23,21 +59,16 @@ def init_session_state():
         st.session_state.pipeline = {
             'current_step': 0, 'data_loaded': False, 'preprocessed': False, 'features_engineered': False,
             'data_split': False, 'model_trained': False, 'model_evaluated': False, 'results_visualized': False,
-            'df': None, 'df_processed': None, 'target': None, 'features': None,
+            'df': None, 'df_processed': None, 'df_features': None, 'target': None, 'features': None,
             'X_train': None, 'X_test': None, 'y_train': None, 'y_test': None,
             'models': {}, 'y_preds': {}, 'current_price': None, 'last_symbol': None
         }
     if 'theme' not in st.session_state:
         st.session_state.theme = "Financial Shinobi"
 
-# Define themes
-def get_theme_css():
-    # Make sure theme is initialized
-    if 'theme' not in st.session_state:
-        st.session_state.theme = "Financial Shinobi"
-        
-    themes = {
-        "Financial Shinobi": """
+# Define themes (raw CSS; assets.build_css minifies and caches it once per process)
+THEME_CSS = {
+    "Financial Shinobi": """
     @import url('https://fonts.cdnfonts.com/css/anime-ace');
     @import url('https://fonts.googleapis.com/css2?family=Roboto:wght@400;700&display=swap');
 
@@ -414,7 +445,7 @@ def get_theme_css():
     }
         """,
         
-        "Techno Exchange": """
+    "Techno Exchange": """
             @import url('https://fonts.googleapis.com/css2?family=Orbitron:wght@700&display=swap');
             :root {
                 --main-bg: #0f2027;
@@ -646,7 +677,7 @@ def get_theme_css():
                 scrollbar-width: thin;
             }
         """,
-        "Imperial Wealth Club": """
+    "Imperial Wealth Club": """
             @import url('https://fonts.googleapis.com/css2?family=Playfair+Display:wght@700&family=Cinzel:wght@700&display=swap');
             :root {
                 --main-bg: #f5f3e7;
@@ -736,10 +767,14 @@ def get_theme_css():
                 transition: width 0.5s cubic-bezier(0.4, 0, 0.2, 1);
             }
             /* ... rest of the theme CSS ... */
-        """
-    }
-    
-    return themes[st.session_state.theme]
+    """
+}
+
+def get_theme_css():
+    # Make sure theme is initialized
+    if 'theme' not in st.session_state:
+        st.session_state.theme = "Financial Shinobi"
+    return assets.build_css(THEME_CSS[st.session_state.theme])
 
 # Theme-specific GIFs
 THEME_GIFS = {
@@ -748,6 +783,8 @@ THEME_GIFS = {
     "Imperial Wealth Club": "https://media.giphy.com/media/3o6Zt6ML6BklcajjsA/giphy.gif"
 }
 
+SIDEBAR_GIF = "https://gifdb.com/images/high/anime-money-safe-1989-riding-bean-tlrjh66tg0es3idz.gif"
+
 # Theme-specific display names
 THEME_TITLES = {
     "Financial Shinobi": " FINANCIAL SHINOBI ",
@@ -886,6 +923,12 @@ THEME_CHECKBOX_LABELS = {
     "Imperial Wealth Club": "Standardize Holdings"
 }
 
+THEME_APPLY_LABELS = {
+    "Financial Shinobi": "⚔️ Seal the Jutsu",
+    "Techno Exchange": "⚙️ Apply",
+    "Imperial Wealth Club": "🖋️ Countersign"
+}
+
 # Theme-specific expander titles
 THEME_EXPANDER_TITLES = {
     "Financial Shinobi": "View Cursed Scroll & Secrets",
@@ -894,44 +937,172 @@ THEME_EXPANDER_TITLES = {
 }
 
 # Helper functions
-def clean_numeric_columns(df):
-    for col in df.columns:
-        if df[col].dtype == 'object':
-            try:
-                df[col] = pd.to_numeric(df[col].astype(str).str.replace(r'[^\d.]', '', regex=True), errors='coerce')
-            except Exception as e:
-                st.warning(f"Could not convert {col} to numeric: {e}")
-    return df
+@st.cache_resource
+def get_data_cache():
+    return engine.cache.SharedFrameCache()
+
+@st.cache_resource
+def get_dataset_store():
+    return engine.datasets.DatasetStore(max_bytes=int(os.environ.get("MARKET_MASTER_DATASET_MB", 2048)) * 2**20)
+
+def store_frame(df, stage=None):
+    # Sessions hold a handle; identical frames share one memory-mapped file
+    if st.session_state.get('compact_mode'):
+        full_bytes = engine.compact.float64_bytes(df)
+        df = engine.compact.compact_frame(df)
+        if stage:
+            st.session_state.pipeline.setdefault('memory', {})[stage] = (full_bytes, engine.compact.memory_bytes(df))
+    return get_dataset_store().put(df)
+
+def frame_key(value):
+    # Content, never id(): a freed object's address can be reused by the next one, which would match a stale entry
+    if isinstance(value, engine.datasets.DatasetHandle):
+        return value.fingerprint
+    return engine.export.fingerprint(value.to_frame() if isinstance(value, pd.Series) else value)
+
+def split_key():
+    # The split's own inputs identify X_train, X_test, y_train and y_test
+    return st.session_state.pipeline.get('split_key')
+
+def train_key():
+    # Models (and the predictions made from them) are new on every training run, even from the same split
+    return split_key(), st.session_state.pipeline.get('train_generation', 0)
+
+def memo_stage(name, key, compute):
+    # One remembered output per stage: it recomputes only when its inputs (key) change
+    memo = st.session_state.setdefault('stage_memo', {})
+    if name in memo and memo[name][0] == key:
+        return memo[name][1]
+    with get_profiler().stage(name):
+        value = compute()
+    memo[name] = (key, value)
+    return value
+
+def format_bytes(n):
+    return f"{n / 2**20:.1f} MiB" if n >= 2**20 else f"{n / 2**10:.0f} KiB"
+
+# Session state that can be parked on disk while a session is idle: splits, fitted models and predictions
+# in the pipeline dict, plus every memoised stage output
+SESSION_ARTIFACTS = ['X_train', 'X_test', 'y_train', 'y_test', 'models', 'y_preds']
+
+@st.cache_resource
+def get_session_governor():
+    return engine.sessions.SessionGovernor(
+        max_bytes=int(os.environ.get("MARKET_MASTER_SESSION_MEMORY_MB", 1024)) * 2**20,
+        idle_seconds=float(os.environ.get("MARKET_MASTER_SESSION_IDLE_SECONDS", 600)))
+
+def session_artifacts():
+    return [(st.session_state.pipeline, SESSION_ARTIFACTS), (st.session_state.get('stage_memo', {}), None)]
+
+def forget_parked_artifacts():
+    # The parked split, models and predictions could not be read back: send the session back to the split
+    # step so they are recomputed, then rerun the whole app so no step renders with the stale flags
+    pipeline = st.session_state.pipeline
+    pipeline.update({key: None for key in ('X_train', 'X_test', 'y_train', 'y_test')})
+    pipeline.update({'models': {}, 'y_preds': {}, 'data_split': False, 'model_trained': False,
+                     'model_evaluated': False, 'results_visualized': False,
+                     'current_step': min(pipeline['current_step'], 4)})
+    st.rerun()
+
+def governed_run():
+    # Restores this session's parked artifacts before a run and re-measures them after it
+    session_id = st.session_state.setdefault('session_id', uuid.uuid4().hex)
+    return get_session_governor().session(session_id, session_artifacts, on_lost=forget_parked_artifacts)
+
+def reset_session():
+    get_session_governor().discard(st.session_state.get('session_id'))
+    st.session_state.clear()
+    init_session_state()
+    st.session_state.update({'landing_done': False})
+
+def load_frame(value, columns=None):
+    return engine.datasets.materialize(value, columns)
+
+@st.cache_resource
+def get_job_runner():
+    # Background workers shared by every session; identical downloads share one job
+    return engine.jobs.JobRunner()
+
+def history_feed():
+    # MARKET_MASTER_DATA_FEED=synthetic swaps Yahoo for the offline stand-in (load tests, demos without network)
+    return engine.synthetic_history if os.environ.get("MARKET_MASTER_DATA_FEED") == "synthetic" else engine.fetch_ohlcv
+
+def fetch_yfinance_data(symbol, start_date, end_date, interval="1d"):
+    # Returns this session's download job at once; a job for other inputs is superseded and released
+    key = f"ohlcv:{symbol}:{start_date}:{end_date}" + (f":{interval}" if interval != "1d" else "")
+    runner = get_job_runner()
+    job = st.session_state.get('load_job')
+    if job is not None and job.key == key and not job.cancelled:
+        return job
+    if job is not None:
+        runner.release(job)
+    cache = get_data_cache()
+    # The shared cache still coalesces concurrent identical downloads across worker processes
+    fetch = history_feed()
+    if interval != "1d":
+        # Intraday ranges arrive as several request-sized windows, downloaded concurrently
+        synthetic = fetch is engine.synthetic_history
+        window_fetch = engine.intraday.synthetic_bars if synthetic else engine.fetch_ohlcv
+
+        def fetch(symbol, start_date, end_date, job=None):
+            return engine.intraday.fetch_bars(symbol, start_date, end_date, interval, job=job, fetch=window_fetch,
+                                              clip=not synthetic)
+    # A range that reaches today is still growing, so its cached copy expires; past ranges are kept until evicted
+    ttl = engine.cache.range_ttl(end_date)
+    job = runner.submit(key, lambda job: cache.get_frame(key, lambda: fetch(symbol, start_date, end_date, job=job),
+                                                         ttl))
+    st.session_state.load_job = job
+    return job
+
+def retire_load_job(failed_only=False):
+    # Stop holding the job, and through it the downloaded frame; other sessions watching it keep their share
+    job = st.session_state.get('load_job')
+    if job is not None and (not failed_only or job.error is not None):
+        del st.session_state['load_job']
+        get_job_runner().release(job)
+
+@st.fragment(run_every=0.5)
+def fetch_progress(job):
+    # Only this fragment polls; the rest of the page stays interactive while the job runs
+    if job.done:
+        st.rerun()
+    st.progress(job.progress, text=job.message)
 
-def is_continuous(series):
-    return pd.api.types.is_numeric_dtype(series) and len(series.unique()) > 10
+QUOTE_REFRESH_SECONDS = 15
 
-@st.cache_data
-def fetch_yfinance_data(symbol, start_date, end_date, _cache_key=None):
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10), 
-           retry=retry_if_exception_message(match='Too Many Requests'))
-    def fetch():
-        try:
-            stock = yf.Ticker(symbol)
-            df = stock.history(start=start_date, end=end_date)
-            if df.empty:
-                st.error(f"No data for {symbol}. Try AAPL, TSLA, MSFT.")
-                return None
-            return df.reset_index()[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']]
-        except Exception as e:
-            st.error(f"Error fetching data: {e}")
-            return None
-    return fetch()
+@st.cache_resource
+def get_quote_service():
+    # One service per server process, shared by every session
+    if os.environ.get("MARKET_MASTER_QUOTE_FEED") == "synthetic":
+        feed = engine.quotes.SyntheticQuoteFeed()
+    else:
+        feed = engine.quotes.YahooQuoteFeed()
+    return engine.quotes.QuoteService(feed, ttl=QUOTE_REFRESH_SECONDS)
 
 def fetch_current_price(symbol):
     try:
-        stock = yf.Ticker(symbol)
-        price = stock.info.get('regularMarketPrice', stock.info.get('currentPrice'))
-        return price
+        quote = get_quote_service().get(symbol)
+        return quote.price if quote else None
     except Exception as e:
         st.warning(f"Could not fetch price for {symbol}: {e}")
         return None
 
+@st.fragment(run_every=QUOTE_REFRESH_SECONDS)
+def live_price_ticker(symbol):
+    theme = st.session_state.theme
+    try:
+        quote = get_quote_service().get(symbol)
+    except Exception as e:
+        st.caption(f"Live price unavailable: {e}")
+        return
+    if quote:
+        st.session_state.pipeline['current_price'] = quote.price
+        st.metric({
+            "Financial Shinobi": f"Current Blood Price ({symbol})",
+            "Techno Exchange": f"Live Signal ({symbol})",
+            "Imperial Wealth Club": f"Current Valuation ({symbol})"
+        }[theme], f"${quote.price:.2f}", None if quote.change is None else f"{quote.change:+.2f}")
+
 def plot_config(fig, title, x_title, y_title, width=800, height=400):
     theme = st.session_state.theme
     if theme == "Techno Exchange":
@@ -981,10 +1152,62 @@ def plot_config(fig, title, x_title, y_title, width=800, height=400):
             if trace.type in ['scatter', 'bar', 'scattergl', 'scatter3d', 'scatterpolar', 'scattergeo', 'scattermapbox']:
                 trace.update(marker=dict(line=dict(color='#39FF14', width=2)))
 
+NULL_PROFILER = profiling.NullProfiler()
+
+def get_profiler():
+    return st.session_state.get('profiler') or NULL_PROFILER
+
+def render_chart(fig):
+    profiler = get_profiler()
+    # Serialise outside the timed block so measuring the payload doesn't inflate render time
+    payload_bytes = len(fig.to_json()) if profiler is not NULL_PROFILER else 0
+    with profiler.stage(fig.layout.title.text or "chart", kind="chart") as stats:
+        stats['payload_bytes'] = payload_bytes
+        st.plotly_chart(fig)
+
+def performance_panel():
+    with st.expander("⏱️ Performance"):
+        enabled = st.toggle("Profile reruns", value=st.session_state.get('profiler') is not None, key="profiling_enabled",
+                            help="Record wall time, CPU time, peak memory and payload size per step and chart.")
+        if not enabled:
+            profiler = st.session_state.pop('profiler', None)
+            if profiler is not None:
+                # Stops tracemalloc once no session is profiling
+                profiler.close()
+            return
+        profiler = st.session_state.setdefault('profiler', profiling.Profiler())
+        summary = profiler.summary()
+        if not summary:
+            st.caption("Run a step to collect timings.")
+            return
+        st.dataframe(pd.DataFrame(summary)[['kind', 'stage', 'calls', 'last_wall_s', 'wall_s', 'cpu_s', 'peak_mem_bytes', 'payload_bytes']]
+                     .style.format({'last_wall_s': '{:.3f}', 'wall_s': '{:.3f}', 'cpu_s': '{:.3f}'}),
+                     use_container_width=True, hide_index=True)
+        st.caption("Peak memory is traced process-wide: stages running in other sessions at the same time add to it.")
+        st.download_button("Export JSON", profiler.to_json(), file_name="market_master_profile.json",
+                           mime="application/json", key="profile_json")
+        cache_stats = get_data_cache().stats()
+        st.caption(f"Data cache: {cache_stats.hits} hits, {cache_stats.misses} misses, {cache_stats.coalesced} coalesced, "
+                   f"{cache_stats.entries} entries, {cache_stats.bytes / 2**20:.1f} MiB")
+        session_stats = get_session_governor().stats()
+        st.caption(f"Sessions: {session_stats.sessions} ({format_bytes(session_stats.resident_bytes)} in memory), "
+                   f"{session_stats.spilled_sessions} parked on disk ({format_bytes(session_stats.spilled_bytes)}), "
+                   f"{session_stats.spills} spills, {session_stats.restores} restores")
+        st.download_button("Export Prometheus", profiling.to_prometheus(gauges={
+            'data_cache_hits_total': cache_stats.hits, 'data_cache_misses_total': cache_stats.misses,
+            'data_cache_coalesced_total': cache_stats.coalesced, 'data_cache_evictions_total': cache_stats.evictions,
+            'data_cache_bytes': cache_stats.bytes, 'session_resident_bytes': session_stats.resident_bytes,
+            'session_spilled_bytes': session_stats.spilled_bytes, 'session_spills_total': session_stats.spills,
+            'session_restores_total': session_stats.restores}), file_name="market_master_metrics.prom",
+                           mime="text/plain", key="profile_prom")
+        if st.button("Clear timings", key="profile_clear"):
+            profiler.clear()
+            st.rerun()
+
 # Pipeline steps
 def welcome_step():
     theme = st.session_state.theme
-    gif_url = THEME_GIFS.get(theme, THEME_GIFS["Financial Shinobi"])
+    gif_url = assets.asset_url(THEME_GIFS.get(theme, THEME_GIFS["Financial Shinobi"]))
     main_header = THEME_MAIN_HEADERS.get(theme, "Market Master")
     welcome_text, welcome_btn = THEME_STEP_LABELS["welcome"][theme]
     st.markdown(f'''
@@ -1011,10 +1234,16 @@ def load_data_step():
         uploaded_file = st.file_uploader("Upload Cursed Scroll 📜", type=["csv", "xlsx"], help="Upload a dataset with 'Date' and 'Close' columns.")
         if uploaded_file:
             try:
-                df = clean_numeric_columns(pd.read_csv(uploaded_file) if uploaded_file.name.endswith('.csv') else pd.read_excel(uploaded_file))
+                with get_profiler().stage("read_upload"):
+                    raw_df = engine.read_table(uploaded_file, uploaded_file.name)
+                with get_profiler().stage("clean_numeric_columns"):
+                    cleaned = engine.clean_numeric_columns(raw_df)
+                for warning in cleaned.warnings:
+                    st.warning(warning)
+                df = cleaned.df
                 if not {'Date', 'Close'}.issubset(df.columns):
                     st.warning("Scroll needs 'Date' and 'Close' seals.")
-                st.session_state.pipeline.update({'df': df, 'data_loaded': True, 'last_symbol': None, 'current_step': 2})
+                st.session_state.pipeline.update({'df': store_frame(df, 'load'), 'data_loaded': True, 'last_symbol': None, 'current_step': 2})
                 st.success(upload_success)
                 with st.expander(THEME_EXPANDER_TITLES[theme]):
                     st.dataframe(df)
@@ -1036,7 +1265,7 @@ def load_data_step():
                     vol_title, vol_x, vol_y = THEME_GRAPH_LABELS['volume_chart'][theme]
                     fig = px.line(df, x='Date', y='Volume', title=vol_title, color_discrete_sequence=['#8A2BE2'], hover_data=['Volume'])
                     plot_config(fig, vol_title, vol_x, vol_y)
-                    st.plotly_chart(fig)
+                    render_chart(fig)
                     st.markdown(f"""
                         <div class="interpretation">
                         {THEME_INTERPRETATIONS['load_data_volume'][theme]}
@@ -1048,20 +1277,46 @@ def load_data_step():
     else:
         col1, col2 = st.columns(2)
         with col1:
-            symbol = st.text_input("Stock Symbol (e.g., AAPL)", "AAPL", help="Enter a valid market seal.")
-            start_date = st.date_input("Start Date", datetime.date(2024, 1, 1))
-            end_date = st.date_input("End Date", datetime.date.today())
+            # Typing does nothing until the form is submitted, so edits never start a download
+            with st.form("yahoo_form", border=False):
+                symbol = st.text_input("Stock Symbol (e.g., AAPL)", "AAPL", help="Enter a valid market seal.")
+                start_date = st.date_input("Start Date", datetime.date(2024, 1, 1))
+                end_date = st.date_input("End Date", datetime.date.today())
+                interval = st.selectbox("Interval", ["1d", *engine.intraday.INTERVALS],
+                                        help="Intraday history is short: 30 days of 1m bars, 60 days up to 30m, "
+                                             "730 days of 1h bars.")
+                bars = st.selectbox("Bar Size", ["As fetched", *engine.intraday.BAR_SIZES],
+                                    help="Resamples the fetched bars; changing only this never downloads again.")
+                if st.form_submit_button("Summon Scrolls 📜"):
+                    st.session_state.yahoo_request = (symbol, start_date, end_date, interval, bars)
+                    # Summoning again retries a download that failed, even for the same inputs
+                    retire_load_job(failed_only=True)
         with col2:
+            if 'yahoo_request' not in st.session_state:
+                st.info("Enter a market seal and summon its scrolls.")
+                return
+            symbol, start_date, end_date, interval, bars = st.session_state.yahoo_request
             if symbol and start_date < end_date:
-                with st.spinner("Summoning Cursed Scrolls..."):
-                    df = fetch_yfinance_data(symbol.upper(), start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'), f"{symbol}_{start_date}_{end_date}")
+                job = fetch_yfinance_data(symbol.upper(), start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'),
+                                          interval)
+                df = None
+                if not job.done:
+                    fetch_progress(job)
+                elif job.error is not None:
+                    st.error(str(job.error) if isinstance(job.error, engine.DataFetchError) else f"Error fetching data: {job.error}")
+                else:
+                    df = job.result
+                    if bars != "As fetched":
+                        df = engine.intraday.resample(df, engine.intraday.BAR_SIZES[bars])
                 if df is not None:
                     price = fetch_current_price(symbol.upper())
                     if price:
                         st.metric(f"Current Blood Price ({symbol.upper()})", f"${price:.2f}")
                     st.session_state.pipeline.update({
-                        'df': df, 'data_loaded': True, 'last_symbol': symbol.upper(), 'current_price': price, 'current_step': 2
+                        'df': store_frame(df, 'load'), 'data_loaded': True, 'last_symbol': symbol.upper(), 'current_price': price, 'current_step': 2
                     })
+                    # The dataset store has the frame now; the session keeps only its handle
+                    retire_load_job()
                     st.success(fetch_success)
                     with st.expander(THEME_EXPANDER_TITLES[theme]):
                         st.dataframe(df)
@@ -1076,7 +1331,7 @@ def load_data_step():
                         increasing_line_color='#B22222', decreasing_line_color='#8A2BE2'
                     )])
                     plot_config(fig, price_title, price_x, price_y)
-                    st.plotly_chart(fig)
+                    render_chart(fig)
                     st.markdown(f"""
                         <div class="interpretation">
                         {THEME_INTERPRETATIONS['load_data_price'][theme]}
@@ -1085,7 +1340,7 @@ def load_data_step():
                     vol_title, vol_x, vol_y = THEME_GRAPH_LABELS['volume_chart'][theme]
                     fig = px.line(df, x='Date', y='Volume', title=vol_title, color_discrete_sequence=['#8A2BE2'], hover_data=['Volume'])
                     plot_config(fig, vol_title, vol_x, vol_y)
-                    st.plotly_chart(fig)
+                    render_chart(fig)
                     st.markdown(f"""
                         <div class="interpretation">
                         {THEME_INTERPRETATIONS['load_data_volume'][theme]}
@@ -1102,43 +1357,71 @@ def preprocessing_step():
     if not st.session_state.pipeline['data_loaded']:
         st.warning("Summon scrolls first!")
         return
-    df = st.session_state.pipeline['df'].copy()
+    df = load_frame(st.session_state.pipeline['df'])
     
-    missing_values = df.isnull().sum()
-    if missing_values.sum():
+    # Strategies for the vectorised fill/clip kernel
+    col1, col2 = st.columns(2)
+    with col1:
+        fill_strategy = st.selectbox({
+            "Financial Shinobi": "Seal Restoration",
+            "Techno Exchange": "Missing Value Fill",
+            "Imperial Wealth Club": "Gap Reconciliation"
+        }[theme], engine.FILL_STRATEGIES, format_func=lambda s: {
+            "mean": "Column mean", "ffill": "Forward fill", "none": "Leave as is"
+        }[s], key="fill_strategy")
+    with col2:
+        clip_strategy = st.selectbox({
+            "Financial Shinobi": "Rogue Seal Banishment",
+            "Techno Exchange": "Outlier Handling",
+            "Imperial Wealth Club": "Outlier Trimming"
+        }[theme], engine.CLIP_STRATEGIES, format_func=lambda s: {
+            "iqr": "IQR (1.5×)", "winsorize": "Winsorize (1%–99%)", "mad": "Median ± 3 MAD",
+            "zscore": "Mean ± 3σ", "none": "Keep outliers"
+        }[s], key="clip_strategy")
+    group_by = None
+    if 'Symbol' in df.columns and st.checkbox({
+        "Financial Shinobi": "Purify each clan separately",
+        "Techno Exchange": "Per-symbol statistics",
+        "Imperial Wealth Club": "Audit each holding separately"
+    }[theme], key="preprocess_group_by"):
+        group_by = 'Symbol'
+    config = engine.PreprocessConfig(fill=fill_strategy, clip=clip_strategy, group_by=group_by)
+    
+    def run_preprocess():
+        # engine.preprocess works on a copy; the session keeps a handle to the result
+        result = engine.preprocess(df, config)
+        return engine.PreprocessResult(store_frame(result.df, 'preprocess'), result.missing, result.clipped_columns)
+
+    result = memo_stage("preprocess", (frame_key(st.session_state.pipeline['df']), config), run_preprocess)
+    missing_values = result.missing
+    if result.had_missing and config.fill != "none":
         st.dataframe(missing_values[missing_values > 0].to_frame(name="Missing Values"))
-        df[df.select_dtypes(np.number).columns] = df.select_dtypes(np.number).fillna(df.mean(numeric_only=True))
         st.success({
             "Financial Shinobi": "⚔️ Missing seals restored!",
             "Techno Exchange": "🧹 Missing values filled!",
             "Imperial Wealth Club": "🧾 Gaps reconciled!"
         }[theme])
-    else:
+    elif not result.had_missing:
         st.success({
             "Financial Shinobi": "⚔️ Scrolls are flawless!",
             "Techno Exchange": "💹 Data is clean!",
             "Imperial Wealth Club": "💰 Ledger is balanced!"
         }[theme])
     
-    numeric_cols = df.select_dtypes(np.number).columns
-    if numeric_cols.any():
-        for col in numeric_cols:
-            Q1, Q3 = df[col].quantile([0.25, 0.75])
-            IQR = Q3 - Q1
-            df[col] = df[col].clip(Q1 - 1.5 * IQR, Q3 + 1.5 * IQR)
+    if result.clipped_columns and config.clip != "none":
         st.success({
             "Financial Shinobi": "⚔️ Rogue seals banished!",
             "Techno Exchange": "🧹 Outliers handled!",
             "Imperial Wealth Club": "🧾 Outliers trimmed!"
         }[theme])
     
-    st.session_state.pipeline.update({'df_processed': df, 'preprocessed': True})
+    st.session_state.pipeline.update({'df_processed': result.df, 'preprocessed': True, 'preprocess_config': config})
     with st.expander({
         "Financial Shinobi": "View Purified Scrolls",
         "Techno Exchange": "View Cleaned Data",
         "Imperial Wealth Club": "View Audited Ledger"
     }[theme]):
-        st.dataframe(df)
+        st.dataframe(load_frame(result.df))
     if st.button(next_btn, key="preprocess_next"):
         st.session_state.pipeline['current_step'] = 3
         st.rerun()
@@ -1154,28 +1437,269 @@ def feature_engineering_step():
             "Imperial Wealth Club": "Audit ledger first!"
         }[theme])
         return
-    df = st.session_state.pipeline['df_processed'].copy()
-    
-    if 'Close' in df.columns:
-        window = st.slider({
-            "Financial Shinobi": "Jutsu Window (days)",
-            "Techno Exchange": "Moving Average Window (days)",
-            "Imperial Wealth Club": "Indicator Window (days)"
-        }[theme], 5, 50, 20, help={
-            "Financial Shinobi": "Select window for moving average and volatility.",
-            "Techno Exchange": "Select window for moving average and volatility.",
-            "Imperial Wealth Club": "Select window for rolling indicators."
+    feature_workbench()
+    pipeline = st.session_state.pipeline
+    if pipeline['features_engineered']:
+        with st.expander({
+            "Financial Shinobi": "🎯 Choose the Sharpest Jutsu (feature selection)",
+            "Techno Exchange": "🎯 Feature Relevance & Selection",
+            "Imperial Wealth Club": "🎯 Indicator Relevance & Selection"
+        }[theme]):
+            selection_workbench()
+    if pipeline['features_engineered'] and 'Close' in pipeline['df_features'].columns:
+        with st.expander({
+            "Financial Shinobi": "🔁 Echoes of Past Battles (historical analogs)",
+            "Techno Exchange": "🔁 Historical Analogs",
+            "Imperial Wealth Club": "🔁 Historical Precedents"
+        }[theme]):
+            analog_workbench()
+
+@st.fragment
+def selection_workbench():
+    # Greedy selection over every engineered column; Apply reruns only this fragment, Use reruns the page
+    with governed_run(), get_profiler().stage("selection_workbench", kind="fragment"):
+        _selection_workbench()
+
+def _selection_workbench():
+    theme = st.session_state.theme
+    pipeline = st.session_state.pipeline
+    df_features, target = pipeline['df_features'], pipeline['target']
+    df = load_frame(df_features)
+    candidates = [c for c in engine.numeric_columns(df) if c != target and not engine.horizons.is_target_column(c)]
+    if not candidates:
+        return
+    params = st.session_state.setdefault('selection_params', {'method': 'forward', 'max_features': 10, 'folds': 5,
+                                                              'time_budget': 30, 'run': False})
+    method_labels = {
+        "Financial Shinobi": {"forward": "Summon one by one (forward)", "backward": "Banish one by one (backward)"},
+        "Techno Exchange": {"forward": "Forward selection", "backward": "Backward elimination"},
+        "Imperial Wealth Club": {"forward": "Forward selection", "backward": "Backward elimination"}
+    }[theme]
+    with st.form("selection_form", border=False):
+        st.radio({
+            "Financial Shinobi": "Selection Ritual",
+            "Techno Exchange": "Search Method",
+            "Imperial Wealth Club": "Search Method"
+        }[theme], list(method_labels), list(method_labels).index(params['method']), format_func=method_labels.get,
+            horizontal=True, key="selection_method")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.slider({
+                "Financial Shinobi": "Most Jutsu",
+                "Techno Exchange": "Max Features",
+                "Imperial Wealth Club": "Max Indicators"
+            }[theme], 1, len(candidates), min(params['max_features'], len(candidates)), key="selection_max_features")
+        with col2:
+            st.slider("Folds", 2, 10, params['folds'], key="selection_folds",
+                      help="Contiguous blocks of time; each is scored by a fit on the others.")
+        with col3:
+            st.slider({
+                "Financial Shinobi": "Time Allowed (s)",
+                "Techno Exchange": "Time Budget (s)",
+                "Imperial Wealth Club": "Time Budget (s)"
+            }[theme], 5, 120, params['time_budget'], key="selection_time_budget")
+        st.form_submit_button(THEME_APPLY_LABELS[theme], on_click=lambda: params.update({
+            'method': st.session_state.selection_method, 'max_features': st.session_state.selection_max_features,
+            'folds': st.session_state.selection_folds, 'time_budget': st.session_state.selection_time_budget,
+            'run': True}))
+    if not params['run']:
+        return
+    try:
+        grams = memo_stage("relevance_grams", (frame_key(df_features), tuple(candidates), target, params['folds']),
+                           lambda: engine.relevance.fold_grams(df, candidates, target, params['folds']))
+        config = engine.relevance.SelectionConfig(params['method'], params['folds'], params['max_features'],
+                                                  time_budget=params['time_budget'])
+        result = memo_stage("feature_selection", (frame_key(df_features), tuple(candidates), target, config),
+                            lambda: engine.relevance.select(grams, config))
+        information = memo_stage("mutual_information", (frame_key(df_features), tuple(candidates), target),
+                                 lambda: engine.relevance.mutual_information(df, candidates, target))
+        col1, col2, col3 = st.columns(3)
+        col1.metric("CV R²", f"{result.score:.3f}")
+        col2.metric({
+            "Financial Shinobi": "Jutsu Chosen",
+            "Techno Exchange": "Features Selected",
+            "Imperial Wealth Club": "Indicators Selected"
+        }[theme], f"{len(result.selected)} / {len(candidates)}")
+        col3.metric("Search Time", f"{result.seconds:.2f}s", None if result.complete else "budget reached",
+                    delta_color="off")
+        path = result.path.iloc[1:]
+        fig = go.Figure(go.Scatter(x=path['step'], y=path['score'], mode='lines+markers', text=path['feature'],
+                                   line=dict(color='#39FF14')))
+        plot_config(fig, {
+            "Financial Shinobi": "Strength Gained per Jutsu",
+            "Techno Exchange": "Cross-Validated R² per Step",
+            "Imperial Wealth Club": "Cross-Validated R² per Step"
+        }[theme], "Step", "CV R²")
+        render_chart(fig)
+        ranking = information.rename_axis('Feature').reset_index()
+        ranking['selected'] = ranking['Feature'].isin(result.selected)
+        st.dataframe(ranking.style.format({'mutual_information': '{:.4f}'}), use_container_width=True, hide_index=True)
+        interp = {
+            "Financial Shinobi": "Each step keeps the jutsu that most raises the strength of a fit tested on unseen stretches of time. Mutual information also reveals bonds that are not straight lines.",
+            "Techno Exchange": "Each step adds (or removes) the feature that most improves a linear fit's R² on held-out blocks of time. Mutual information ranks every column by any dependence on the target, linear or not.",
+            "Imperial Wealth Club": "Each step adds (or removes) the indicator that most improves out-of-sample R² across periods. Mutual information ranks every indicator by any dependence on the target."
+        }[theme]
+        st.markdown(f"<div class=\"interpretation\">{interp}</div>", unsafe_allow_html=True)
+        if result.selected and st.button({
+            "Financial Shinobi": "Wield These Jutsu",
+            "Techno Exchange": "Use Selected Features",
+            "Imperial Wealth Club": "Use Selected Indicators"
+        }[theme], key="selection_use", on_click=lambda: (
+                st.session_state.feature_params.update({'features': list(result.selected)}),
+                # Dropping the multiselect's state lets it pick up the new default
+                st.session_state.pop('feature_columns', None))):
+            st.rerun()
+    except Exception as e:
+        st.error({
+            "Financial Shinobi": f"❌ The jutsu trial failed: {e}",
+            "Techno Exchange": f"❌ Feature selection failed: {e}",
+            "Imperial Wealth Club": f"❌ Indicator selection failed: {e}"
+        }[theme])
+
+@st.cache_resource
+def get_analog_index(window):
+    # One index per window length and server process, persisted next to the dataset store
+    path = os.path.join(get_dataset_store().directory, f"analogs_w{window}.npz")
+    index = engine.analogs.AnalogIndex.load(path) if os.path.exists(path) else engine.analogs.AnalogIndex(window)
+    return index, path, threading.Lock()
+
+@st.fragment
+def analog_workbench():
+    # Search settings commit on Apply and rerun only this fragment; unchanged searches come from the memo
+    with governed_run(), get_profiler().stage("analog_workbench", kind="fragment"):
+        _analog_workbench()
+
+def _analog_workbench():
+    theme = st.session_state.theme
+    pipeline = st.session_state.pipeline
+    df_features = pipeline['df_features']
+    candidates = ['Close'] + [c for c in pipeline['features'] or [] if c != 'Close']
+    params = st.session_state.setdefault('analog_params', {'window': 30, 'k': 5, 'columns': ['Close'], 'universe': False,
+                                                           'run': False})
+    with st.form("analog_form", border=False):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.slider({
+                "Financial Shinobi": "Moons in the Echo",
+                "Techno Exchange": "Pattern Window (bars)",
+                "Imperial Wealth Club": "Pattern Length (periods)"
+            }[theme], 10, 250, params['window'], key="analog_window")
+        with col2:
+            st.slider({
+                "Financial Shinobi": "Echoes to Summon",
+                "Techno Exchange": "Analogs (k)",
+                "Imperial Wealth Club": "Precedents (k)"
+            }[theme], 1, 20, params['k'], key="analog_k")
+        st.multiselect({
+            "Financial Shinobi": "Scrolls to Match",
+            "Techno Exchange": "Columns to Match",
+            "Imperial Wealth Club": "Entries to Match"
+        }[theme], candidates, [c for c in params['columns'] if c in candidates] or ['Close'], key="analog_columns",
+            help="Each window is z-normalised, so only the shape of the move matters.")
+        st.checkbox({
+            "Financial Shinobi": "Also search the scouted clans",
+            "Techno Exchange": "Also search the screener universe",
+            "Imperial Wealth Club": "Also search the surveyed holdings"
+        }[theme], params['universe'], help="Close-price shapes across the screener's symbols, from an on-disk index "
+                                           "that only adds new bars.", key="analog_universe")
+        st.form_submit_button(THEME_APPLY_LABELS[theme], on_click=lambda: params.update({
+            'window': st.session_state.analog_window, 'k': st.session_state.analog_k,
+            'columns': st.session_state.analog_columns or ['Close'], 'universe': st.session_state.analog_universe,
+            'run': True}))
+    if not params['run']:
+        return
+    try:
+        columns = [c for c in params['columns'] if c in candidates] or ['Close']
+        config = engine.analogs.AnalogConfig(params['window'], params['k'], columns=tuple(columns))
+        # Returns come from the unscaled prices; the engineered columns may have been standardised
+        prices = load_frame(pipeline['df_processed'], ['Close'])['Close']
+        frame = load_frame(df_features, [c for c in ['Date'] + columns if c in df_features.columns])
+        result = memo_stage("analogs", (frame_key(df_features), config),
+                            lambda: engine.analogs.search(frame, config, prices.loc[frame.index]))
+        matches = result.matches
+        st.dataframe(matches.style.format({'distance': '{:.3f}', **{c: '{:.2%}' for c in matches.columns
+                                                                    if c.startswith('Return_')}}),
+                     use_container_width=True, hide_index=True)
+        st.dataframe(result.summary.style.format({'mean': '{:.2%}', 'median': '{:.2%}', 'positive': '{:.0%}'}),
+                     use_container_width=True)
+        x = frame['Date'] if 'Date' in frame.columns else frame.index
+        fig = go.Figure(go.Scatter(x=x, y=prices.loc[frame.index], mode='lines', name='Close', line=dict(color='#F8F8FF')))
+        fig.add_vrect(x0=x.iloc[-config.window], x1=x.iloc[-1], fillcolor='#39FF14', opacity=0.25, line_width=0)
+        for row in matches.itertuples():
+            fig.add_vrect(x0=x.iloc[row.start], x1=x.iloc[row.end], fillcolor='#FF4136', opacity=0.2, line_width=0)
+        plot_config(fig, {
+            "Financial Shinobi": "Echoes of the Present Battle",
+            "Techno Exchange": "Latest Window (green) and Its Analogs (red)",
+            "Imperial Wealth Club": "Current Pattern (green) and Precedents (red)"
+        }[theme], "Date", "Close")
+        render_chart(fig)
+        if params['universe']:
+            screener = st.session_state.get('screener_params', {})
+            symbols = [s for s in re.split(r"[\s,;]+", screener.get('symbols', "AAPL, MSFT, GOOGL, AMZN, NVDA, META, TSLA, JPM")) if s]
+            start = screener.get('start', datetime.date(2020, 1, 1)).strftime('%Y-%m-%d')
+            end = screener.get('end', datetime.date.today()).strftime('%Y-%m-%d')
+            index, path, lock = get_analog_index(config.window)
+            universe, _ = engine.screener.load_universe(symbols, start, end, history_feed(), get_data_cache(),
+                                                        get_dataset_store())
+            with lock:
+                added = 0
+                for symbol, handle in universe.items():
+                    bars = load_frame(handle, ['Date', 'Close'])
+                    added += index.update(symbol, bars['Date'], bars['Close'])
+                if added:
+                    index.save(path)
+                # The session's own symbol would otherwise match its latest window with itself
+                symbol = pipeline['last_symbol']
+                last = x.iloc[-1] if 'Date' in frame.columns else None
+                exclude = (symbol, index.position(symbol, last)) if symbol and last is not None else None
+                found = index.query(prices.loc[frame.index].to_numpy(), config.k, config.horizons, exclude=exclude)
+            st.dataframe(found.style.format({'distance': '{:.3f}', **{c: '{:.2%}' for c in found.columns
+                                                                      if c.startswith('Return_')}}),
+                         use_container_width=True, hide_index=True)
+            st.caption(f"{len(index):,} windows from {len(index.symbols)} symbols indexed; {added:,} added on this search.")
+        interp = {
+            "Financial Shinobi": "These are the past battles whose shape most resembles the present one. What followed them is no prophecy, but it shows how such moments have tended to unfold.",
+            "Techno Exchange": "Analogs are the past windows closest in z-normalised shape to the latest one. Their subsequent returns show how similar setups played out; a handful of analogs is anecdote, not a forecast.",
+            "Imperial Wealth Club": "Precedents are the past periods whose pattern most resembles today's. Their subsequent returns illustrate how comparable situations resolved."
+        }[theme]
+        st.markdown(f"<div class=\"interpretation\">{interp}</div>", unsafe_allow_html=True)
+    except Exception as e:
+        st.error({
+            "Financial Shinobi": f"❌ The echoes are silent: {e}",
+            "Techno Exchange": f"❌ Analog search failed: {e}",
+            "Imperial Wealth Club": f"❌ Precedent search failed: {e}"
         }[theme])
-        df[f'MA_{window}'] = df['Close'].rolling(window=window).mean().fillna(df['Close'])
-        df[f'Volatility_{window}'] = df['Close'].rolling(window=window).std().fillna(df['Close'].std())
-        df['Daily_Return'] = df['Close'].pct_change().fillna(0)
+
+@st.fragment
+def feature_workbench():
+    # Parameters commit on Apply and rerun only this fragment; unchanged stages come from the memo
+    with governed_run(), get_profiler().stage("feature_workbench", kind="fragment"):
+        _feature_workbench()
+
+def _feature_workbench():
+    theme = st.session_state.theme
+    _, next_btn = THEME_STEP_LABELS["feature_engineering"][theme]
+    processed = st.session_state.pipeline['df_processed']
+    params = st.session_state.setdefault('feature_params', {'window': 20, 'target': None, 'features': None, 'scale': True,
+                                                            'horizons': 0})
+    window, horizons = params['window'], params.get('horizons', 0)
+    
+    has_close = 'Close' in processed.columns
+
+    def build_features():
+        df = engine.add_rolling_features(load_frame(processed), window).df
+        return store_frame(engine.horizons.add_targets(df, horizons)[0], 'features')
+
+    featured = memo_stage("rolling_features", (frame_key(processed), window, horizons), build_features)
+    if has_close:
         st.success({
             "Financial Shinobi": f"⚔️ Forged {window}-day MA, Volatility, Daily Return Jutsu!",
             "Techno Exchange": f"💹 Computed {window}-day MA, Volatility, Daily Return!",
             "Imperial Wealth Club": f"💰 Calculated {window}-day MA, Volatility, Daily Return!"
         }[theme])
     
-    numeric_cols = df.select_dtypes(np.number).columns.tolist()
+    df = load_frame(featured)
+    numeric_cols = engine.numeric_columns(df)
     if not numeric_cols:
         st.error({
             "Financial Shinobi": "No numeric jutsu found!",
@@ -1184,30 +1708,65 @@ def feature_engineering_step():
         }[theme])
         return
     
-    col1, col2 = st.columns(2)
-    with col1:
-        target = st.selectbox({
-            "Financial Shinobi": "Target Seal (y)",
-            "Techno Exchange": "Target Variable (y)",
-            "Imperial Wealth Club": "Target Entry (y)"
-        }[theme], numeric_cols, index=numeric_cols.index('Close') if 'Close' in numeric_cols else 0, 
-                              help={
-            "Financial Shinobi": "Choose the seal for your prophecy.",
-            "Techno Exchange": "Choose the variable to predict.",
-            "Imperial Wealth Club": "Choose the ledger entry to forecast."
-        }[theme])
-    with col2:
-        features = st.multiselect({
-            "Financial Shinobi": "Jutsu (X)",
-            "Techno Exchange": "Features (X)",
-            "Imperial Wealth Club": "Indicators (X)"
-        }[theme], [c for c in numeric_cols if c != target], 
-                                  default=[c for c in numeric_cols if c != target][:2], 
+    target = params['target'] if params['target'] in numeric_cols else ('Close' if 'Close' in numeric_cols else numeric_cols[0])
+    # Future targets would leak the answer, so they are never offered as features
+    feature_cols = [c for c in numeric_cols if not engine.horizons.is_target_column(c)]
+    candidates = [c for c in feature_cols if c != target]
+    features = [c for c in params['features'] or [] if c in candidates] if params['features'] is not None else candidates[:2]
+    with st.form("feature_form", border=False):
+        if has_close:
+            st.slider({
+                "Financial Shinobi": "Jutsu Window (days)",
+                "Techno Exchange": "Moving Average Window (days)",
+                "Imperial Wealth Club": "Indicator Window (days)"
+            }[theme], 5, 50, window, help={
+                "Financial Shinobi": "Select window for moving average and volatility.",
+                "Techno Exchange": "Select window for moving average and volatility.",
+                "Imperial Wealth Club": "Select window for rolling indicators."
+            }[theme], key="feature_window")
+            st.number_input({
+                "Financial Shinobi": "Prophecy Horizons (days ahead)",
+                "Techno Exchange": "Forecast Horizons (days ahead)",
+                "Imperial Wealth Club": "Forecast Horizons (days ahead)"
+            }[theme], 0, 30, horizons, help={
+                "Financial Shinobi": "Add future return and up/down seals for 1..H days ahead as prophecy targets. 0 keeps same-day seals only.",
+                "Techno Exchange": "Add Return_t+h and Up_t+h targets for h = 1..H. Up_t+h is categorical, so Logistic Regression can use it. 0 turns forecasting off.",
+                "Imperial Wealth Club": "Add future return and up/down entries for 1..H days ahead as targets. 0 keeps same-day entries only."
+            }[theme], key="feature_horizons")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.selectbox({
+                "Financial Shinobi": "Target Seal (y)",
+                "Techno Exchange": "Target Variable (y)",
+                "Imperial Wealth Club": "Target Entry (y)"
+            }[theme], numeric_cols, index=numeric_cols.index(target), 
                                   help={
-            "Financial Shinobi": "Select jutsu for your battle.",
-            "Techno Exchange": "Select features for your model.",
-            "Imperial Wealth Club": "Select indicators for your analysis."
-        }[theme])
+                "Financial Shinobi": "Choose the seal for your prophecy.",
+                "Techno Exchange": "Choose the variable to predict.",
+                "Imperial Wealth Club": "Choose the ledger entry to forecast."
+            }[theme], key="feature_target")
+        with col2:
+            st.multiselect({
+                "Financial Shinobi": "Jutsu (X)",
+                "Techno Exchange": "Features (X)",
+                "Imperial Wealth Club": "Indicators (X)"
+            }[theme], feature_cols, default=features, 
+                                      help={
+                "Financial Shinobi": "Select jutsu for your battle.",
+                "Techno Exchange": "Select features for your model.",
+                "Imperial Wealth Club": "Select indicators for your analysis."
+            }[theme], key="feature_columns")
+        st.checkbox(THEME_CHECKBOX_LABELS[theme], value=params['scale'], help={
+            "Financial Shinobi": "Sharpen jutsu for epic battles.",
+            "Techno Exchange": "Normalize features for better model performance.",
+            "Imperial Wealth Club": "Standardize indicators for fair comparison."
+        }[theme], key="feature_scale")
+        # The callback commits the form before the (fragment) rerun, so this run already uses the new values
+        st.form_submit_button(THEME_APPLY_LABELS[theme], on_click=lambda: params.update({
+            'window': st.session_state.get('feature_window', window), 'horizons': st.session_state.get('feature_horizons', horizons),
+            'target': st.session_state.feature_target,
+            'features': [c for c in st.session_state.feature_columns if c != st.session_state.feature_target],
+            'scale': st.session_state.feature_scale}))
     if not features:
         st.warning({
             "Financial Shinobi": "Select at least one jutsu!",
@@ -1216,13 +1775,11 @@ def feature_engineering_step():
         }[theme])
         return
     
-    if st.checkbox(THEME_CHECKBOX_LABELS[theme], value=True, help={
-        "Financial Shinobi": "Sharpen jutsu for epic battles.",
-        "Techno Exchange": "Normalize features for better model performance.",
-        "Imperial Wealth Club": "Standardize indicators for fair comparison."
-    }[theme]):
+    if params['scale']:
         try:
-            df[features] = StandardScaler().fit_transform(df[features])
+            featured = memo_stage("scale_features", (frame_key(featured), tuple(features)),
+                                  lambda: store_frame(engine.scale_features(df, features), 'features'))
+            df = load_frame(featured)
             st.success({
                 "Financial Shinobi": "⚔️ Jutsu honed!",
                 "Techno Exchange": "💹 Features normalized!",
@@ -1236,19 +1793,23 @@ def feature_engineering_step():
             }[theme])
     
     try:
-        corr_title, corr_x, corr_y = THEME_GRAPH_LABELS['correlation_matrix'][theme]
-        fig = px.imshow(df[features + [target]].corr(), text_auto=True, color_continuous_scale='Reds', title=corr_title, width=600, height=500)
-        plot_config(fig, corr_title, corr_x, corr_y)
-        st.plotly_chart(fig)
+        def build_charts():
+            corr_title, corr_x, corr_y = THEME_GRAPH_LABELS['correlation_matrix'][theme]
+            corr_fig = px.imshow(engine.correlation(df, features + [target]), text_auto=True, color_continuous_scale='Reds', title=corr_title, width=600, height=500)
+            plot_config(corr_fig, corr_title, corr_x, corr_y)
+            scatter_title, scatter_x, scatter_y = THEME_GRAPH_LABELS['scatter_matrix'][theme]
+            scatter_fig = px.scatter_matrix(df[features + [target]], title=scatter_title, width=800, height=600, color_discrete_sequence=['#39FF14'])
+            plot_config(scatter_fig, scatter_title, scatter_x, scatter_y)
+            return corr_fig, scatter_fig
+
+        corr_fig, scatter_fig = memo_stage("feature_charts", (frame_key(featured), tuple(features), target, theme), build_charts)
+        render_chart(corr_fig)
         st.markdown(f"""
             <div class="interpretation">
             {THEME_INTERPRETATIONS['correlation_matrix'][theme]}
             </div>
         """, unsafe_allow_html=True)
-        scatter_title, scatter_x, scatter_y = THEME_GRAPH_LABELS['scatter_matrix'][theme]
-        fig = px.scatter_matrix(df[features + [target]], title=scatter_title, width=800, height=600, color_discrete_sequence=['#39FF14'])
-        plot_config(fig, scatter_title, scatter_x, scatter_y)
-        st.plotly_chart(fig)
+        render_chart(scatter_fig)
         st.markdown(f"""
             <div class="interpretation">
             {THEME_INTERPRETATIONS['scatter_matrix'][theme]}
@@ -1261,7 +1822,7 @@ def feature_engineering_step():
             "Imperial Wealth Club": f"❌ Visualization failed: {e}"
         }[theme])
     
-    st.session_state.pipeline.update({'target': target, 'features': features, 'df_features': df, 'features_engineered': True})
+    st.session_state.pipeline.update({'target': target, 'features': features, 'df_features': featured, 'features_engineered': True})
     if st.button(next_btn, key="feature_next"):
         st.session_state.pipeline['current_step'] = 4
         st.rerun()
@@ -1277,34 +1838,69 @@ def train_test_split_step():
             "Imperial Wealth Club": "Calculate indicators first!"
         }[theme])
         return
-    df, target, features = (st.session_state.pipeline[k] for k in ['df_features', 'target', 'features'])
+    split_workbench()
+
+@st.fragment
+def split_workbench():
+    # Test size and seed commit on Apply and rerun only this fragment
+    with governed_run(), get_profiler().stage("split_workbench", kind="fragment"):
+        _split_workbench()
+
+def _split_workbench():
+    theme = st.session_state.theme
+    _, next_btn = THEME_STEP_LABELS["split"][theme]
+    target, features = st.session_state.pipeline['target'], st.session_state.pipeline['features']
+    df_features = st.session_state.pipeline['df_features']
+    params = st.session_state.setdefault('split_params', {'test_size': 20, 'random_state': 42})
     
-    col1, col2 = st.columns(2)
-    with col1:
-        test_size = st.slider({
-            "Financial Shinobi": "Test Clan Size (%)",
-            "Techno Exchange": "Test Set Size (%)",
-            "Imperial Wealth Club": "Test Account Size (%)"
-        }[theme], 10, 40, 20, help={
-            "Financial Shinobi": "Percentage of shinobi for testing.",
-            "Techno Exchange": "Percentage of data for testing.",
-            "Imperial Wealth Club": "Percentage of accounts for testing."
-        }[theme]) / 100
-    with col2:
-        random_state = st.number_input({
-            "Financial Shinobi": "Shadow Seed",
-            "Techno Exchange": "Random Seed",
-            "Imperial Wealth Club": "Ledger Seed"
-        }[theme], 0, 100, 42, help={
-            "Financial Shinobi": "Seed for consistent clan splits.",
-            "Techno Exchange": "Seed for reproducible splits.",
-            "Imperial Wealth Club": "Seed for consistent account splits."
+    with st.form("split_form", border=False):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.slider({
+                "Financial Shinobi": "Test Clan Size (%)",
+                "Techno Exchange": "Test Set Size (%)",
+                "Imperial Wealth Club": "Test Account Size (%)"
+            }[theme], 10, 40, params['test_size'], help={
+                "Financial Shinobi": "Percentage of shinobi for testing.",
+                "Techno Exchange": "Percentage of data for testing.",
+                "Imperial Wealth Club": "Percentage of accounts for testing."
+            }[theme], key="split_test_size")
+        with col2:
+            st.number_input({
+                "Financial Shinobi": "Shadow Seed",
+                "Techno Exchange": "Random Seed",
+                "Imperial Wealth Club": "Ledger Seed"
+            }[theme], 0, 100, params['random_state'], help={
+                "Financial Shinobi": "Seed for consistent clan splits.",
+                "Techno Exchange": "Seed for reproducible splits.",
+                "Imperial Wealth Club": "Seed for consistent account splits."
+            }[theme], key="split_seed")
+        st.checkbox({
+            "Financial Shinobi": "⏳ Test on the latest scrolls (no shuffle)",
+            "Techno Exchange": "⏳ Chronological hold-out (no shuffle)",
+            "Imperial Wealth Club": "⏳ Hold out the latest entries (no shuffle)"
+        }[theme], params.get('chronological', False), key="split_chronological", help={
+            "Financial Shinobi": "Test on the most recent seals. The step-7 backtest needs this: a shuffled split trains on moons after the ones it strikes.",
+            "Techno Exchange": "Test on the most recent rows. The step-7 backtest needs this: a shuffled split trains on bars after the ones it trades.",
+            "Imperial Wealth Club": "Test on the most recent entries. The step-7 backtest needs this: a shuffled split trains on periods after the ones it trades."
         }[theme])
+        st.form_submit_button(THEME_APPLY_LABELS[theme], on_click=lambda: params.update({
+            'test_size': st.session_state.split_test_size, 'random_state': st.session_state.split_seed,
+            'chronological': st.session_state.split_chronological}))
+    horizon = engine.horizons.target_horizon(target)
+    if horizon:
+        st.caption(f"{target} looks {horizon} bars ahead, so neighbouring rows share future moves. The split is always "
+                   f"chronological, and the last {horizon} training rows before the test block are purged.")
     try:
-        X, y = df[features].dropna(), df[target].loc[df[features].dropna().index]
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+        config = engine.SplitConfig(test_size=params['test_size'] / 100, random_state=params['random_state'],
+                                    shuffle=not params.get('chronological', False))
+        key = (frame_key(df_features), tuple(features), target, config.test_size, config.random_state, config.shuffle)
+        data = memo_stage("split", key,
+                          lambda: engine.split(load_frame(df_features, features + [target]), features, target, config))
+        X_train, X_test, y_train, y_test = data.X_train, data.X_test, data.y_train, data.y_test
         st.session_state.pipeline.update({
-            'X_train': X_train, 'X_test': X_test, 'y_train': y_train, 'y_test': y_test, 'data_split': True
+            'X_train': X_train, 'X_test': X_test, 'y_train': y_train, 'y_test': y_test, 'data_split': True,
+            'split_key': key
         })
         pie_title = {
             "Financial Shinobi": "Training vs Testing Clans",
@@ -1316,7 +1912,7 @@ def train_test_split_step():
             {"Financial Shinobi": "Testing", "Techno Exchange": "Testing", "Imperial Wealth Club": "Testing"}[theme]
         ], 'Size': [len(X_train), len(X_test)]}), names='Set', values='Size', title=pie_title, width=400, height=400, color_discrete_sequence=['#B22222', '#8A2BE2'])
         plot_config(fig, pie_title, '', '')
-        st.plotly_chart(fig)
+        render_chart(fig)
         interp = {
             "Financial Shinobi": "This scroll divides your shinobi: training (crimson) for mastery, testing (purple) for trials. A larger training clan strengthens your jutsu, while the test clan ensures fair duels.",
             "Techno Exchange": "This pie shows the split between training and testing sets. More training data helps the model learn, while testing ensures fair evaluation.",
@@ -1353,6 +1949,13 @@ def model_training_step():
             "Imperial Wealth Club": "Partition accounts first!"
         }[theme])
         return
+    if 'Close' in st.session_state.pipeline['df_processed'].columns:
+        with st.expander({
+            "Financial Shinobi": "🔭 Far-Sight Prophecies (multi-horizon)",
+            "Techno Exchange": "🔭 Multi-Horizon Forecast",
+            "Imperial Wealth Club": "🔭 Multi-Horizon Outlook"
+        }[theme]):
+            horizon_workbench()
     X_train, y_train = st.session_state.pipeline['X_train'], st.session_state.pipeline['y_train']
     model_options = [
         {"Financial Shinobi": "Linear Regression", "Techno Exchange": "Linear Regression", "Imperial Wealth Club": "Linear Regression"}[theme],
@@ -1375,37 +1978,70 @@ def model_training_step():
             "Imperial Wealth Club": "Select an analyst method!"
         }[theme])
         return
-    target_is_continuous = is_continuous(y_train)
-    if "Linear Regression" in model_types and not target_is_continuous:
+    try:
+        engine.validate_model_types(model_types, y_train)
+    except engine.ModelSelectionError as e:
         st.warning({
-            "Financial Shinobi": "⚠️ Linear Regression needs continuous seals!",
-            "Techno Exchange": "⚠️ Linear Regression needs continuous targets!",
-            "Imperial Wealth Club": "⚠️ Linear Regression needs continuous entries!"
-        }[theme])
+            "linear_needs_continuous": {
+                "Financial Shinobi": "⚠️ Linear Regression needs continuous seals!",
+                "Techno Exchange": "⚠️ Linear Regression needs continuous targets!",
+                "Imperial Wealth Club": "⚠️ Linear Regression needs continuous entries!"
+            },
+            "logistic_needs_categorical": {
+                "Financial Shinobi": "⚠️ Logistic Regression needs categorical seals!",
+                "Techno Exchange": "⚠️ Logistic Regression needs categorical targets!",
+                "Imperial Wealth Club": "⚠️ Logistic Regression needs categorical entries!"
+            }
+        }[e.code][theme])
         return
-    if "Logistic Regression" in model_types and target_is_continuous:
-        st.warning({
-            "Financial Shinobi": "⚠️ Logistic Regression needs categorical seals!",
-            "Techno Exchange": "⚠️ Logistic Regression needs categorical targets!",
-            "Imperial Wealth Club": "⚠️ Logistic Regression needs categorical entries!"
+    train_config = engine.TrainConfig(model_types=model_types)
+    if "Linear Regression" in model_types:
+        fit_labels = {
+            "Financial Shinobi": {"static": "Fixed stance", "rolling": "Rolling window", "expanding": "Growing scroll", "rls": "Fading memory (RLS)"},
+            "Techno Exchange": {"static": "Static fit", "rolling": "Rolling window", "expanding": "Expanding window", "rls": "Recursive least squares"},
+            "Imperial Wealth Club": {"static": "Single fit", "rolling": "Rolling window", "expanding": "Expanding window", "rls": "Recursive least squares"}
+        }[theme]
+        linear_fit = st.radio({
+            "Financial Shinobi": "Linear Jutsu Stance",
+            "Techno Exchange": "Linear Regression Fit",
+            "Imperial Wealth Club": "Linear Regression Fit"
+        }[theme], list(fit_labels), format_func=fit_labels.get, horizontal=True, key="linear_fit", help={
+            "Financial Shinobi": "Let the power seals shift over time. Test seals are foretold only from earlier seals.",
+            "Techno Exchange": "Time-varying coefficients over the history in row order. Test rows get walk-forward (one-step-ahead) forecasts.",
+            "Imperial Wealth Club": "Let coefficients evolve over time. Test entries are forecast only from earlier entries."
         }[theme])
-        return
-    models = {}
+        if linear_fit == "rolling":
+            train_config.linear_fit = engine.rolling_ols.RollingOLSConfig("rolling", window=st.slider(
+                "Window", 10, 500, 60, key="linear_window"))
+        elif linear_fit == "rls":
+            train_config.linear_fit = engine.rolling_ols.RollingOLSConfig("rls", forgetting=st.slider(
+                "Forgetting factor", 0.90, 0.999, 0.99, 0.001, format="%.3f", key="linear_forgetting"))
+        elif linear_fit == "expanding":
+            train_config.linear_fit = engine.rolling_ols.RollingOLSConfig("expanding")
     if "K-Means Clustering" in model_types:
-        n_clusters = st.number_input({
-            "Financial Shinobi": "Clans",
-            "Techno Exchange": "Clusters",
-            "Imperial Wealth Club": "Groups"
-        }[theme], 2, 10, 3, key="clusters", help={
-            "Financial Shinobi": "Number of clans for K-Means.",
-            "Techno Exchange": "Number of clusters for K-Means.",
-            "Imperial Wealth Club": "Number of groups for K-Means."
-        }[theme])
-        models["K-Means Clustering"] = KMeans(n_clusters=n_clusters, random_state=42)
-    if "Linear Regression" in model_types:
-        models["Linear Regression"] = LinearRegression()
-    if "Logistic Regression" in model_types:
-        models["Logistic Regression"] = LogisticRegression(max_iter=1000)
+        discover = st.checkbox({
+            "Financial Shinobi": "🌀 Discover clan regimes (sweep clan counts)",
+            "Techno Exchange": "🌀 Regime discovery (sweep cluster counts)",
+            "Imperial Wealth Club": "🌀 Discover market regimes (sweep group counts)"
+        }[theme], key="kmeans_discover", help="Fit every K in the range in parallel and keep the one with the best silhouette.")
+        if discover:
+            train_config.k_range = st.slider({
+                "Financial Shinobi": "Clan Range",
+                "Techno Exchange": "Cluster Range",
+                "Imperial Wealth Club": "Group Range"
+            }[theme], 2, 12, (2, 8), key="clusters_range")
+        else:
+            n_clusters = st.number_input({
+                "Financial Shinobi": "Clans",
+                "Techno Exchange": "Clusters",
+                "Imperial Wealth Club": "Groups"
+            }[theme], 2, 10, 3, key="clusters", help={
+                "Financial Shinobi": "Number of clans for K-Means.",
+                "Techno Exchange": "Number of clusters for K-Means.",
+                "Imperial Wealth Club": "Number of groups for K-Means."
+            }[theme])
+            train_config.n_clusters = n_clusters
+    models = engine.build_models(train_config)
     if st.button(train_btn, key="train"):
         with st.spinner({
             "Financial Shinobi": "Training Sensei...",
@@ -1413,9 +2049,20 @@ def model_training_step():
             "Imperial Wealth Club": "Training Analyst..."
         }[theme]):
             try:
+                regime_scores = None
                 for model_type, model in models.items():
-                    model.fit(X_train, y_train if model_type != "K-Means Clustering" else X_train)
-                st.session_state.pipeline.update({'models': models, 'model_trained': True})
+                    if model_type == "K-Means Clustering" and train_config.k_range:
+                        config = engine.regimes.RegimeSweepConfig(*train_config.k_range)
+                        regimes = memo_stage("kmeans_sweep", (split_key(), config),
+                                             lambda: engine.regimes.sweep(X_train, config))
+                        models[model_type], regime_scores = regimes.best_model, regimes.scores
+                        continue
+                    with get_profiler().stage(f"fit:{model_type}"):
+                        engine.fit_model(model_type, model, X_train, y_train, engine.full_history(engine.SplitResult(
+                            *(st.session_state.pipeline[k] for k in ['X_train', 'X_test', 'y_train', 'y_test']))))
+                st.session_state.pipeline.update({'models': models, 'model_trained': True, 'regime_scores': regime_scores,
+                                                  'train_config': train_config,
+                                                  'train_generation': st.session_state.pipeline.get('train_generation', 0) + 1})
                 st.success({
                     "Financial Shinobi": "⚔️ Sensei mastered!",
                     "Techno Exchange": "💹 Model trained!",
@@ -1428,22 +2075,29 @@ def model_training_step():
                 }[theme]):
                     for model_type, model in models.items():
                         st.write(f"**{model_type}**")
+                        st.dataframe(engine.model_details(model_type, model, st.session_state.pipeline['features']))
                         if model_type in ["Linear Regression", "Logistic Regression"]:
-                            st.dataframe(pd.DataFrame({
-                                'Feature': ['Intercept'] + st.session_state.pipeline['features'],
-                                'Coefficient': [model.intercept_] + list(model.coef_.flatten())
-                            }))
+                            pipeline = st.session_state.pipeline
+                            importance = memo_stage(f"permutation:{model_type}", train_key(),
+                                                    lambda: engine.relevance.permutation_importance(
+                                                        model, pipeline['X_test'], pipeline['y_test']))
+                            st.write({
+                                "Financial Shinobi": "Power lost when each jutsu is scrambled (test clans)",
+                                "Techno Exchange": "Permutation importance (test rows)",
+                                "Imperial Wealth Club": "Permutation importance (test accounts)"
+                            }[theme])
+                            st.dataframe(importance.style.format({'importance': '{:.4f}', 'std': '{:.4f}'}),
+                                         hide_index=True)
                             st.markdown(f"""
                                 <div class="interpretation">
                                 { {
                                     "Financial Shinobi": "Power seals show each jutsu's impact. Positive seals boost the target, negative seals weaken it. Greater seals wield stronger influence.",
-                                    "Techno Exchange": "Coefficients show each feature's impact. Positive values increase the target, negative values decrease it.",
+                                    "Techno Exchange": "Coefficients show each feature's impact. Positive values increase the target, negative values decrease it. Permutation importance is the score lost on test rows when a feature is shuffled, so it is comparable across features whatever their scale.",
                                     "Imperial Wealth Club": "Coefficients show each indicator's effect. Positive values increase the entry, negative values decrease it."
                                 }[theme] }
                                 </div>
                             """, unsafe_allow_html=True)
                         else:
-                            st.dataframe(pd.DataFrame(model.cluster_centers_, columns=st.session_state.pipeline['features']))
                             st.markdown(f"""
                                 <div class="interpretation">
                                 { {
@@ -1453,15 +2107,175 @@ def model_training_step():
                                 }[theme] }
                                 </div>
                             """, unsafe_allow_html=True)
-                if st.button(next_btn, key="train_next"):
-                    st.session_state.pipeline['current_step'] = 6
-                    st.rerun()
             except Exception as e:
                 st.error({
                     "Financial Shinobi": f"❌ Sensei training failed: {e}",
                     "Techno Exchange": f"❌ Model training failed: {e}",
                     "Imperial Wealth Club": f"❌ Analyst training failed: {e}"
                 }[theme])
+    regime_scores = st.session_state.pipeline.get('regime_scores')
+    if st.session_state.pipeline['model_trained'] and regime_scores is not None:
+        regime_elbow(regime_scores)
+    # Outside the train button's branch, which is False again on the rerun this click triggers
+    if st.session_state.pipeline['model_trained'] and st.button(next_btn, key="train_next"):
+        st.session_state.pipeline['current_step'] = 6
+        st.rerun()
+
+@st.fragment
+def horizon_workbench():
+    # One direct model per horizon, trained in parallel on a chronological split; reruns only this fragment
+    with governed_run(), get_profiler().stage("horizon_workbench", kind="fragment"):
+        _horizon_workbench()
+
+def _horizon_workbench():
+    theme = st.session_state.theme
+    pipeline = st.session_state.pipeline
+    df_features, features = pipeline['df_features'], pipeline['features']
+    params = st.session_state.setdefault('horizon_params', {'max_horizon': 10, 'kind': 'return', 'test_size': 20, 'run': False})
+    kind_labels = {
+        "Financial Shinobi": {"return": "Future returns (Linear)", "direction": "Rise or fall (Logistic)"},
+        "Techno Exchange": {"return": "Returns (Linear Regression)", "direction": "Direction (Logistic Regression)"},
+        "Imperial Wealth Club": {"return": "Returns (Linear Regression)", "direction": "Direction (Logistic Regression)"}
+    }[theme]
+    with st.form("horizon_form", border=False):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.slider({
+                "Financial Shinobi": "Farthest Prophecy (days)",
+                "Techno Exchange": "Max Horizon (days)",
+                "Imperial Wealth Club": "Furthest Horizon (days)"
+            }[theme], 1, 60, params['max_horizon'], key="horizon_max")
+        with col2:
+            st.radio({
+                "Financial Shinobi": "Prophecy",
+                "Techno Exchange": "Target",
+                "Imperial Wealth Club": "Forecast"
+            }[theme], list(kind_labels), index=list(kind_labels).index(params['kind']), format_func=kind_labels.get,
+                key="horizon_kind")
+        with col3:
+            st.slider({
+                "Financial Shinobi": "Final Trial (%)",
+                "Techno Exchange": "Test Block (%)",
+                "Imperial Wealth Club": "Held-Out Period (%)"
+            }[theme], 10, 40, params['test_size'], help="The most recent share of rows. Training stops h rows before it, so no target overlaps the test period.",
+                key="horizon_test_size")
+        st.form_submit_button(THEME_APPLY_LABELS[theme], on_click=lambda: params.update({
+            'max_horizon': st.session_state.horizon_max, 'kind': st.session_state.horizon_kind,
+            'test_size': st.session_state.horizon_test_size, 'run': True}))
+    if not params['run']:
+        return
+    try:
+        config = engine.horizons.HorizonConfig(tuple(range(1, params['max_horizon'] + 1)), params['kind'], params['test_size'] / 100)
+        # Future returns come from the unscaled prices; Close in the engineered frame is standardised when it is a feature
+        prices = load_frame(pipeline['df_processed'], ['Close'])['Close']
+        result = memo_stage("horizons", (frame_key(df_features), tuple(features), config),
+                            lambda: engine.horizons.forecast_horizons(load_frame(df_features, features), features, config,
+                                                                      prices=prices))
+        scores = result.scores
+        metrics = ['r2', 'hit_rate', 'ic'] if config.kind == "return" else ['accuracy', 'base_rate', 'auc']
+        title = {
+            "Financial Shinobi": "How Far the Far-Sight Reaches",
+            "Techno Exchange": "Forecast Skill by Horizon",
+            "Imperial Wealth Club": "Forecast Skill by Horizon"
+        }[theme]
+        fig = go.Figure()
+        for metric in metrics:
+            if metric in scores:
+                fig.add_trace(go.Scatter(x=scores['horizon'], y=scores[metric], mode='lines+markers', name=metric))
+        plot_config(fig, title, "Horizon (days ahead)", "Skill")
+        render_chart(fig)
+        st.dataframe(scores, use_container_width=True, hide_index=True)
+        interp = {
+            "Financial Shinobi": "Each point is a separate sensei trained to see h days ahead. Where the lines sink to chance (R² at 0, hit rate or accuracy at the base rate), the far-sight fades.",
+            "Techno Exchange": "One direct model per horizon, scored on the latest block of data. Skill usually decays with horizon; where R² reaches 0 or accuracy reaches the base rate, the features stop carrying information.",
+            "Imperial Wealth Club": "Each point is a separate model forecasting h days ahead on the most recent period. Where skill falls to chance, the indicators no longer inform the outlook."
+        }[theme]
+        st.markdown(f"<div class=\"interpretation\">{interp}</div>", unsafe_allow_html=True)
+    except Exception as e:
+        st.error({
+            "Financial Shinobi": f"❌ Far-sight failed: {e}",
+            "Techno Exchange": f"❌ Multi-horizon forecast failed: {e}",
+            "Imperial Wealth Club": f"❌ Multi-horizon outlook failed: {e}"
+        }[theme])
+
+def regime_elbow(scores):
+    theme = st.session_state.theme
+    best_k = int(scores.loc[scores['silhouette'].fillna(-np.inf).idxmax(), 'k'])
+    title = {
+        "Financial Shinobi": "Clan Count Trials",
+        "Techno Exchange": "Cluster Count Sweep",
+        "Imperial Wealth Club": "Group Count Survey"
+    }[theme]
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=scores['k'], y=scores['inertia'], mode='lines+markers', name='Inertia'))
+    fig.add_trace(go.Scatter(x=scores['k'], y=scores['silhouette'], mode='lines+markers', name='Silhouette', yaxis='y2'))
+    fig.add_trace(go.Scatter(x=scores['k'], y=scores['davies_bouldin'], mode='lines+markers', name='Davies-Bouldin', yaxis='y2'))
+    fig.add_vline(x=best_k, line_dash="dash", line_color="#F8F8FF")
+    plot_config(fig, title, "K", "Inertia")
+    fig.update_layout(yaxis2=dict(title="Silhouette / Davies-Bouldin", overlaying='y', side='right'))
+    render_chart(fig)
+    interp = {
+        "Financial Shinobi": f"The elbow in inertia and the highest silhouette point to {best_k} clans. A lower Davies-Bouldin seal means clans stand further apart.",
+        "Techno Exchange": f"Inertia's elbow and the highest silhouette suggest K = {best_k}. Lower Davies-Bouldin means better-separated clusters. Scores are computed on a time-stratified sample.",
+        "Imperial Wealth Club": f"The elbow in inertia and the highest silhouette favour {best_k} groups. Lower Davies-Bouldin means more distinct groups."
+    }[theme]
+    st.markdown(f"<div class=\"interpretation\">{interp}</div>", unsafe_allow_html=True)
+
+def coefficient_paths(model):
+    # Time-varying betas from the rolling/recursive fit, on a time-stratified sample of rows
+    theme = st.session_state.theme
+    df_features = st.session_state.pipeline['df_features']
+    coefficients = model.result_.coefficients.dropna()
+    sample = coefficients.iloc[engine.regimes.stratified_sample(len(coefficients), 5_000)]
+    if 'Date' in df_features.columns:
+        sample = sample.set_axis(load_frame(df_features, ['Date']).loc[sample.index, 'Date'])
+    title = {
+        "Financial Shinobi": "Shifting Power Seals",
+        "Techno Exchange": "Time-Varying Coefficients",
+        "Imperial Wealth Club": "Evolving Coefficients"
+    }[theme]
+    fig = go.Figure()
+    for col in sample.columns.drop('Intercept'):
+        fig.add_trace(go.Scatter(x=sample.index, y=sample[col], mode='lines', name=col))
+    plot_config(fig, title, "Date", "Coefficient")
+    render_chart(fig)
+    interp = {
+        "Financial Shinobi": "Each line is a jutsu's power seal as it shifts through time. Steady lines mean a stable bond; swings mean the market changed its ways.",
+        "Techno Exchange": "Each line is a feature's coefficient at that point in time. Flat lines mean a stable relationship; drift or jumps mean it changed.",
+        "Imperial Wealth Club": "Each line is an indicator's coefficient over time. Stable lines mean a steady relationship; movement means it shifted."
+    }[theme]
+    st.markdown(f"<div class=\"interpretation\">{interp}</div>", unsafe_allow_html=True)
+
+def regime_timeline(model):
+    # Every engineered row is labelled (in chunks); the chart shows a time-stratified sample of them
+    theme = st.session_state.theme
+    pipeline = st.session_state.pipeline
+    df_features, features, target = pipeline['df_features'], pipeline['features'], pipeline['target']
+    price = 'Close' if 'Close' in df_features.columns else target
+    columns = list(dict.fromkeys([c for c in ['Date', price] if c in df_features.columns] + features))
+
+    def label():
+        df = load_frame(df_features, columns).dropna(subset=features)
+        return df.assign(Regime=engine.regimes.label_rows(model, df[features]))
+
+    frame = memo_stage("regime_labels", (frame_key(df_features), tuple(features), train_key()), label)
+    sample = frame.iloc[engine.regimes.stratified_sample(len(frame), 5_000)]
+    title = {
+        "Financial Shinobi": "Clan Regimes Across the Timeline",
+        "Techno Exchange": "Market Regimes Over Time",
+        "Imperial Wealth Club": "Market Regimes in the Ledger"
+    }[theme]
+    fig = px.scatter(sample.assign(Regime=sample['Regime'].astype(str)), x='Date' if 'Date' in sample else sample.index,
+                     y=price, color='Regime', title=title)
+    fig.update_traces(marker=dict(size=5))
+    plot_config(fig, title, "Date", price)
+    render_chart(fig)
+    interp = {
+        "Financial Shinobi": "Each colour is a clan: stretches where the market fought in the same style. Shifts in colour mark changes of regime.",
+        "Techno Exchange": "Each colour is a cluster of similar feature values. Runs of one colour are market regimes; colour changes mark regime shifts.",
+        "Imperial Wealth Club": "Each colour is a group of similar conditions. Long runs of one colour are regimes; changes mark shifts in the market."
+    }[theme]
+    st.markdown(f"<div class=\"interpretation\">{interp}</div>", unsafe_allow_html=True)
 
 def evaluation_step():
     theme = st.session_state.theme
@@ -1476,15 +2290,12 @@ def evaluation_step():
         return
     models, X_test, y_test = (st.session_state.pipeline[k] for k in ['models', 'X_test', 'y_test'])
     try:
-        y_preds = {mt: m.predict(X_test) for mt, m in models.items()}
+        y_preds = {}
+        for mt, m in models.items():
+            with get_profiler().stage(f"predict:{mt}"):
+                y_preds[mt] = engine.predict({mt: m}, X_test)[mt]
         st.session_state.pipeline['y_preds'] = y_preds
-        metrics_df = pd.DataFrame(columns=['Model', 'RMSE', 'R²'])
-        for mt, yp in y_preds.items():
-            if mt != "K-Means Clustering":
-                mse = mean_squared_error(y_test, yp)
-                metrics_df = pd.concat([metrics_df, pd.DataFrame({
-                    'Model': [mt], 'RMSE': [np.sqrt(mse)], 'R²': [r2_score(y_test, yp)]
-        })], ignore_index=True)
+        metrics_df = engine.score(y_test, y_preds)
         if not metrics_df.empty:
             st.subheader({
                 "Financial Shinobi": "Prophecy Power",
@@ -1516,7 +2327,7 @@ def evaluation_step():
             if mt != "K-Means Clustering":
                 fig.add_trace(go.Scatter(x=y_test, y=yp, mode='markers', name=f'{mt} Predictions', marker=dict(size=8, opacity=0.7, color='#39FF14')))
         plot_config(fig, scatter_title, "Actual", "Predicted", 600, 400)
-        st.plotly_chart(fig)
+        render_chart(fig)
         interp = {
             "Financial Shinobi": "Seals near the sacred line are true prophecies. Scattered seals reveal errors. Hover to compare actual vs. prophesied seals.",
             "Techno Exchange": "Points near the line are accurate predictions. Scatter indicates error. Hover for details.",
@@ -1536,7 +2347,7 @@ def evaluation_step():
                 fig = px.scatter(residual_df, x='Predicted', y='Residuals', title=res_title, width=600, height=400, color_discrete_sequence=['#39FF14'])
                 fig.add_hline(y=0, line_dash="dash", line_color="#F8F8FF")
                 plot_config(fig, res_title, "Predicted", "Residuals", 600, 400)
-                st.plotly_chart(fig)
+                render_chart(fig)
                 interp = {
                     "Financial Shinobi": "Residuals (prophecy errors) should scatter like blood drops around zero. Patterns suggest missed trends.",
                     "Techno Exchange": "Residuals should be randomly scattered around zero. Patterns may indicate bias.",
@@ -1555,7 +2366,7 @@ def evaluation_step():
                 }[theme]
                 fig = px.histogram(residual_df, x='Residuals', title=hist_title, nbins=30, color_discrete_sequence=['#39FF14'], opacity=0.7)
                 plot_config(fig, hist_title, "Residuals", "Count", 600, 400)
-                st.plotly_chart(fig)
+                render_chart(fig)
                 interp = {
                     "Financial Shinobi": "A storm peaking near zero suggests an unbiased sensei. Skewed or wild storms signal systematic errors.",
                     "Techno Exchange": "A peak near zero means unbiased model. Skewed or wide distribution signals error.",
@@ -1563,6 +2374,10 @@ def evaluation_step():
                 }[theme]
                 st.markdown(f"<div class=\"interpretation\">{interp}</div>", unsafe_allow_html=True)
         # ... (continue this pattern for all graphs and interpretation blocks in this step) ...
+        if isinstance(models.get("Linear Regression"), engine.rolling_ols.RollingOLS):
+            coefficient_paths(models["Linear Regression"])
+        if "K-Means Clustering" in models:
+            regime_timeline(models["K-Means Clustering"])
         if st.button(next_btn, key="evaluation_next"):
             st.session_state.pipeline['model_evaluated'] = True
             st.session_state.pipeline['current_step'] = 7
@@ -1615,35 +2430,48 @@ def results_visualization_step():
         "Techno Exchange": "Predicted Value",
         "Imperial Wealth Club": "Forecasted Entry"
     }[theme], 700, 500)
-    st.plotly_chart(fig)
-    
-    # Download buttons for each model's predictions
-    for mt, yp in y_preds.items():
-        if mt != "K-Means Clustering":
-            results_df = pd.DataFrame({
-                {
-                    "Financial Shinobi": "Actual Seal",
-                    "Techno Exchange": "Actual Value",
-                    "Imperial Wealth Club": "Actual Entry"
-                }[theme]: y_test,
-                {
-                    "Financial Shinobi": f"Prophesied Seal ({mt})",
-                    "Techno Exchange": f"Predicted Value ({mt})",
-                    "Imperial Wealth Club": f"Forecasted Entry ({mt})"
-                }[theme]: yp
-            })
-            csv = results_df.to_csv(index=False).encode('utf-8')
-            st.download_button(
-                label={
-                    "Financial Shinobi": f"📥 Download Prophecy ({mt})",
-                    "Techno Exchange": f"⬇️ Download Predictions ({mt})",
-                    "Imperial Wealth Club": f"💾 Download Ledger Results ({mt})"
-                }[theme],
-                data=csv,
-                file_name=f"{mt.replace(' ', '_').lower()}_results.csv",
-                mime='text/csv',
-                key=f"download_{mt}"
-            )
+    render_chart(fig)
+    backtest_workbench()
+    montecarlo_workbench()
+    screener_workbench()
+    crossasset_workbench()
+
+    # One combined download for all models, encoded only when clicked
+    formats = list(engine.export.FORMATS)
+    fmt = st.radio({
+        "Financial Shinobi": "Scroll Format",
+        "Techno Exchange": "Export Format",
+        "Imperial Wealth Club": "Ledger Format"
+    }[theme], formats, format_func=lambda f: engine.export.FORMATS[f].label, horizontal=True, key="export_format")
+    pipeline = st.session_state.pipeline
+    actual_label = {
+        "Financial Shinobi": "Actual Seal",
+        "Techno Exchange": "Actual Value",
+        "Imperial Wealth Club": "Actual Entry"
+    }[theme]
+    predicted_label = {
+        "Financial Shinobi": "Prophesied Seal ({model})",
+        "Techno Exchange": "Predicted Value ({model})",
+        "Imperial Wealth Club": "Forecasted Entry ({model})"
+    }[theme]
+
+    def build_export():
+        frame = engine.export.combined_results(load_frame(pipeline['df_features']), pipeline['features'], y_test, y_preds,
+                                               actual_label, predicted_label)
+        # Streamlit reads the handle itself, so the file is never held twice in this process
+        return open(engine.export.export_file(frame, fmt), "rb")
+
+    st.download_button(
+        label={
+            "Financial Shinobi": "📥 Download Prophecies",
+            "Techno Exchange": "⬇️ Download Predictions",
+            "Imperial Wealth Club": "💾 Download Ledger Results"
+        }[theme],
+        data=build_export,
+        file_name=f"market_master_results{engine.export.FORMATS[fmt].extension}",
+        mime=engine.export.FORMATS[fmt].mime,
+        key="download_results"
+    )
 
     # Final interpretation/conclusion block
     interp = {
@@ -1653,29 +2481,535 @@ def results_visualization_step():
     }[theme]
     st.markdown(f"<div class=\"interpretation\">{interp}</div>", unsafe_allow_html=True)
 
-def landing_page():
-    theme_options = [
-        {
-            "key": "Financial Shinobi",
-            "icon": "⚔️",
-            "name": "Financial Shinobi",
-            "desc": "Anime-inspired, dark, energetic, and bold."
-        },
-        {
-            "key": "Techno Exchange",
-            "icon": "🟦",
-            "name": "Techno Exchange Protocol",
-            "desc": "Futuristic, neon, cyber/AI, and modern."
-        },
-        {
-            "key": "Imperial Wealth Club",
-            "icon": "👑",
-            "name": "Imperial Wealth Club",
-            "desc": "Classic, gold, vintage, and elegant."
-        }
-    ]
-    st.markdown("""
-        <style>
+@st.fragment
+def backtest_workbench():
+    # Trading rules commit on Apply and rerun only this fragment; unchanged backtests come from the memo
+    with governed_run(), get_profiler().stage("backtest_workbench", kind="fragment"):
+        _backtest_workbench()
+
+def _backtest_workbench():
+    theme = st.session_state.theme
+    pipeline = st.session_state.pipeline
+    y_test, y_preds = pipeline['y_test'], pipeline['y_preds']
+    tradable = [mt for mt in y_preds if mt != "K-Means Clustering"]
+    if not tradable:
+        return
+    if not engine.is_chronological(engine.SplitResult(*(pipeline[k] for k in ['X_train', 'X_test', 'y_train', 'y_test']))):
+        # A shuffled split fitted the model on bars after the ones it would trade: every P&L figure would see the future
+        st.warning({
+            "Financial Shinobi": "⚠️ The clans were shuffled, so the sensei has seen the future. Choose 'Test on the latest scrolls' in step 4 to backtest.",
+            "Techno Exchange": "⚠️ The split was shuffled, so the model was trained on bars after the ones it would trade. Choose 'Chronological hold-out' in step 4 to backtest.",
+            "Imperial Wealth Club": "⚠️ The accounts were shuffled, so the analyst has seen later entries. Choose 'Hold out the latest entries' in step 4 to backtest."
+        }[theme])
+        return
+    if not engine.backtest.scorable(pipeline['target'], engine.is_continuous(y_test)):
+        # Only a price, a forward return or a class says which way to trade without reading the bar's own answer
+        st.info({
+            "Financial Shinobi": f"ℹ️ A prophecy of {pipeline['target']} does not say where to strike. Choose Close or a future return seal as the target to rehearse battles.",
+            "Techno Exchange": f"ℹ️ Predictions of {pipeline['target']} carry no trading signal. Choose Close or a Return_t+h target to backtest.",
+            "Imperial Wealth Club": f"ℹ️ Forecasts of {pipeline['target']} imply no position. Choose Close or a future return as the target to backtest."
+        }[theme])
+        return
+    st.subheader({
+        "Financial Shinobi": "⚔️ Battle Rehearsal",
+        "Techno Exchange": "📈 Strategy Backtest",
+        "Imperial Wealth Club": "🏛️ Ledger Backtest"
+    }[theme])
+    params = st.session_state.setdefault('backtest_params', {
+        'threshold': 0.0, 'cost_bps': 1.0, 'slippage_bps': 1.0, 'allow_short': True, 'sweep': False})
+    with st.form("backtest_form", border=False):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.number_input({
+                "Financial Shinobi": "Strike Threshold (%)",
+                "Techno Exchange": "Signal Threshold (%)",
+                "Imperial Wealth Club": "Conviction Threshold (%)"
+            }[theme], 0.0, 50.0, params['threshold'], 0.1, help={
+                "Financial Shinobi": "Only strike when the prophecy departs from the seal by more than this.",
+                "Techno Exchange": "Minimum gap between prediction and price before taking a position.",
+                "Imperial Wealth Club": "Minimum gap between forecast and price before committing capital."
+            }[theme], key="backtest_threshold")
+        with col2:
+            st.number_input({
+                "Financial Shinobi": "Tribute (bps)",
+                "Techno Exchange": "Transaction Cost (bps)",
+                "Imperial Wealth Club": "Commission (bps)"
+            }[theme], 0.0, 100.0, params['cost_bps'], 0.5, key="backtest_cost")
+        with col3:
+            st.number_input({
+                "Financial Shinobi": "Shadow Slip (bps)",
+                "Techno Exchange": "Slippage (bps)",
+                "Imperial Wealth Club": "Execution Slippage (bps)"
+            }[theme], 0.0, 100.0, params['slippage_bps'], 0.5, key="backtest_slippage")
+        st.checkbox({
+            "Financial Shinobi": "Allow shadow strikes (short)",
+            "Techno Exchange": "Allow short positions",
+            "Imperial Wealth Club": "Permit short sales"
+        }[theme], params['allow_short'], key="backtest_short")
+        st.checkbox({
+            "Financial Shinobi": "Sweep every threshold and tribute",
+            "Techno Exchange": "Sweep thresholds x costs",
+            "Imperial Wealth Club": "Survey thresholds and commissions"
+        }[theme], params['sweep'], key="backtest_sweep", help="Grid of 50 thresholds x 0-20 bps costs, evaluated in parallel.")
+        st.form_submit_button(THEME_APPLY_LABELS[theme], on_click=lambda: params.update({
+            'threshold': st.session_state.backtest_threshold, 'cost_bps': st.session_state.backtest_cost,
+            'slippage_bps': st.session_state.backtest_slippage, 'allow_short': st.session_state.backtest_short,
+            'sweep': st.session_state.backtest_sweep}))
+    try:
+        # Prices come from the unscaled frame; Close in the engineered frame is standardised when it is a feature
+        df_processed = pipeline['df_processed']
+        columns = [c for c in ('Date', 'Close') if c in df_processed.columns]
+        continuous = engine.is_continuous(y_test)
+        config = engine.backtest.BacktestConfig(params['threshold'] / 100, params['cost_bps'], params['slippage_bps'],
+                                                params['allow_short'])
+        inputs = {mt: memo_stage(f"backtest_inputs:{mt}", (frame_key(df_processed), train_key()),
+                                 lambda mt=mt: engine.backtest.prepare(load_frame(df_processed, columns), y_test,
+                                                                       y_preds[mt], continuous,
+                                                                       target=pipeline['target']))
+                  for mt in tradable}
+        results = {mt: memo_stage(f"backtest:{mt}", (frame_key(df_processed), train_key(), config), lambda mt=mt: engine.backtest.run(inputs[mt], config))
+                   for mt in tradable}
+        st.dataframe(pd.DataFrame([{
+            'Model': mt, 'Total return': r.total_return, 'Sharpe': r.sharpe, 'Max drawdown': r.max_drawdown,
+            'Trades': r.trades, 'Exposure': r.exposure} for mt, r in results.items()]).style.format({
+            'Total return': '{:.2%}', 'Sharpe': '{:.2f}', 'Max drawdown': '{:.2%}', 'Exposure': '{:.0%}'}),
+            use_container_width=True, hide_index=True)
+        equity_title = {
+            "Financial Shinobi": "Chakra Reserves Over Time",
+            "Techno Exchange": "Equity Curve (net of costs)",
+            "Imperial Wealth Club": "Account Balance Over Time"
+        }[theme]
+        fig = go.Figure()
+        for mt, r in results.items():
+            fig.add_trace(go.Scatter(x=r.frame['Date'], y=r.frame['Equity'], mode='lines', name=mt))
+        plot_config(fig, equity_title, "Date", {
+            "Financial Shinobi": "Chakra (start = 1)",
+            "Techno Exchange": "Equity (start = 1)",
+            "Imperial Wealth Club": "Balance (start = 1)"
+        }[theme])
+        render_chart(fig)
+        if params['sweep']:
+            mt = tradable[0]
+            grid = memo_stage(f"backtest_sweep:{mt}", (frame_key(df_processed), train_key(), params['slippage_bps'], params['allow_short']),
+                              lambda: engine.backtest.sweep(inputs[mt], engine.backtest.default_thresholds(inputs[mt].scores),
+                                                            np.arange(0, 21), params['slippage_bps'], params['allow_short']))
+            best = grid.loc[grid['sharpe'].idxmax()]
+            heat = grid.pivot(index='threshold', columns='cost_bps', values='sharpe')
+            fig = px.imshow(heat.to_numpy(), x=heat.columns, y=[f"{t:.3%}" for t in heat.index], aspect='auto',
+                            color_continuous_scale='RdYlGn', origin='lower')
+            plot_config(fig, f"Sharpe by threshold and cost: {mt}", "Cost (bps)", "Threshold")
+            render_chart(fig)
+            st.caption(f"{len(grid):,} combinations. Best Sharpe {best['sharpe']:.2f} at threshold {best['threshold']:.3%} "
+                       f"and {best['cost_bps']:.0f} bps ({best['total_return']:.2%} total return, {best['max_drawdown']:.2%} max drawdown).")
+        interp = {
+            "Financial Shinobi": "Each prophecy becomes a strike: long when the seal is foretold above its price, short when below. Tributes and slips are paid on every change of stance.",
+            "Techno Exchange": "Predictions become positions held until the next test bar: long when the model sits above the price, short when below. Costs and slippage are charged on turnover.",
+            "Imperial Wealth Club": "Forecasts become positions held until the next ledger entry: long when the forecast exceeds the price, short when below. Commissions and slippage are charged on every trade."
+        }[theme]
+        st.markdown(f"<div class=\"interpretation\">{interp}</div>", unsafe_allow_html=True)
+    except Exception as e:
+        st.error({
+            "Financial Shinobi": f"❌ Battle rehearsal failed: {e}",
+            "Techno Exchange": f"❌ Backtest failed: {e}",
+            "Imperial Wealth Club": f"❌ Ledger backtest failed: {e}"
+        }[theme])
+
+@st.fragment
+def montecarlo_workbench():
+    # Scenario settings commit on Apply and rerun only this fragment; simulations run only when asked for
+    with governed_run(), get_profiler().stage("montecarlo_workbench", kind="fragment"):
+        _montecarlo_workbench()
+
+def _montecarlo_workbench():
+    theme = st.session_state.theme
+    pipeline = st.session_state.pipeline
+    st.subheader({
+        "Financial Shinobi": "🌀 Scrolls of Fate",
+        "Techno Exchange": "🎲 Risk Scenarios",
+        "Imperial Wealth Club": "🏛️ Ledger Stress Scenarios"
+    }[theme])
+    # Residuals only become per-bar shocks for a return target; a price target's errors are gaps in level
+    residual_ready = "Linear Regression" in pipeline['y_preds'] and engine.montecarlo.residual_horizon(pipeline['target'])
+    models = ["gbm", "bootstrap"] + (["residual"] if residual_ready else [])
+    model_labels = {
+        "gbm": "Geometric Brownian motion",
+        "bootstrap": "Block bootstrap of daily returns",
+        "residual": "Linear Regression return forecast + residuals"
+    }
+    params = st.session_state.setdefault('montecarlo_params', {
+        'model': 'gbm', 'paths': 100_000, 'horizon': 20, 'alpha': 5.0, 'run': False})
+    with st.form("montecarlo_form", border=False):
+        st.radio({
+            "Financial Shinobi": "Fate Weaving",
+            "Techno Exchange": "Simulation Model",
+            "Imperial Wealth Club": "Scenario Model"
+        }[theme], models, index=models.index(params['model']) if params['model'] in models else 0,
+            format_func=model_labels.get, horizontal=True, key="montecarlo_model")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.select_slider({
+                "Financial Shinobi": "Fates Woven",
+                "Techno Exchange": "Paths",
+                "Imperial Wealth Club": "Scenarios"
+            }[theme], [10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000], params['paths'],
+                format_func=lambda n: f"{n:,}", key="montecarlo_paths")
+        with col2:
+            st.number_input({
+                "Financial Shinobi": "Moons Ahead",
+                "Techno Exchange": "Horizon (bars)",
+                "Imperial Wealth Club": "Periods Ahead"
+            }[theme], 1, 250, params['horizon'], key="montecarlo_horizon")
+        with col3:
+            st.number_input({
+                "Financial Shinobi": "Shadow Tail (%)",
+                "Techno Exchange": "VaR Tail (%)",
+                "Imperial Wealth Club": "Risk Tail (%)"
+            }[theme], 0.5, 25.0, params['alpha'], 0.5, key="montecarlo_alpha")
+        st.form_submit_button(THEME_APPLY_LABELS[theme], on_click=lambda: params.update({
+            'model': st.session_state.montecarlo_model, 'paths': st.session_state.montecarlo_paths,
+            'horizon': st.session_state.montecarlo_horizon, 'alpha': st.session_state.montecarlo_alpha, 'run': True}))
+    if not params['run']:
+        return
+    try:
+        # Seeded from the unscaled prices: Close and Daily_Return in the engineered frame are standardised when
+        # they are features. Returns are taken from the price differences.
+        df_processed = pipeline['df_processed']
+        columns = [c for c in ('Close',) if c in df_processed.columns]
+        model = params['model'] if params['model'] in models else 'gbm'
+        residuals, drift = None, 0.0
+        if model == "residual":
+            residuals, drift = engine.montecarlo.forecast_residuals(pipeline['target'], pipeline['y_test'],
+                                                                    pipeline['y_preds']["Linear Regression"])
+        inputs = engine.montecarlo.seed_inputs(load_frame(df_processed, columns), residuals=residuals, drift=drift)
+        config = engine.montecarlo.SimulationConfig(model, params['paths'], int(params['horizon']),
+                                                    alpha=params['alpha'] / 100)
+        key = (frame_key(df_processed), pipeline['target'], train_key(), config)
+        result = memo_stage("montecarlo", key, lambda: engine.montecarlo.simulate(inputs, config))
+
+        fan = result.fan
+        fig = go.Figure()
+        bands = [(fan.columns[i], fan.columns[-1 - i]) for i in range(len(fan.columns) // 2)]
+        for i, (lo, hi) in enumerate(bands):
+            fig.add_trace(go.Scatter(x=fan.index, y=fan[hi], mode='lines', line=dict(width=0), showlegend=False,
+                                     hoverinfo='skip'))
+            fig.add_trace(go.Scatter(x=fan.index, y=fan[lo], mode='lines', line=dict(width=0), fill='tonexty',
+                                     fillcolor=f'rgba(57, 255, 20, {0.15 + 0.15 * i})', name=f"{lo}-{hi}"))
+        median = fan.columns[len(fan.columns) // 2]
+        fig.add_trace(go.Scatter(x=fan.index, y=fan[median], mode='lines', name=f"{median} (median)",
+                                 line=dict(color='#F8F8FF')))
+        plot_config(fig, {
+            "Financial Shinobi": "Fan of Fates",
+            "Techno Exchange": "Simulated Price Fan",
+            "Imperial Wealth Club": "Projected Ledger Range"
+        }[theme], {
+            "Financial Shinobi": "Moons Ahead",
+            "Techno Exchange": "Bars Ahead",
+            "Imperial Wealth Club": "Periods Ahead"
+        }[theme], "Close")
+        render_chart(fig)
+
+        summary = result.summary
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric(f"VaR {params['alpha']:g}%", f"{result.var:.2%}")
+        col2.metric(f"CVaR {params['alpha']:g}%", f"{result.cvar:.2%}")
+        col3.metric("P(loss)", f"{summary['prob_loss']:.1%}")
+        col4.metric("Median max drawdown", f"{summary['median_max_drawdown']:.2%}")
+        # The histogram is drawn from a sample so the browser never receives a million points
+        sample = result.terminal_returns[:20_000]
+        fig = px.histogram(x=sample, nbins=80, color_discrete_sequence=['#39FF14'])
+        fig.add_vline(x=-result.var, line_dash='dash', line_color='#FF4136')
+        plot_config(fig, {
+            "Financial Shinobi": "Fates at the Horizon",
+            "Techno Exchange": "Terminal Return Distribution",
+            "Imperial Wealth Club": "Ledger Outcome Distribution"
+        }[theme], f"Return after {summary['horizon']} bars", "Paths")
+        render_chart(fig)
+        st.dataframe(pd.DataFrame([summary]).style.format({
+            'paths': '{:,}', 'mean_return': '{:.2%}', 'median_return': '{:.2%}', 'std_return': '{:.2%}',
+            'skew': '{:.2f}', 'excess_kurtosis': '{:.2f}', 'prob_loss': '{:.1%}', 'median_max_drawdown': '{:.2%}',
+            'worst_max_drawdown': '{:.2%}'}), use_container_width=True, hide_index=True)
+        interp = {
+            "Financial Shinobi": f"Across {summary['paths']:,} woven fates, the worst {params['alpha']:g}% lose at least <b>{result.var:.2%}</b> within {summary['horizon']} moons, and <b>{result.cvar:.2%}</b> on average when they do.",
+            "Techno Exchange": f"Across {summary['paths']:,} simulated paths, the worst {params['alpha']:g}% lose at least <b>{result.var:.2%}</b> (VaR) over {summary['horizon']} bars; their average loss is <b>{result.cvar:.2%}</b> (CVaR).",
+            "Imperial Wealth Club": f"Across {summary['paths']:,} scenarios, the worst {params['alpha']:g}% lose at least <b>{result.var:.2%}</b> over {summary['horizon']} periods, and <b>{result.cvar:.2%}</b> on average beyond that."
+        }[theme]
+        st.markdown(f"<div class=\"interpretation\">{interp}</div>", unsafe_allow_html=True)
+    except Exception as e:
+        st.error({
+            "Financial Shinobi": f"❌ The scrolls of fate are sealed: {e}",
+            "Techno Exchange": f"❌ Simulation failed: {e}",
+            "Imperial Wealth Club": f"❌ Scenario analysis failed: {e}"
+        }[theme])
+
+def screener_config():
+    # This session's choices from steps 2-5, replayed on every symbol of the universe
+    pipeline = st.session_state.pipeline
+    feature_params = st.session_state.get('feature_params', {})
+    split_params = st.session_state.get('split_params', {'test_size': 20, 'random_state': 42})
+    backtest_params = st.session_state.get('backtest_params', {})
+    return engine.screener.ScreenerConfig(
+        engine.PipelineConfig(
+            target=pipeline['target'], features=list(pipeline['features']),
+            preprocess_config=pipeline.get('preprocess_config') or engine.PreprocessConfig(),
+            features_config=engine.FeatureConfig(feature_params.get('window', 20), feature_params.get('scale', True)),
+            split_config=engine.SplitConfig(split_params['test_size'] / 100, split_params['random_state']),
+            train_config=pipeline.get('train_config') or engine.TrainConfig(list(pipeline['models']))),
+        max_horizon=feature_params.get('horizons', 0),
+        backtest=engine.backtest.BacktestConfig(backtest_params.get('threshold', 0.0) / 100,
+                                                backtest_params.get('cost_bps', 1.0),
+                                                backtest_params.get('slippage_bps', 1.0),
+                                                backtest_params.get('allow_short', True)))
+
+@st.fragment
+def screener_workbench():
+    # The universe runs as a background job; only the progress fragment polls while it works
+    with governed_run(), get_profiler().stage("screener_workbench", kind="fragment"):
+        _screener_workbench()
+
+def _screener_workbench():
+    theme = st.session_state.theme
+    st.subheader({
+        "Financial Shinobi": "🗺️ Clan Reconnaissance",
+        "Techno Exchange": "🔎 Multi-Symbol Screener",
+        "Imperial Wealth Club": "🏛️ Portfolio Survey"
+    }[theme])
+    params = st.session_state.setdefault('screener_params', {
+        'symbols': "AAPL, MSFT, GOOGL, AMZN, NVDA, META, TSLA, JPM", 'start': datetime.date(2020, 1, 1),
+        'end': datetime.date.today(), 'metric': 'R²', 'refresh': False, 'run': 0})
+    with st.form("screener_form", border=False):
+        st.text_area({
+            "Financial Shinobi": "Market Seals to Scout",
+            "Techno Exchange": "Universe (symbols)",
+            "Imperial Wealth Club": "Holdings to Survey"
+        }[theme], params['symbols'], help="Comma, space or line separated. Each symbol runs this session's preprocessing, "
+                                          "features, split and models.", key="screener_symbols")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.date_input("Start Date", params['start'], key="screener_start")
+        with col2:
+            st.date_input("End Date", params['end'], key="screener_end")
+        with col3:
+            st.selectbox({
+                "Financial Shinobi": "Rank Clans By",
+                "Techno Exchange": "Rank By",
+                "Imperial Wealth Club": "Order Holdings By"
+            }[theme], list(engine.screener.METRICS), list(engine.screener.METRICS).index(params['metric']),
+                key="screener_metric")
+        st.checkbox({
+            "Financial Shinobi": "Summon fresh scrolls (re-download)",
+            "Techno Exchange": "Refresh data (re-download histories)",
+            "Imperial Wealth Club": "Refresh ledgers (re-download histories)"
+        }[theme], params['refresh'], help="Only symbols whose data changed are run again.", key="screener_refresh")
+        st.form_submit_button(THEME_APPLY_LABELS[theme], on_click=lambda: params.update({
+            'symbols': st.session_state.screener_symbols, 'start': st.session_state.screener_start,
+            'end': st.session_state.screener_end, 'metric': st.session_state.screener_metric,
+            'refresh': st.session_state.screener_refresh, 'run': params['run'] + 1}))
+    if not params['run']:
+        return
+    symbols = [s for s in re.split(r"[\s,;]+", params['symbols']) if s]
+    if not symbols or params['start'] >= params['end']:
+        st.warning({
+            "Financial Shinobi": "Name at least one seal and a valid span of moons!",
+            "Techno Exchange": "Enter at least one symbol and a valid date range!",
+            "Imperial Wealth Club": "List at least one holding and a valid period!"
+        }[theme])
+        return
+    runner = get_job_runner()
+    key = f"screener:{st.session_state.setdefault('session_id', uuid.uuid4().hex)}:{params['run']}"
+    job = st.session_state.get('screener_job')
+    if job is None or job.key != key:
+        if job is not None:
+            runner.release(job)
+        config, start, end = screener_config(), params['start'].strftime('%Y-%m-%d'), params['end'].strftime('%Y-%m-%d')
+        cache, store, refresh = get_data_cache(), get_dataset_store(), params['refresh']
+
+        def run(job):
+            universe, load_errors = engine.screener.load_universe(symbols, start, end, history_feed(), cache, store,
+                                                                  refresh, job=job)
+            result = engine.screener.screen(universe, config, job=job)
+            result.errors.update(load_errors)
+            return result
+
+        job = st.session_state.screener_job = runner.submit(key, run)
+    if not job.done:
+        fetch_progress(job)
+        return
+    if job.error is not None:
+        st.error({
+            "Financial Shinobi": f"❌ Reconnaissance failed: {job.error}",
+            "Techno Exchange": f"❌ Screener failed: {job.error}",
+            "Imperial Wealth Club": f"❌ Survey failed: {job.error}"
+        }[theme])
+        return
+    result = job.result
+    table = engine.screener.rank(result.table, params['metric'])
+    screened = table['Symbol'].nunique()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Symbols ranked", f"{screened:,} of {screened + len(result.errors):,}")
+    col2.metric("Recomputed", f"{len(result.recomputed):,}", help="The rest were unchanged and came from the cache.")
+    col3.metric("Throughput", f"{result.symbols_per_minute:,.0f} symbols/min")
+    st.dataframe(table.drop(columns=['Fingerprint']).style.format({
+        'R²': '{:.4f}', 'RMSE': '{:.4f}', 'Sharpe': '{:.2f}', 'Total return': '{:.2%}', 'Max drawdown': '{:.2%}',
+        'Rows': '{:,}'}), use_container_width=True, hide_index=True)
+    if screened:
+        top = table.head(20)
+        fig = px.bar(top, x='Symbol', y=params['metric'], color='Model', barmode='group')
+        plot_config(fig, {
+            "Financial Shinobi": f"Strongest Clans by {params['metric']}",
+            "Techno Exchange": f"Top Symbols by {params['metric']}",
+            "Imperial Wealth Club": f"Leading Holdings by {params['metric']}"
+        }[theme], "Symbol", params['metric'])
+        render_chart(fig)
+    if result.errors:
+        with st.expander(f"{len(result.errors)} symbols skipped"):
+            st.dataframe(pd.DataFrame(result.errors.items(), columns=['Symbol', 'Reason']), hide_index=True)
+    interp = {
+        "Financial Shinobi": "Every clan faced the same trials as your chosen seal: purification, jutsu, the split and the sensei. Clans are ranked by how well the prophecy held for each.",
+        "Techno Exchange": "Each symbol ran this session's pipeline: preprocessing, features, split, models and a backtest with your trading rules. Re-runs only recompute symbols whose data or settings changed.",
+        "Imperial Wealth Club": "Each holding was audited with this session's procedure, from reconciliation to forecast and backtest. Holdings whose ledgers have not changed are read back from the archive."
+    }[theme]
+    st.markdown(f"<div class=\"interpretation\">{interp}</div>", unsafe_allow_html=True)
+
+@st.fragment
+def crossasset_workbench():
+    # Universe settings commit on Apply; moving the date slider only re-reads the memoised tensors
+    with governed_run(), get_profiler().stage("crossasset_workbench", kind="fragment"):
+        _crossasset_workbench()
+
+def _crossasset_workbench():
+    theme = st.session_state.theme
+    st.subheader({
+        "Financial Shinobi": "🕸️ Clan Bonds",
+        "Techno Exchange": "🔗 Cross-Asset Correlation",
+        "Imperial Wealth Club": "🏛️ Holdings Co-Movement"
+    }[theme])
+    screener = st.session_state.get('screener_params', {})
+    params = st.session_state.setdefault('crossasset_params', {
+        'symbols': screener.get('symbols', "SPY, AAPL, MSFT, GOOGL, AMZN, NVDA, META, TSLA, JPM"),
+        'start': screener.get('start', datetime.date(2020, 1, 1)), 'end': screener.get('end', datetime.date.today()),
+        'window': 60, 'benchmark': "", 'run': False})
+    with st.form("crossasset_form", border=False):
+        st.text_area({
+            "Financial Shinobi": "Clans to Compare",
+            "Techno Exchange": "Universe (symbols)",
+            "Imperial Wealth Club": "Holdings to Compare"
+        }[theme], params['symbols'], key="crossasset_symbols")
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.date_input("Start Date", params['start'], key="crossasset_start")
+        with col2:
+            st.date_input("End Date", params['end'], key="crossasset_end")
+        with col3:
+            st.number_input({
+                "Financial Shinobi": "Moons in the Window",
+                "Techno Exchange": "Rolling Window (bars)",
+                "Imperial Wealth Club": "Rolling Window (periods)"
+            }[theme], 10, 500, params['window'], key="crossasset_window")
+        with col4:
+            st.text_input({
+                "Financial Shinobi": "Elder Clan (benchmark)",
+                "Techno Exchange": "Benchmark",
+                "Imperial Wealth Club": "Benchmark Holding"
+            }[theme], params['benchmark'], help="Betas are measured against this symbol. Leave empty to use the first one.",
+                key="crossasset_benchmark")
+        st.form_submit_button(THEME_APPLY_LABELS[theme], on_click=lambda: params.update({
+            'symbols': st.session_state.crossasset_symbols, 'start': st.session_state.crossasset_start,
+            'end': st.session_state.crossasset_end, 'window': st.session_state.crossasset_window,
+            'benchmark': st.session_state.crossasset_benchmark, 'run': True}))
+    if not params['run']:
+        return
+    try:
+        symbols = list(dict.fromkeys(s.upper() for s in re.split(r"[\s,;]+", params['symbols']) if s))
+        benchmark = (params['benchmark'].strip().upper() or (symbols[0] if symbols else "")) or None
+        if benchmark and benchmark not in symbols:
+            symbols.insert(0, benchmark)
+        start, end = params['start'].strftime('%Y-%m-%d'), params['end'].strftime('%Y-%m-%d')
+        config = engine.crossasset.CrossAssetConfig(window=int(params['window']), benchmark=benchmark)
+        memo_key = (tuple(symbols), start, end, config)
+        memo = st.session_state.setdefault('stage_memo', {})
+        if memo.get('crossasset', (None,))[0] != memo_key:
+            # Downloads and the tensor run as a background job, like the screener; only this fragment polls
+            runner = get_job_runner()
+            key = f"crossasset:{st.session_state.setdefault('session_id', uuid.uuid4().hex)}:{memo_key!r}"
+            job = st.session_state.get('crossasset_job')
+            if job is None or job.key != key:
+                if job is not None:
+                    runner.release(job)
+                cache, store = get_data_cache(), get_dataset_store()
+                max_bytes = int(os.environ.get("MARKET_MASTER_CROSSASSET_MB", 256)) * 2**20
+
+                def run(job):
+                    universe, errors = engine.screener.load_universe(symbols, start, end, history_feed(), cache, store,
+                                                                     job=job)
+                    returns = engine.crossasset.returns_matrix(universe)
+                    used = config if benchmark in universe else engine.crossasset.CrossAssetConfig(window=config.window)
+                    # Large universes get a coarser stride, then a memory-mapped tensor in the dataset store
+                    used = engine.crossasset.sized_config(used, returns.shape[1], len(returns), max_bytes, store.directory)
+                    job.check()
+                    job.report(0.5, f"Rolling covariances for {returns.shape[1]} symbols")
+                    return engine.crossasset.rolling_covariance(returns, used), errors
+
+                job = st.session_state.crossasset_job = runner.submit(key, run)
+            if not job.done:
+                fetch_progress(job)
+                return
+            del st.session_state['crossasset_job']
+            runner.release(job)
+            if job.error is not None:
+                # Apply again to retry; the failed job is not kept
+                params['run'] = False
+                raise job.error
+            memo_stage("crossasset", memo_key, lambda: job.result)
+        result, errors = memo['crossasset'][1]
+        if errors:
+            st.caption("Skipped: " + ", ".join(f"{s} ({e})" for s, e in errors.items()))
+        if result.config.stride > 1:
+            st.caption(f"One bar in {result.config.stride} is shown to keep the {len(result.symbols)}-symbol "
+                       f"matrices within memory" + (", memory-mapped from disk." if result.config.path else "."))
+        fig = go.Figure(go.Scatter(x=result.dates, y=result.average_correlation, mode='lines', line=dict(color='#39FF14')))
+        plot_config(fig, {
+            "Financial Shinobi": "How Tightly the Clans Move Together",
+            "Techno Exchange": f"Average Pairwise Correlation ({config.window}-bar window)",
+            "Imperial Wealth Club": f"Average Co-Movement of Holdings ({config.window}-period window)"
+        }[theme], "Date", "Mean correlation")
+        render_chart(fig)
+        date = st.select_slider({
+            "Financial Shinobi": "Moon to Inspect",
+            "Techno Exchange": "Matrix Date",
+            "Imperial Wealth Club": "Ledger Date"
+        }[theme], list(result.dates), result.dates[-1], format_func=lambda d: d.strftime('%Y-%m-%d'),
+            key="crossasset_date")
+        corr = result.correlation_matrix(date)
+        fig = px.imshow(corr.to_numpy(), x=corr.columns, y=corr.index, zmin=-1, zmax=1, color_continuous_scale='RdBu_r')
+        plot_config(fig, f"Correlation on {date:%Y-%m-%d}", "Symbol", "Symbol")
+        render_chart(fig)
+        if result.betas is not None:
+            betas = result.betas.drop(columns=[result.config.benchmark])
+            fig = go.Figure([go.Scatter(x=betas.index, y=betas[s], mode='lines', name=s) for s in betas.columns[:12]])
+            plot_config(fig, f"Rolling Beta vs {result.config.benchmark}", "Date", "Beta")
+            render_chart(fig)
+        volatility = result.portfolio_volatility(pd.Series(1 / len(result.symbols), index=result.symbols)) * np.sqrt(252)
+        fig = go.Figure(go.Scatter(x=volatility.index, y=volatility, mode='lines', line=dict(color='#F8F8FF')))
+        plot_config(fig, {
+            "Financial Shinobi": "Risk of the United Clans (equal shares)",
+            "Techno Exchange": "Equal-Weight Portfolio Volatility (annualised)",
+            "Imperial Wealth Club": "Equal-Weight Portfolio Risk (annualised)"
+        }[theme], "Date", "Volatility")
+        render_chart(fig)
+        interp = {
+            "Financial Shinobi": "When the clans move as one, hiding among them offers little shelter. Watch the bond line rise in storms, and the elder clan's pull (beta) on each of the others.",
+            "Techno Exchange": "Rising average correlation means diversification is weakening; it typically spikes in sell-offs. Betas show each symbol's sensitivity to the benchmark over the same window.",
+            "Imperial Wealth Club": "When holdings move together, the portfolio's risk concentrates. The beta lines show how strongly each holding follows the benchmark over time."
+        }[theme]
+        st.markdown(f"<div class=\"interpretation\">{interp}</div>", unsafe_allow_html=True)
+    except Exception as e:
+        st.error({
+            "Financial Shinobi": f"❌ The clan bonds could not be read: {e}",
+            "Techno Exchange": f"❌ Cross-asset analysis failed: {e}",
+            "Imperial Wealth Club": f"❌ Co-movement analysis failed: {e}"
+        }[theme])
+
+LANDING_CSS = """
         body, .stApp {
             background: linear-gradient(120deg, #f5f7fa 0%, #c3cfe2 100%) !important;
         }
@@ -1770,8 +3104,30 @@ def landing_page():
             background: linear-gradient(90deg, #00c6fb, #0078fa);
             box-shadow: 0 4px 24px 0 #00c6fb33;
         }
-        </style>
-    """, unsafe_allow_html=True)
+"""
+
+def landing_page():
+    theme_options = [
+        {
+            "key": "Financial Shinobi",
+            "icon": "⚔️",
+            "name": "Financial Shinobi",
+            "desc": "Anime-inspired, dark, energetic, and bold."
+        },
+        {
+            "key": "Techno Exchange",
+            "icon": "🟦",
+            "name": "Techno Exchange Protocol",
+            "desc": "Futuristic, neon, cyber/AI, and modern."
+        },
+        {
+            "key": "Imperial Wealth Club",
+            "icon": "👑",
+            "name": "Imperial Wealth Club",
+            "desc": "Classic, gold, vintage, and elegant."
+        }
+    ]
+    st.markdown(assets.style_tag(LANDING_CSS), unsafe_allow_html=True)
     st.markdown('<div class="landing-hero">'
                 '<div class="landing-title">Market Master</div>'
                 '<div class="landing-tagline">Choose your financial adventure!</div>'
@@ -1783,7 +3139,7 @@ def landing_page():
             st.markdown(f"""
                 <div class='theme-card'>
                     <div class='theme-icon'>{theme['icon']}</div>
-                    <img class='theme-img' src='{THEME_GIFS[theme['key']]}' />
+                    <img class='theme-img' src='{assets.asset_url(THEME_GIFS[theme['key']])}' />
                     <div class='theme-name'>{theme['name']}</div>
                     <div class='theme-desc'>{theme['desc']}</div>
                 </div>
@@ -1801,16 +3157,13 @@ def main():
     init_session_state()
     if not st.session_state.get("landing_done", False):
         landing_page()
+        prewarm_heavy_modules()
         return
 
     # Set page config and apply Theme (now that theme is chosen)
     theme = st.session_state.theme
     site_title = THEME_TITLES.get(theme, "Market Master")
-    st.markdown(f"""
-        <style>
-        {get_theme_css()}
-        </style>
-    """, unsafe_allow_html=True)
+    st.markdown(f"<style>{get_theme_css()}</style>", unsafe_allow_html=True)
 
     with st.sidebar:
         st.header(THEME_SIDEBAR_TITLES.get(theme, "Training Stages"))
@@ -1820,6 +3173,14 @@ def main():
         if selected_theme != st.session_state.theme:
             st.session_state.theme = selected_theme
             st.rerun()
+        st.toggle({
+            "Financial Shinobi": "🗜️ Compact Scrolls",
+            "Techno Exchange": "🗜️ Compact Memory Mode",
+            "Imperial Wealth Club": "🗜️ Compact Ledgers"
+        }[theme], key="compact_mode", help="Store prices and features as float32, volume as uint32 and symbols as categoricals. Models still train in float64.")
+        memory = st.session_state.pipeline.get('memory') if st.session_state.get('compact_mode') else None
+        if memory:
+            st.caption(" · ".join(f"{stage}: {format_bytes(full)} → {format_bytes(small)}" for stage, (full, small) in memory.items()))
         st.divider()
         sidebar_steps = THEME_SIDEBAR_STEPS[theme]
         steps = [
@@ -1834,20 +3195,27 @@ def main():
         ]
         progress = sum([st.session_state.pipeline.get(c, False) for _, _, _, c in steps if c]) / len([c for _, _, _, c in steps if c]) * 100
         st.markdown(f"<div class='progress-bar'><div class='progress-fill' style='width: {progress}%'></div></div>", unsafe_allow_html=True)
+        if st.session_state.pipeline.get('last_symbol'):
+            live_price_ticker(st.session_state.pipeline['last_symbol'])
         for name, step, tooltip, condition in steps:
             disabled = False if condition is None else not st.session_state.pipeline.get(condition, False)
             label = f"{name} ⚔️" if condition and st.session_state.pipeline.get(condition, False) else name
             st.button(label, key=f"step_{step}", disabled=disabled, 
                       on_click=lambda s=step: st.session_state.pipeline.update({'current_step': s}), help=tooltip)
         st.divider()
-        st.markdown('<div class="center-image"><img src="https://gifdb.com/images/high/anime-money-safe-1989-riding-bean-tlrjh66tg0es3idz.gif" width="220"></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="center-image"><img src="{assets.asset_url(SIDEBAR_GIF)}" width="220"></div>', unsafe_allow_html=True)
         st.button("🔄 Start New Journey", key="reset", 
-                  on_click=lambda: [st.session_state.clear(), init_session_state(), st.session_state.update({'landing_done': False})], 
-                  help="Begin a new journey")
+                  on_click=reset_session, help="Begin a new journey")
     
     step_funcs = [welcome_step, load_data_step, preprocessing_step, feature_engineering_step,
                   train_test_split_step, model_training_step, evaluation_step, results_visualization_step]
-    step_funcs[st.session_state.pipeline['current_step']]()
+    step_func = step_funcs[st.session_state.pipeline['current_step']]
+    with governed_run() as notice:
+        if notice:
+            st.toast(notice, icon="🗄️")
+        get_profiler().wrap(step_func)()
+    with st.sidebar:
+        performance_panel()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""Theme asset pipeline: minified per-theme CSS and locally bundled fonts and GIFs.
+
+The repository ships ``static/`` empty. Remote assets are downloaded once, at
+deploy time, with ``python assets.py fetch`` into ``static/``, which Streamlit
+serves at ``app/static/`` (see ``.streamlit/config.toml``). Only URLs on the
+hosts in ``ALLOWED_HOSTS`` are fetched; ``python assets.py list`` shows what a
+fetch would download. Local files are named by content hash, so a changed asset
+always gets a new URL and the browser can keep the old one cached. Anything
+that was not fetched keeps its remote URL, so the app still works without a
+bundle.
+"""
+import functools
+import hashlib
+import json
+import os
+import re
+import sys
+import urllib.parse
+import urllib.request
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+STATIC_URL = "app/static"
+MANIFEST_PATH = os.path.join(STATIC_DIR, "manifest.json")
+
+# Google Fonts only hands out woff2 to browsers it recognises
+FETCH_HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                               "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"}
+
+# Theme fonts, textures and GIFs; any other URL in the sources (docs, data feeds) is never downloaded
+ALLOWED_HOSTS = frozenset({
+    "fonts.googleapis.com", "fonts.gstatic.com", "fonts.cdnfonts.com", "www.transparenttextures.com",
+    "media.giphy.com", "gifdb.com", "encrypted-tbn0.gstatic.com",
+})
+
+_URL_RE = re.compile(r"https?://[^\s'\"()<>]+")
+_CSS_URL_RE = re.compile(r"url\(\s*['\"]?(https?://[^'\")\s]+)['\"]?\s*\)")
+_IMPORT_RE = re.compile(r"@import\s+url\([^)]*\)\s*;")
+_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+
+
+@functools.lru_cache(maxsize=1)
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def asset_url(remote_url):
+    local = load_manifest().get(remote_url)
+    return f"{STATIC_URL}/{local}" if local else remote_url
+
+
+def minify_css(css):
+    css = _COMMENT_RE.sub("", css)
+    # @import is only valid before any other rule, so hoist them all
+    imports = list(dict.fromkeys(re.sub(r"\s+", " ", m.group(0)) for m in _IMPORT_RE.finditer(css)))
+    css = _IMPORT_RE.sub("", css)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    css = css.replace(";}", "}")
+    return "".join(imports) + css.strip()
+
+
+@functools.lru_cache(maxsize=None)
+def build_css(raw_css):
+    # Called with the same few strings on every rerun; the work is done once per process
+    css = _CSS_URL_RE.sub(lambda m: f"url('{asset_url(m.group(1))}')", raw_css)
+    return minify_css(css)
+
+
+@functools.lru_cache(maxsize=None)
+def style_tag(raw_css):
+    return f"<style>{build_css(raw_css)}</style>"
+
+
+# Bundling (run offline, not on the render path)
+def _download(url):
+    req = urllib.request.Request(url, headers=FETCH_HEADERS)
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        return resp.read(), resp.headers.get_content_type()
+
+
+def _extension(url, content_type):
+    known = {"text/css": ".css", "image/gif": ".gif", "image/png": ".png", "image/jpeg": ".jpg",
+             "image/webp": ".webp", "font/woff2": ".woff2", "font/woff": ".woff", "font/ttf": ".ttf"}
+    if content_type in known:
+        return known[content_type]
+    ext = os.path.splitext(url.split("?")[0])[1]
+    return ext if 0 < len(ext) <= 6 else ".bin"
+
+
+def _store(subdir, data, ext):
+    name = f"{subdir}/{hashlib.sha1(data).hexdigest()[:16]}{ext}"
+    path = os.path.join(STATIC_DIR, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return name
+
+
+def allowed(url, hosts=ALLOWED_HOSTS):
+    parts = urllib.parse.urlsplit(url)
+    return parts.scheme == "https" and parts.hostname in hosts
+
+
+def fetch_asset(url, manifest, hosts=ALLOWED_HOSTS):
+    if url in manifest:
+        return manifest[url]
+    if not allowed(url, hosts):
+        raise ValueError("host is not in ALLOWED_HOSTS")
+    data, content_type = _download(url)
+    ext = _extension(url, content_type)
+    if ext == ".css":
+        # Font stylesheets point at font files; bundle those too and make the links relative
+        css = data.decode("utf-8")
+        for font_url in set(_CSS_URL_RE.findall(css)):
+            local = fetch_asset(font_url, manifest, hosts)
+            css = css.replace(font_url, os.path.relpath(local, "fonts"))
+        name = _store("fonts", css.encode("utf-8"), ext)
+    else:
+        name = _store("fonts" if ext in (".woff2", ".woff", ".ttf") else "img", data, ext)
+    manifest[url] = name
+    return name
+
+
+def source_urls(sources, hosts=ALLOWED_HOSTS):
+    """Asset URLs in ``sources``, in order of first appearance, limited to ``hosts``."""
+    urls = []
+    for source in sources:
+        with open(source, encoding="utf-8") as f:
+            urls.extend(_URL_RE.findall(f.read()))
+    return [url for url in dict.fromkeys(urls) if allowed(url, hosts)]
+
+
+def fetch_all(sources, hosts=ALLOWED_HOSTS):
+    manifest = dict(load_manifest())
+    for url in source_urls(sources, hosts):
+        try:
+            print(f"{url} -> {fetch_asset(url, manifest, hosts)}")
+        except Exception as e:
+            print(f"skipped {url}: {e}", file=sys.stderr)
+    os.makedirs(STATIC_DIR, exist_ok=True)
+    with open(MANIFEST_PATH, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    load_manifest.cache_clear()
+    return manifest
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("fetch", "list"):
+        sys.exit("usage: python assets.py fetch|list [source.py ...]")
+    sources = sys.argv[2:] or [os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")]
+    if sys.argv[1] == "list":
+        print("\n".join(source_urls(sources)))
+    else:
+        fetch_all(sources)
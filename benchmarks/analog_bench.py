@@ -0,0 +1,130 @@
+"""Historical analogs: MASS distance profiles against a brute-force scan, and the approximate universe index.
+
+Single-series search is checked against z-normalising every window in turn
+and timed for each length. The universe index is built over ``--symbols``
+synthetic histories. The report covers build time, query latency, recall of
+the exact top-k, a one-bar incremental update and a save/load round trip.
+
+    python benchmarks/analog_bench.py --rows 10000 100000 --window 30 --symbols 200 --years 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import engine  # noqa: E402
+from engine import analogs  # noqa: E402
+
+
+def brute_force(series, query):
+    # Squared z-normalised distance of every window, one at a time
+    m = len(query)
+    q = (query - query.mean()) / query.std()
+    out = np.empty(len(series) - m + 1)
+    for i in range(len(out)):
+        w = series[i:i + m]
+        out[i] = (((w - w.mean()) / w.std() - q) ** 2).sum()
+    return out
+
+
+def exact_top_k(index, closes, query, k, zone):
+    # Every window of every symbol, z-normalised and ranked: the answer the index approximates
+    z = analogs._znorm_windows(query, [len(query) - 1], len(query))
+    found = []
+    for symbol, close in closes.items():
+        ends = np.arange(index.window - 1, len(close))
+        d = np.sqrt(((analogs._znorm_windows(close, ends, index.window) - z) ** 2).sum(axis=1))
+        for end in np.argsort(d)[:k * 10]:
+            found.append((d[end], symbol, int(ends[end])))
+    found.sort()
+    picked = []
+    for d, symbol, end in found:
+        if not any(p[1] == symbol and abs(p[2] - end) < zone for p in picked):
+            picked.append((d, symbol, end))
+        if len(picked) == k:
+            break
+    return {(p[1], p[2]) for p in picked}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--window", type=int, default=30)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    rows = []
+    for n in args.rows:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+        df = pd.DataFrame({"Close": close})
+        config = analogs.AnalogConfig(args.window, args.k)
+        t0 = time.perf_counter()
+        result = analogs.search(df, config)
+        mass_s = time.perf_counter() - t0
+        check = min(n, 20_000)
+        expected = brute_force(close[:check], close[check - args.window:check])
+        got = analogs.distance_profile(close[:check], close[check - args.window:check])
+        assert np.allclose(got, expected, atol=1e-6), "MASS disagrees with the brute-force distance profile"
+        t0 = time.perf_counter()
+        brute_force(close[:check], close[check - args.window:check])
+        brute_s = (time.perf_counter() - t0) * n / check
+        rows.append({"case": "search", "rows": n, "seconds": round(mass_s, 4),
+                     "brute_force_s": round(brute_s, 3), "speedup": round(brute_s / mass_s), "matches": len(result.matches)})
+
+    start, end = "2000-01-01", f"{2000 + args.years}-01-01"
+    closes, dates = {}, {}
+    for i in range(args.symbols):
+        symbol = f"SYM{i:04d}"
+        df = engine.synthetic_history(symbol, start, end)
+        closes[symbol], dates[symbol] = df["Close"].to_numpy(dtype="float64"), df["Date"]
+    index = analogs.AnalogIndex(args.window)
+    t0 = time.perf_counter()
+    for symbol, close in closes.items():
+        index.update(symbol, dates[symbol], close)
+    add_s = time.perf_counter() - t0
+    queries = [close[-args.window:] for close in list(closes.values())[:args.queries]]
+    t0 = time.perf_counter()
+    index.query(queries[0], args.k)
+    first_s = time.perf_counter() - t0
+    zone = int(np.ceil(0.5 * args.window))
+    latencies, recall = [], []
+    for query in queries:
+        t0 = time.perf_counter()
+        found = index.query(query, args.k)
+        latencies.append(time.perf_counter() - t0)
+        exact = exact_top_k(index, closes, query, args.k, zone)
+        recall.append(len(exact & set(zip(found["symbol"], found["end"]))) / len(exact))
+    symbol = next(iter(closes))
+    t0 = time.perf_counter()
+    added = index.update(symbol, [dates[symbol].iloc[-1] + pd.Timedelta(days=1)], [closes[symbol][-1] * 1.01])
+    update_s = time.perf_counter() - t0
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, "analogs.npz")
+        t0 = time.perf_counter()
+        index.save(path)
+        save_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        loaded = analogs.AnalogIndex.load(path)
+        load_s = time.perf_counter() - t0
+        size = os.path.getsize(path)
+    assert len(loaded) == len(index)
+    rows.append({"case": "index", "rows": len(index), "seconds": round(add_s, 3),
+                 "first_query_s": round(first_s, 3), "query_ms": round(1000 * float(np.median(latencies)), 1),
+                 "recall": round(float(np.mean(recall)), 3), "update_ms": round(1000 * update_s, 2), "added": added,
+                 "save_s": round(save_s, 3), "load_s": round(load_s, 3), "file_MiB": round(size / 2**20, 1)})
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
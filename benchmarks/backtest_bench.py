@@ -0,0 +1,57 @@
+"""Threshold x cost backtest sweeps: combinations per second by grid size and worker count.
+
+A Linear Regression is trained headlessly on synthetic OHLCV and its test-split
+predictions are swept over a grid of signal thresholds and transaction costs.
+The first row of each sweep is checked against a single ``backtest.run``.
+
+    python benchmarks/backtest_bench.py --rows 20000 --thresholds 50 200 1000 --costs 21 --workers 1 4
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import engine  # noqa: E402
+from engine import backtest  # noqa: E402
+
+
+def make_inputs(rows):
+    df = engine.synthetic_ohlcv(rows, freq="D")
+    result = engine.run_pipeline(df, engine.PipelineConfig(train_config=engine.TrainConfig(["Linear Regression"])))
+    y_test = result.split.y_test
+    return backtest.prepare(result.df_features, y_test, result.evaluation.y_preds["Linear Regression"],
+                            engine.is_continuous(y_test))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--thresholds", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--costs", type=int, default=21, help="cost levels from 0 to 20 bps")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    inputs = make_inputs(args.rows)
+    costs = np.linspace(0, 20, args.costs)
+    rows = []
+    for n in args.thresholds:
+        thresholds = backtest.default_thresholds(inputs.scores, n)
+        for workers in dict.fromkeys(args.workers):
+            t0 = time.perf_counter()
+            grid = backtest.sweep(inputs, thresholds, costs, slippage_bps=1.0, workers=workers)
+            elapsed = time.perf_counter() - t0
+            single = backtest.run(inputs, backtest.BacktestConfig(thresholds[0], costs[0], 1.0))
+            assert np.isclose(grid["sharpe"].iloc[0], single.sharpe), "sweep disagrees with a single run"
+            rows.append({"bars": len(inputs.returns), "combinations": len(grid), "workers": workers,
+                         "seconds": round(elapsed, 3), "combos_per_s": round(len(grid) / elapsed)})
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
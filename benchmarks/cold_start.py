@@ -0,0 +1,72 @@
+"""Cold-start benchmark: time from a fresh interpreter to the first landing-page paint.
+
+Each measurement runs in its own subprocess so nothing is already imported.
+
+    python benchmarks/cold_start.py --runs 5 --out cold_start.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+FIRST_PAINT_SNIPPET = """
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t_streamlit = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=120).run()
+t_paint = time.perf_counter()
+heavy = sorted(m for m in ("pandas", "numpy", "plotly.express", "sklearn", "yfinance") if m in sys.modules)
+print(json.dumps({{"streamlit_import_s": t_streamlit - t0, "first_paint_s": t_paint - t0,
+                  "heavy_loaded_at_paint": heavy, "exceptions": [str(e) for e in at.exception]}}))
+"""
+
+MODULE_SNIPPET = """
+import json, time
+t0 = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - t0}}))
+"""
+
+HEAVY_MODULES = ["pandas", "numpy", "plotly.express", "plotly.graph_objects", "sklearn.linear_model",
+                 "sklearn.cluster", "sklearn.model_selection", "yfinance", "tenacity"]
+
+
+def run_snippet(code):
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--out", help="write the JSON report here as well as stdout")
+    args = parser.parse_args()
+
+    paints = [run_snippet(FIRST_PAINT_SNIPPET.format(app=APP_PATH)) for _ in range(args.runs)]
+    report = {
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "first_paint_s": {
+            "median": statistics.median(p["first_paint_s"] for p in paints),
+            "min": min(p["first_paint_s"] for p in paints),
+            "max": max(p["first_paint_s"] for p in paints),
+        },
+        "streamlit_import_s": statistics.median(p["streamlit_import_s"] for p in paints),
+        "heavy_loaded_at_paint": paints[-1]["heavy_loaded_at_paint"],
+        "exceptions": paints[-1]["exceptions"],
+        "module_import_s": {m: run_snippet(MODULE_SNIPPET.format(module=m))["seconds"] for m in HEAVY_MODULES},
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
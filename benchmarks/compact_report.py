@@ -0,0 +1,40 @@
+"""Memory saved and metric drift from compact dtypes, stage by stage.
+
+Runs the headless pipeline twice on the same synthetic OHLCV frame, once in
+float64 and once with ``PipelineConfig(compact=True)``.
+
+    python benchmarks/compact_report.py --rows 1000000 --features 10 --models linear kmeans
+"""
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import engine  # noqa: E402
+
+MODEL_KEYS = {"linear": "Linear Regression", "logistic": "Logistic Regression", "kmeans": "K-Means Clustering"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--features", type=int, default=5, help="extra indicator columns in the synthetic frame")
+    parser.add_argument("--models", nargs="+", choices=list(MODEL_KEYS), default=["linear", "kmeans"])
+    args = parser.parse_args()
+
+    df = engine.synthetic_ohlcv(args.rows, n_extra=args.features)
+    df["Symbol"] = "SYN"
+    config = engine.PipelineConfig(train_config=engine.TrainConfig([MODEL_KEYS[m] for m in args.models]))
+    memory, drift = engine.compact_report(df, config)
+    with pd.option_context("display.width", 160, "display.max_columns", 20):
+        print(memory.assign(saved=memory["saved"].map("{:.1%}".format)).to_string())
+        print()
+        print(drift.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
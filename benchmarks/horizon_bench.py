@@ -0,0 +1,65 @@
+"""Multi-horizon forecasting: strided target construction and per-horizon training.
+
+Compares building Return_t+1..t+H with one strided view against a pandas shift
+per horizon (the outputs are checked for equality), then times training one
+direct model per horizon with 1 and N workers.
+
+    python benchmarks/horizon_bench.py --rows 1000000 --horizons 5 20 60 --workers 1 4
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import engine  # noqa: E402
+from engine import horizons  # noqa: E402
+
+
+def shifted_targets(close, max_horizon):
+    return np.column_stack([(close.shift(-h) / close - 1).to_numpy() for h in range(1, max_horizon + 1)])
+
+
+def best_of(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+    return min(times), out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--horizons", type=int, nargs="+", default=[5, 20, 60])
+    parser.add_argument("--kind", choices=horizons.KINDS, default="return")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    df = engine.add_rolling_features(engine.synthetic_ohlcv(args.rows, freq="D"), 20).df
+    features = ["MA_20", "Volatility_20", "Daily_Return"]
+    rows = []
+    for H in args.horizons:
+        shift_s, expected = best_of(lambda: shifted_targets(df["Close"], H))
+        strided_s, actual = best_of(lambda: horizons.forward_returns(df["Close"], np.arange(1, H + 1)))
+        assert np.allclose(expected, actual, equal_nan=True), "strided targets disagree with pandas shifts"
+        row = {"rows": args.rows, "horizons": H, "shift_loop_s": round(shift_s, 4), "strided_s": round(strided_s, 4)}
+        for workers in dict.fromkeys(args.workers):
+            config = horizons.HorizonConfig(tuple(range(1, H + 1)), args.kind, workers=workers)
+            t0 = time.perf_counter()
+            result = horizons.forecast_horizons(df, features, config)
+            row[f"train_s_{workers}w"] = round(time.perf_counter() - t0, 3)
+        row["skill_h1"] = round(float(result.scores["skill"].iloc[0]), 4)
+        row["skill_hmax"] = round(float(result.scores["skill"].iloc[-1]), 4)
+        rows.append(row)
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Reruns, recomputed stages and CPU per user interaction, with and without explicit apply.
+
+Drives the Streamlit app headlessly (``streamlit.testing``) on synthetic data
+with profiling on. Each interaction adjusts a parameter several times before
+committing it. The "eager" column replays the pre-form behaviour: every
+adjustment is its own rerun and nothing is memoised. The "apply" column commits
+once through the form. AppTest reruns the whole script even for fragment-scoped
+reruns, so the numbers are an upper bound for the browser.
+
+    python benchmarks/interaction_bench.py --rows 20000 --moves 5
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("MARKET_MASTER_QUOTE_FEED", "synthetic")
+
+import engine  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+STAGES = ["rolling_features", "scale_features", "feature_charts", "split"]
+
+
+def start_app(rows):
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=300).run()
+    at.button(key="select_Techno Exchange").click().run()
+    at.toggle(key="profiling_enabled").set_value(True).run()
+    at.button(key="start").click().run()
+    df = engine.synthetic_ohlcv(rows, freq="D")[engine.data.OHLCV_COLUMNS]
+    at.session_state["pipeline"].update({"df": df, "data_loaded": True, "current_step": 2})
+    at.run()
+    at.button(key="preprocess_next").click().run()
+    return at
+
+
+def apply_button(at, form):
+    return next(b for b in at.button if b.form_id == form)
+
+
+def measure(at, action):
+    profiler = at.session_state["profiler"]
+    start = len(profiler.records)
+    t0 = time.process_time()
+    runs = action()
+    cpu = time.process_time() - t0
+    new = profiler.records[start:]
+    recomputed = sum(1 for r in new if r["stage"] in STAGES)
+    return runs, recomputed, cpu
+
+
+def interaction(at, widget, values, form, eager):
+    def action():
+        if eager:
+            for value in values:
+                at.session_state["stage_memo"] = {}
+                widget().set_value(value)
+                apply_button(at, form).click().run()
+            return len(values)
+        for value in values:
+            widget().set_value(value)
+        apply_button(at, form).click().run()
+        return 1
+    return measure(at, action)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--moves", type=int, default=5, help="adjustments per interaction before committing")
+    args = parser.parse_args()
+
+    at = start_app(args.rows)
+    windows = list(range(21, 21 + args.moves))
+    sizes = list(range(21, 21 + args.moves))
+    plans = [
+        ("drag MA window", lambda: at.slider(key="feature_window"), windows, "feature_form", 3),
+        ("drag test size", lambda: at.slider(key="split_test_size"), sizes, "split_form", 4),
+    ]
+    rows = []
+    for name, widget, values, form, step in plans:
+        at.session_state["pipeline"]["current_step"] = step
+        at.run()
+        eager = interaction(at, widget, [values[0] - 1] + values[:-1], form, eager=True)
+        applied = interaction(at, widget, values[::-1], form, eager=False)
+        rows.append({"interaction": name, "eager_runs": eager[0], "apply_runs": applied[0],
+                     "eager_recomputed": eager[1], "apply_recomputed": applied[1],
+                     "eager_cpu_s": round(eager[2], 3), "apply_cpu_s": round(applied[2], 3)})
+    at.session_state["pipeline"]["current_step"] = 3
+    at.run()
+    idle = measure(at, lambda: (at.run(), 1)[1])
+    rows.append({"interaction": "rerun, nothing changed", "eager_runs": 1, "apply_runs": idle[0],
+                 "eager_recomputed": None, "apply_recomputed": idle[1], "eager_cpu_s": None,
+                 "apply_cpu_s": round(idle[2], 3)})
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
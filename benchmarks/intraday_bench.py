@@ -0,0 +1,84 @@
+"""Intraday bars: windowed fetching with simulated request latency, and resampling against pandas.
+
+The fetch half downloads ``--days`` of 1m bars from the synthetic feed in
+request-sized windows. Each request sleeps ``--latency`` seconds to stand in
+for the network. Worker counts are compared, and the result is checked to have
+no duplicate or missing bars. The resample half builds every ``--rules`` bar
+size from ``--rows`` one-minute bars with ``intraday.resample``, then with
+``DataFrame.resample().agg()``, and checks that both agree.
+
+    python benchmarks/intraday_bench.py --days 30 --latency 0.5 --workers 1 4 --rows 1000000 5000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from engine import intraday  # noqa: E402
+
+AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+
+def slow_feed(latency):
+    # The synthetic feed behind a fixed round trip; the end date is inclusive, as Yahoo's boundaries effectively are
+    def fetch(symbol, start_date, end_date, job=None, interval="1m"):
+        time.sleep(latency)
+        end = (pd.Timestamp(end_date) + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+        return intraday.synthetic_bars(symbol, start_date, end, interval=interval)
+    return fetch
+
+
+def minute_bars(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, rows)))
+    spread = np.abs(rng.normal(0, 0.001, rows))
+    return pd.DataFrame({"Date": pd.date_range("2000-01-03", periods=rows, freq="min"), "Open": close,
+                         "High": close * (1 + spread), "Low": close * (1 - spread), "Close": close,
+                         "Volume": rng.integers(100, 10_000, rows).astype("float64")})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per simulated request")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 5_000_000])
+    parser.add_argument("--rules", nargs="+", default=["5min", "1h", "D"])
+    args = parser.parse_args()
+
+    rows = []
+    start = pd.Timestamp("2024-01-01")
+    end = start + pd.Timedelta(days=args.days)
+    # Every window returns its end day too, so the last one reaches one day past the range
+    expected = intraday.synthetic_bars("AAPL", start, end + pd.Timedelta(days=1), interval="1m")
+    for workers in args.workers:
+        t0 = time.perf_counter()
+        df = intraday.fetch_bars("AAPL", start, end, "1m", fetch=slow_feed(args.latency), workers=workers, clip=False)
+        elapsed = time.perf_counter() - t0
+        assert df["Date"].is_unique and len(df) == len(expected), "windowed fetch lost or repeated bars"
+        rows.append({"case": "fetch 1m", "rows": len(df), "workers": workers,
+                     "windows": len(intraday.windows(start, end, "1m", clip=False)), "seconds": round(elapsed, 3)})
+
+    for n in args.rows:
+        bars = minute_bars(n)
+        for rule in args.rules:
+            t0 = time.perf_counter()
+            got = intraday.resample(bars, rule)
+            engine_s = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            reference = bars.set_index("Date").resample(rule).agg(AGG).dropna(subset=["Close"])
+            pandas_s = time.perf_counter() - t0
+            assert np.allclose(got[list(AGG)].to_numpy(), reference.to_numpy()), f"resample({rule!r}) disagrees with pandas"
+            rows.append({"case": f"resample {rule}", "rows": n, "seconds": round(engine_s, 3),
+                         "pandas_s": round(pandas_s, 3), "speedup": round(pandas_s / engine_s, 1), "bars": len(got)})
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Multi-user load test: N simulated analysts walking the whole app at once.
+
+Every simulated user is a headless session (``streamlit.testing.AppTest``) in
+its own worker process. AppTest keeps one global runtime and cannot run sessions
+in parallel threads. The workers still share what a server's sessions share
+across processes: the data cache in /dev/shm and the dataset store. Each user
+picks a theme, loads a symbol through the offline data feed
+(``MARKET_MASTER_DATA_FEED=synthetic``), then preprocesses, engineers features,
+splits, trains, evaluates and opens the results. Every interaction is timed.
+
+For each concurrency level the test reports:
+- per-step latency percentiles;
+- CPU (cores busy, summed over the workers);
+- peak RSS (the sum of each worker's peak);
+- the first level at which the p95 of a whole flow exceeds ``--degrade`` times
+  the single-user p95.
+
+    python benchmarks/load_test.py --users 1 2 4 8 16 --iterations 2 --days 750
+"""
+import argparse
+import datetime
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("MARKET_MASTER_DATA_FEED", "synthetic")
+os.environ.setdefault("MARKET_MASTER_QUOTE_FEED", "synthetic")
+
+from pipeline_bench import RssSampler  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+THEMES = ["Financial Shinobi", "Techno Exchange", "Imperial Wealth Club"]
+STEPS = ["landing", "theme", "welcome", "load", "preprocess", "features", "split", "train", "evaluate", "results"]
+
+
+class FlowError(RuntimeError):
+    pass
+
+
+def _check(at, step):
+    if at.exception:
+        raise FlowError(f"{step}: {at.exception[0].value}")
+
+
+def run_flow(user, days, models, timeout):
+    """One analyst from landing page to results; returns {step: seconds}."""
+    timings = {}
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=timeout)
+
+    def step(name, action):
+        t0 = time.perf_counter()
+        action()
+        timings[name] = time.perf_counter() - t0
+        _check(at, name)
+
+    theme = THEMES[user % len(THEMES)]
+    symbol = ["AAPL", "MSFT", "TSLA", "NVDA"][user % 4]
+    end = datetime.date(2024, 1, 1) + datetime.timedelta(days=int(days * 7 / 5))
+    step("landing", at.run)
+    step("theme", lambda: at.button(key=f"select_{theme}").click().run())
+    step("welcome", lambda: at.button(key="start").click().run())
+
+    def load():
+        at.radio[0].set_value("Yahoo Finance").run()
+        at.text_input[0].set_value(symbol)
+        at.date_input[1].set_value(end)
+        next(b for b in at.button if b.form_id == "yahoo_form").click().run()
+        while "load_job" in at.session_state and not at.session_state["pipeline"]["data_loaded"]:
+            at.session_state["load_job"].wait(timeout)
+            at.run()
+    step("load", load)
+    step("preprocess", lambda: at.button(key="preprocess_next").click().run())
+    step("features", lambda: at.button(key="feature_next").click().run())
+    step("split", lambda: at.button(key="split_next").click().run())
+
+    def train():
+        at.multiselect[0].set_value(models).run()
+        at.button(key="train").click().run()
+    step("train", train)
+    step("evaluate", lambda: at.button(key="train_next").click().run())
+    step("results", lambda: at.button(key="evaluation_next").click().run())
+    if at.session_state["pipeline"]["current_step"] != 7:
+        raise FlowError(f"user {user} stopped at step {at.session_state['pipeline']['current_step']}")
+    return timings
+
+
+def _worker(user, iterations, days, models, timeout, barrier, results):
+    # Import and compile costs are paid before the barrier, so only the flows are measured
+    AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=timeout).run()
+    barrier.wait()
+    samples, errors = [], []
+    cpu0 = time.process_time()
+    with RssSampler(interval=0.05) as rss:
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            try:
+                timings = run_flow(user, days, models, timeout)
+            except Exception as e:
+                errors.append(repr(e))
+                continue
+            timings["flow"] = time.perf_counter() - t0
+            samples.append(timings)
+    results.put((samples, errors, time.process_time() - cpu0, rss.peak))
+
+
+def run_level(users, iterations, days, models, timeout):
+    ctx = multiprocessing.get_context("spawn")
+    barrier, results = ctx.Barrier(users + 1, timeout=timeout), ctx.Queue()
+    workers = [ctx.Process(target=_worker, args=(u, iterations, days, models, timeout, barrier, results),
+                           name=f"analyst-{u}") for u in range(users)]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    wall0 = time.perf_counter()
+    outcomes = [results.get(timeout=timeout * iterations) for _ in workers]
+    wall = time.perf_counter() - wall0
+    for w in workers:
+        w.join()
+    samples = [s for o in outcomes for s in o[0]]
+    errors = [e for o in outcomes for e in o[1]]
+    frame = pd.DataFrame(samples)
+    row = {"users": users, "flows": len(frame), "errors": len(errors), "wall_s": wall,
+           "cpu_cores": sum(o[2] for o in outcomes) / wall, "peak_rss_mib": sum(o[3] for o in outcomes) / 2**20,
+           "flows_per_min": 60 * len(frame) / wall}
+    for step in STEPS + ["flow"]:
+        if step in frame:
+            for q in (50, 95, 99):
+                row[f"{step}_p{q}"] = float(np.percentile(frame[step], q))
+    return row, errors[:3]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--iterations", type=int, default=2, help="flows per simulated user at each level")
+    parser.add_argument("--days", type=int, default=500, help="business days of history each user loads")
+    parser.add_argument("--models", nargs="+", default=["Linear Regression", "K-Means Clustering"])
+    parser.add_argument("--degrade", type=float, default=2.0, help="flow p95 slowdown vs one user that counts as degraded")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--save", metavar="CSV")
+    args = parser.parse_args()
+
+    rows = []
+    for users in args.users:
+        row, errors = run_level(users, args.iterations, args.days, args.models, args.timeout)
+        rows.append(row)
+        print(f"{users:>3} users: flow p50 {row.get('flow_p50', float('nan')):.2f}s "
+              f"p95 {row.get('flow_p95', float('nan')):.2f}s, {row['cpu_cores']:.2f} cores, "
+              f"{row['peak_rss_mib']:.0f} MiB, {row['errors']} errors", flush=True)
+        for error in errors:
+            print(f"    {error}")
+    report = pd.DataFrame(rows).set_index("users")
+    steps = report[[f"{s}_p95" for s in STEPS if f"{s}_p95" in report]]
+    with pd.option_context("display.width", 200, "display.max_columns", 30, "display.float_format", "{:.3f}".format):
+        print("\nper-step p95 latency (s)")
+        print(steps.rename(columns=lambda c: c[:-4]).to_string())
+        print("\nsummary")
+        print(report[[c for c in ["flows", "errors", "flows_per_min", "cpu_cores", "peak_rss_mib", "flow_p50", "flow_p95",
+                                  "flow_p99"] if c in report]].to_string())
+    baseline = report["flow_p95"].iloc[0] if "flow_p95" in report else None
+    degraded = [u for u, p95 in report.get("flow_p95", pd.Series(dtype=float)).items()
+                if baseline and p95 > args.degrade * baseline]
+    if degraded:
+        print(f"\nflow p95 exceeds {args.degrade:g}x the {report.index[0]}-user p95 from {degraded[0]} concurrent users")
+    else:
+        print(f"\nno degradation beyond {args.degrade:g}x up to {report.index[-1]} concurrent users")
+    if args.save:
+        report.to_csv(args.save)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""End-to-end benchmark of the 8-step pipeline on synthetic OHLCV data.
+
+Runs the same computations as the Streamlit steps (fill + IQR clip, rolling
+features + scaling, split, the three model fits, prediction + metrics, CSV
+export) headlessly, for every combination of row and feature counts.
+
+    python benchmarks/pipeline_bench.py --rows 10000 1000000 --features 3 50 --repeat 5 --save
+    python benchmarks/pipeline_bench.py --compare .benchmarks/<old>.json --threshold 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import engine  # noqa: E402
+# The engine imports scikit-learn lazily; load it up front so import cost stays out of stage timings
+import sklearn.cluster, sklearn.linear_model, sklearn.metrics, sklearn.model_selection, sklearn.preprocessing  # noqa: E401,E402,F401
+
+RESULTS_DIR = os.path.join(ROOT, ".benchmarks")
+STAGES = ["preprocess", "features", "split", "fit_linear", "fit_logistic", "fit_kmeans", "evaluate", "export"]
+MODEL_KEYS = {"linear": "Linear Regression", "logistic": "Logistic Regression", "kmeans": "K-Means Clustering"}
+
+
+def engineer_features(df, n_features, window=20):
+    featured = engine.add_rolling_features(df, window)
+    candidates = featured.added + [c for c in featured.df.columns if c.startswith("Indicator_")]
+    features = candidates[:n_features]
+    return engine.scale_features(featured.df, features), features
+
+
+def run_once(df, n_features, models):
+    timings = {}
+
+    def timed(stage, fn, *args):
+        t0 = time.perf_counter()
+        out = fn(*args)
+        timings[stage] = time.perf_counter() - t0
+        return out
+
+    processed = timed("preprocess", engine.preprocess, df).df
+    featured, features = timed("features", engineer_features, processed, n_features)
+    data = timed("split", engine.split, featured, features, "Close")
+    built = engine.build_models(engine.TrainConfig(model_types=[MODEL_KEYS[m] for m in models]))
+    fitted = {}
+    for key in models:
+        name = MODEL_KEYS[key]
+        # Logistic Regression needs a categorical target; use next-bar direction
+        y = (data.y_train.diff().fillna(0) > 0).astype(int) if key == "logistic" else data.y_train
+        fitted[name] = timed(f"fit_{key}", engine.fit_model, name, built[name], data.X_train, y)
+
+    def evaluate():
+        preds = engine.predict(fitted, data.X_test)
+        return preds, engine.score(data.y_test, {k: v for k, v in preds.items() if k == "Linear Regression"})
+    preds, _ = timed("evaluate", evaluate)
+
+    def export():
+        return sum(len(engine.results_frame(data.y_test, p).to_csv(index=False).encode("utf-8"))
+                   for p in engine.regression_predictions(preds).values())
+    timed("export", export)
+    return timings
+
+
+def _current_rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # ru_maxrss is KiB on Linux and bytes on macOS; only the high-water mark is available
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class RssSampler:
+    """Polls resident set size in a thread and keeps the maximum seen."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self.peak = _current_rss()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _current_rss())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _current_rss())
+
+
+def percentile_summary(samples, n_rows):
+    arr = np.asarray(samples)
+    p50 = float(np.percentile(arr, 50))
+    return {"p50_s": p50, "p95_s": float(np.percentile(arr, 95)), "p99_s": float(np.percentile(arr, 99)),
+            "mean_s": float(arr.mean()), "rows_per_s": n_rows / p50 if p50 else None}
+
+
+def bench_case(n_rows, n_features, repeat, models):
+    df = engine.synthetic_ohlcv(n_rows, n_extra=max(n_features - 3, 0))
+    samples = {stage: [] for stage in STAGES}
+    peak_rss = 0
+    for _ in range(repeat):
+        with RssSampler() as sampler:
+            timings = run_once(df, n_features, models)
+        for stage, seconds in timings.items():
+            samples[stage].append(seconds)
+        peak_rss = max(peak_rss, sampler.peak)
+    stages = {stage: percentile_summary(s, n_rows) for stage, s in samples.items() if s}
+    return {"rows": n_rows, "features": n_features, "repeat": repeat, "stages": stages,
+            "peak_rss_bytes": peak_rss}
+
+
+def bench_case_isolated(n_rows, n_features, repeat, models):
+    # A fresh process per case keeps one case's heap from inflating the next one's RSS
+    cmd = [sys.executable, os.path.abspath(__file__), "--single", str(n_rows), str(n_features),
+           "--repeat", str(repeat), "--models", *models]
+    out = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "-C", ROOT, "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current, baseline, threshold):
+    base_cases = {(c["rows"], c["features"]): c for c in baseline["cases"]}
+    regressions = []
+    for case in current["cases"]:
+        base = base_cases.get((case["rows"], case["features"]))
+        if not base:
+            continue
+        for stage, stats in case["stages"].items():
+            old = base["stages"].get(stage)
+            if old and old["p50_s"] > 0:
+                change = stats["p50_s"] / old["p50_s"] - 1
+                marker = "REGRESSION" if change > threshold else ""
+                print(f"{case['rows']:>10} rows {case['features']:>4} feat  {stage:<13} "
+                      f"{old['p50_s']:.4f}s -> {stats['p50_s']:.4f}s ({change:+.1%}) {marker}")
+                if change > threshold:
+                    regressions.append((case["rows"], case["features"], stage, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--features", type=int, nargs="+", default=[3, 50])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--models", nargs="+", default=["linear", "logistic", "kmeans"],
+                        choices=["linear", "logistic", "kmeans"])
+    parser.add_argument("--save", nargs="?", const="", help="save results (default .benchmarks/<git-rev>.json)")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed p50 slowdown per stage before exiting non-zero (0.2 = 20%%)")
+    parser.add_argument("--single", type=int, nargs=2, metavar=("ROWS", "FEATURES"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(bench_case(*args.single, args.repeat, args.models)))
+        return
+
+    results = {"revision": git_revision(), "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+               "python": platform.python_version(), "machine": platform.machine(),
+               "cpu_count": os.cpu_count(), "cases": []}
+    for n_rows in args.rows:
+        for n_features in args.features:
+            case = bench_case_isolated(n_rows, n_features, args.repeat, args.models)
+            results["cases"].append(case)
+            for stage, stats in case["stages"].items():
+                print(f"{n_rows:>10} rows {n_features:>4} feat  {stage:<13} p50 {stats['p50_s']:.4f}s "
+                      f"p95 {stats['p95_s']:.4f}s  {stats['rows_per_s']:,.0f} rows/s")
+            print(f"{n_rows:>10} rows {n_features:>4} feat  peak RSS {case['peak_rss_bytes'] / 2**20:,.1f} MiB")
+
+    if args.save is not None:
+        path = args.save or os.path.join(RESULTS_DIR, f"{results['revision']}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"saved {path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} stage(s) slowed down by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""K-Means regime sweep: wall time by row count and worker count.
+
+Sweeps K over synthetic OHLCV features (close and volume, standardised) and
+reports the sweep time, the best K and the time to label every row with the
+chosen model.
+
+    python benchmarks/regime_bench.py --rows 100000 1000000 5000000 --k 2 10 --workers 1 4
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import engine  # noqa: E402
+from engine import regimes  # noqa: E402
+
+
+def make_features(rows):
+    df = engine.synthetic_ohlcv(rows, freq="min")[["Close", "Volume"]].dropna()
+    return (df - df.mean()) / df.std()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--k", type=int, nargs=2, default=[2, 10], metavar=("MIN", "MAX"))
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--fit-rows", type=int, default=regimes.RegimeSweepConfig.fit_rows)
+    parser.add_argument("--silhouette-rows", type=int, default=regimes.RegimeSweepConfig.silhouette_rows)
+    args = parser.parse_args()
+
+    rows = []
+    for n in args.rows:
+        X = make_features(n)
+        for workers in dict.fromkeys(args.workers):
+            config = regimes.RegimeSweepConfig(*args.k, fit_rows=args.fit_rows, silhouette_rows=args.silhouette_rows,
+                                               workers=workers)
+            t0 = time.perf_counter()
+            result = regimes.sweep(X, config)
+            sweep_s = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            regimes.label_rows(result.best_model, X)
+            rows.append({"rows": len(X), "workers": workers, "ks": len(result.scores), "sweep_s": round(sweep_s, 3),
+                         "fit_s_total": round(result.scores["fit_s"].sum(), 3), "best_k": result.best_k,
+                         "best_silhouette": round(result.scores["silhouette"].max(), 3),
+                         "label_all_s": round(time.perf_counter() - t0, 3),
+                         "estimator": type(result.best_model).__name__})
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Rolling/expanding/recursive least squares against refitting LinearRegression per window.
+
+The per-window sklearn loop is timed on the first ``--loop-rows`` rows only and
+its coefficients are checked against the vectorised rolling fit. The vectorised
+methods then run on every requested row count.
+
+    python benchmarks/rolling_ols_bench.py --rows 100000 1000000 5000000 --features 3 --window 60
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from engine.rolling_ols import METHODS, RollingOLSConfig, rolling_ols  # noqa: E402
+
+
+def make_data(rows, features, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(rows, features)), columns=[f"f{i}" for i in range(features)])
+    beta = 1 + np.sin(np.linspace(0, 20, rows))[:, None] * np.arange(1, features + 1)
+    y = pd.Series((X.to_numpy() * beta).sum(axis=1) + rng.normal(scale=0.1, size=rows))
+    return X, y
+
+
+def sklearn_rolling(X, y, window):
+    from sklearn.linear_model import LinearRegression
+    out = np.full((len(X), X.shape[1] + 1), np.nan)
+    for t in range(window - 1, len(X)):
+        model = LinearRegression().fit(X.iloc[t - window + 1:t + 1], y.iloc[t - window + 1:t + 1])
+        out[t] = np.r_[model.intercept_, model.coef_]
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--features", type=int, default=3)
+    parser.add_argument("--window", type=int, default=60)
+    parser.add_argument("--forgetting", type=float, default=0.99)
+    parser.add_argument("--loop-rows", type=int, default=5_000, help="rows for the per-window sklearn baseline")
+    args = parser.parse_args()
+
+    X, y = make_data(args.loop_rows, args.features)
+    t0 = time.perf_counter()
+    reference = sklearn_rolling(X, y, args.window)
+    loop_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    fast = rolling_ols(X, y, RollingOLSConfig(window=args.window)).coefficients.to_numpy()
+    fast_s = time.perf_counter() - t0
+    assert np.allclose(reference, fast, equal_nan=True, atol=1e-6), "rolling fit disagrees with per-window sklearn"
+    rows = [{"method": "sklearn per window", "rows": args.loop_rows, "seconds": round(loop_s, 3),
+             "rows_per_s": round(args.loop_rows / loop_s)},
+            {"method": "rolling", "rows": args.loop_rows, "seconds": round(fast_s, 4),
+             "rows_per_s": round(args.loop_rows / fast_s)}]
+    for n in args.rows:
+        X, y = make_data(n, args.features)
+        for method in METHODS:
+            config = RollingOLSConfig(method, window=args.window, forgetting=args.forgetting)
+            t0 = time.perf_counter()
+            result = rolling_ols(X, y, config)
+            elapsed = time.perf_counter() - t0
+            rows.append({"method": method, "rows": n, "seconds": round(elapsed, 3), "rows_per_s": round(n / elapsed),
+                         "forecast_rmse": round(float(np.sqrt(np.nanmean(result.residuals ** 2))), 4)})
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
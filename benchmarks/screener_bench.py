@@ -0,0 +1,69 @@
+"""Multi-symbol screener: symbols per minute, cold, warm and after a partial data refresh.
+
+Builds a universe of synthetic daily histories in a scratch dataset store and
+frame cache, then screens it three times for each worker count:
+- cold: every symbol runs the pipeline;
+- warm: nothing changed, so everything comes from the cache;
+- refresh: ``--changed`` symbols get new data and only they run again.
+
+    python benchmarks/screener_bench.py --symbols 100 500 --years 10 --workers 1 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import engine  # noqa: E402
+from engine import screener  # noqa: E402
+
+
+def revised_history(changed):
+    # The synthetic feed with the last close of some symbols restated, as a data vendor would
+    def fetch(symbol, start_date, end_date, job=None):
+        df = engine.synthetic_history(symbol, start_date, end_date)
+        if symbol in changed:
+            df.loc[df.index[-1], "Close"] *= 1.01
+        return df
+    return fetch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, nargs="+", default=[100])
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--changed", type=int, default=5, help="symbols whose data changes before the refresh run")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    start, end = "2000-01-01", f"{2000 + args.years}-01-01"
+    rows = []
+    for n in args.symbols:
+        symbols = [f"SYM{i:04d}" for i in range(n)]
+        for workers in dict.fromkeys(args.workers):
+            with tempfile.TemporaryDirectory() as scratch:
+                cache = engine.cache.SharedFrameCache(os.path.join(scratch, "cache"))
+                store = engine.datasets.DatasetStore(os.path.join(scratch, "datasets"))
+                config = screener.ScreenerConfig(workers=workers, cache_dir=cache.directory)
+                t0 = time.perf_counter()
+                universe, _ = screener.load_universe(symbols, start, end, engine.synthetic_history, cache, store)
+                load_s = time.perf_counter() - t0
+                runs = [("cold", universe), ("warm", universe)]
+                revised, _ = screener.load_universe(symbols, start, end, revised_history(set(symbols[:args.changed])),
+                                                    cache, store, refresh=True)
+                runs.append(("refresh", revised))
+                for label, handles in runs:
+                    result = screener.screen(handles, config)
+                    rows.append({"symbols": n, "workers": workers, "run": label, "load_s": round(load_s, 2),
+                                 "screen_s": round(result.seconds, 3), "recomputed": len(result.recomputed),
+                                 "symbols_per_min": round(result.symbols_per_minute), "errors": len(result.errors)})
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+"""Market Master compute engine.
+
+Pure-Python pipeline stages with typed inputs and outputs. ``app.py`` is a thin
+Streamlit view over these functions; benchmarks and batch jobs call them directly.
+"""
+from engine import (
+    analogs, backtest, cache, compact, crossasset, datasets, export, horizons, intraday, jobs, montecarlo, preprocessing,
+    quotes, regimes, relevance, rolling_ols, screener, sessions,
+)
+from engine.data import CleanResult, clean_numeric_columns, fetch_ohlcv, read_table, synthetic_history, synthetic_ohlcv
+from engine.errors import DataFetchError, EmptyDataError, JobCancelled, ModelSelectionError, PipelineError
+from engine.pipeline import PipelineConfig, PipelineResult, compact_report, run_pipeline, results_frame
+from engine.preprocessing import CLIP_STRATEGIES, FILL_STRATEGIES, PreprocessConfig
+from engine.stages import (
+    MODEL_TYPES, EvaluationResult, FeatureConfig, FeatureResult, PreprocessResult, SplitConfig, SplitResult,
+    TrainConfig, add_rolling_features, build_models, clip_outliers, correlation, evaluate, fill_missing, fit_model,
+    full_history, is_chronological, is_continuous, model_details, numeric_columns, predict, preprocess,
+    regression_predictions, scale_features, score, split, train, validate_model_types,
+)
@@ -0,0 +1,304 @@
+"""Historical analogs: past windows that looked like the most recent one.
+
+Windows are compared after z-normalisation (each window minus its mean, over
+its standard deviation), so an analog matches the shape of the move, not the
+price level or the volatility.
+
+Two search paths:
+- ``search`` is exact over one dataset. It uses MASS: the sliding dot product
+  of the query with the whole series comes from one FFT, and rolling means and
+  standard deviations turn it into the z-normalised distance to every window.
+  Several columns (Close plus engineered features) add their squared distances.
+- ``AnalogIndex`` is approximate, across a universe of symbols. Each window is
+  reduced to a short PAA vector (the means of ``segments`` equal slices of the
+  z-normalised window). A KD-tree over those vectors proposes candidates, and
+  exact distances re-rank them. Scaled PAA distance is a lower bound of the
+  true distance, so true neighbours are rarely missed. The index saves to one
+  ``.npz`` file. ``update`` appends only the windows that end on new bars, and
+  those are searched directly until the tree is rebuilt.
+
+Matches that overlap each other or the query window are trivial and are
+skipped. Each analog comes with the returns that followed it.
+"""
+from __future__ import annotations
+
+import contextlib
+import os
+import tempfile
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from engine.errors import EmptyDataError
+from engine.horizons import forward_returns
+
+EPS = 1e-12
+
+
+@dataclass
+class AnalogConfig:
+    window: int = 30  # bars per window
+    k: int = 5  # analogs to return
+    horizons: tuple = (5, 10, 20)  # bars ahead for the returns that followed each analog
+    columns: tuple = ("Close",)  # columns whose shapes must match
+    exclusion: float = 0.5  # analogs must start at least exclusion x window bars apart
+
+
+@dataclass
+class AnalogResult:
+    matches: pd.DataFrame  # rank, start, end, Date, distance, Return_+h...; best first
+    summary: pd.DataFrame  # per horizon: mean, median and share of positive returns across the analogs
+    profile: np.ndarray = field(repr=False, default=None)  # distance from the query to every window
+
+
+def _moving_stats(series, m):
+    # Rolling mean and standard deviation of every length-m window from two cumulative sums
+    x = series - series.mean()
+    c1 = np.concatenate([[0.0], np.cumsum(x)])
+    c2 = np.concatenate([[0.0], np.cumsum(x * x)])
+    mean = (c1[m:] - c1[:-m]) / m
+    var = (c2[m:] - c2[:-m]) / m - mean ** 2
+    return mean + series.mean(), np.sqrt(np.maximum(var, 0.0))
+
+
+def sliding_dot(query, series) -> np.ndarray:
+    """``query · series[i:i + m]`` for every i, from one real FFT."""
+    n, m = len(series), len(query)
+    size = 1 << (n + m - 1).bit_length()
+    product = np.fft.irfft(np.fft.rfft(series, size) * np.fft.rfft(query[::-1], size), size)
+    return product[m - 1:n]
+
+
+def distance_profile(series, query) -> np.ndarray:
+    """Squared z-normalised Euclidean distance from ``query`` to every window of ``series`` (MASS)."""
+    series = np.asarray(series, dtype="float64")
+    query = np.asarray(query, dtype="float64")
+    m = len(query)
+    mu_q, sd_q = query.mean(), query.std()
+    mu, sd = _moving_stats(series, m)
+    # Centring the query makes the sliding dot product insensitive to the series' level
+    qt = sliding_dot(query - mu_q, series)
+    flat_q, flat = sd_q < EPS, sd < EPS
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = np.clip(qt / (m * np.where(flat, 1.0, sd) * (sd_q if not flat_q else 1.0)), -1.0, 1.0)
+    d2 = 2 * m * (1 - corr)
+    # A flat window has no shape: it matches another flat window exactly and anything else poorly
+    d2[flat] = 0.0 if flat_q else m
+    if flat_q:
+        d2[~flat] = m
+    return d2
+
+
+def _top_k(profile, k, zone):
+    profile = profile.copy()
+    picks = []
+    for _ in range(k):
+        i = int(np.argmin(profile))
+        if not np.isfinite(profile[i]):
+            break
+        picks.append(i)
+        profile[max(i - zone + 1, 0):i + zone] = np.inf
+    return picks
+
+
+def _summary(returns: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame({"mean": returns.mean(), "median": returns.median(), "positive": (returns > 0).mean(),
+                         "analogs": returns.notna().sum()})
+
+
+def search(df: pd.DataFrame, config: AnalogConfig = AnalogConfig(), prices=None, end: int | None = None,
+           price_column: str = "Close", date_column: str = "Date") -> AnalogResult:
+    """The ``k`` windows most like the one ending at row ``end`` (default: the last row).
+
+    ``prices`` (default: ``df[price_column]``) gives the returns that followed
+    each analog. Pass the unscaled prices when the frame's columns were
+    standardised.
+    """
+    m = int(config.window)
+    columns = [c for c in config.columns if c in df.columns]
+    if not columns:
+        raise EmptyDataError(f"None of {', '.join(config.columns)} are in the data")
+    end = len(df) if end is None else int(end)
+    if m < 3 or end < 2 * m:
+        raise EmptyDataError(f"Analog search needs at least {2 * m} rows for a {m}-bar window")
+    # FFTs spread a single NaN over every output, so gaps are filled first
+    values = df[columns].apply(pd.to_numeric, errors="coerce").ffill().bfill().to_numpy(dtype="float64")
+    profile = np.zeros(len(df) - m + 1)
+    for j in range(values.shape[1]):
+        profile += distance_profile(values[:, j], values[end - m:end, j])
+    zone = max(int(np.ceil(config.exclusion * m)), 1)
+    # Windows overlapping the query (or after it) are the query itself, not history
+    profile[max(end - m - zone + 1, 0):] = np.inf
+    picks = np.array(_top_k(profile, config.k, zone), dtype=np.int64)
+
+    prices = df[price_column] if prices is None else prices
+    horizons = np.array(config.horizons, dtype=np.int64)
+    ahead = forward_returns(np.asarray(prices, dtype="float64"), horizons)
+    matches = pd.DataFrame({"rank": np.arange(1, len(picks) + 1), "start": picks, "end": picks + m - 1,
+                            "distance": np.sqrt(profile[picks] / len(columns))})
+    if date_column in df.columns:
+        matches.insert(3, "Date", df[date_column].to_numpy()[matches["end"]])
+    returns = pd.DataFrame(ahead[matches["end"]], columns=[f"Return_+{h}" for h in horizons])
+    return AnalogResult(pd.concat([matches, returns], axis=1), _summary(returns), np.sqrt(profile / len(columns)))
+
+
+def _znorm_windows(close, ends, m):
+    windows = np.lib.stride_tricks.sliding_window_view(close, m)[np.asarray(ends) - m + 1]
+    mean = windows.mean(axis=1, keepdims=True)
+    sd = windows.std(axis=1, keepdims=True)
+    return np.where(sd > EPS, (windows - mean) / np.where(sd > EPS, sd, 1.0), 0.0)
+
+
+def _paa(z, segments):
+    # Means of equal slices (the last few slices take one extra bar when window % segments != 0)
+    bounds = np.linspace(0, z.shape[1], segments + 1).astype(np.int64)
+    sums = np.add.reduceat(z, bounds[:-1], axis=1)
+    return sums / np.diff(bounds)
+
+
+class AnalogIndex:
+    """Approximate top-k analog search over the Close of many symbols; persists to one ``.npz`` file."""
+
+    def __init__(self, window: int = 30, segments: int = 10):
+        self.window = int(window)
+        self.segments = max(1, min(int(segments), self.window))
+        self._series = {}  # symbol -> (dates as int64 ns, close float64)
+        self._symbol_ids = {}
+        self._keys = np.empty((0, 2), dtype=np.int64)  # (symbol id, window end)
+        self._paa = np.empty((0, self.segments), dtype=np.float32)
+        self._tree = None
+        self._tree_rows = 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    @property
+    def symbols(self) -> list:
+        return list(self._series)
+
+    def position(self, symbol: str, date) -> int:
+        """Indexed bars of ``symbol`` on or before ``date``: the ``end`` that excludes a query ending on that date."""
+        if symbol not in self._series:
+            return 0
+        stamp = pd.Timestamp(date)
+        stamp = stamp.tz_convert(None) if stamp.tzinfo is not None else stamp
+        return int(np.searchsorted(self._series[symbol][0], stamp.value, side="right"))
+
+    def _scale(self):
+        # sqrt(bars per slice) makes PAA distance a lower bound of the z-normalised distance
+        return np.float32(np.sqrt(self.window / self.segments))
+
+    def update(self, symbol: str, dates, close) -> int:
+        """Add bars newer than the ones already indexed for ``symbol``; returns how many windows were added."""
+        dates = pd.to_datetime(pd.Series(dates), errors="coerce", utc=True).dt.tz_localize(None)
+        dates = dates.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        close = np.asarray(close, dtype="float64")
+        keep = np.isfinite(close) & (close > 0)
+        dates, close = dates[keep], close[keep]
+        order = np.argsort(dates, kind="stable")
+        dates, close = dates[order], close[order]
+        if symbol in self._series:
+            old_dates, old_close = self._series[symbol]
+            fresh = dates > (old_dates[-1] if len(old_dates) else np.iinfo(np.int64).min)
+            dates, close = np.concatenate([old_dates, dates[fresh]]), np.concatenate([old_close, close[fresh]])
+            first_end = max(len(old_close), self.window - 1)
+        else:
+            self._symbol_ids[symbol] = len(self._symbol_ids)
+            first_end = self.window - 1
+        self._series[symbol] = (dates, close)
+        ends = np.arange(first_end, len(close))
+        if not len(ends):
+            return 0
+        paa = _paa(_znorm_windows(close, ends, self.window), self.segments).astype(np.float32) * self._scale()
+        keys = np.column_stack([np.full(len(ends), self._symbol_ids[symbol]), ends])
+        self._keys = np.vstack([self._keys, keys])
+        self._paa = np.vstack([self._paa, paa])
+        return len(ends)
+
+    def _candidates(self, point, count):
+        from sklearn.neighbors import KDTree
+        # New windows are searched directly until there are enough of them to be worth a rebuild
+        if self._tree is None or len(self._paa) - self._tree_rows > max(10_000, self._tree_rows // 10):
+            self._tree = KDTree(self._paa)
+            self._tree_rows = len(self._paa)
+        rows = self._tree.query(point[None, :], k=min(count, self._tree_rows), return_distance=False)[0]
+        tail = self._paa[self._tree_rows:]
+        if len(tail):
+            near = np.argsort(((tail - point) ** 2).sum(axis=1))[:count] + self._tree_rows
+            rows = np.concatenate([rows, near])
+        return rows
+
+    def query(self, values, k: int = 5, horizons=(5, 10, 20), oversample: int = 20, exclusion: float = 0.5,
+              exclude: tuple | None = None) -> pd.DataFrame:
+        """Top-k analogs of ``values`` (the last ``window`` closes); ``exclude=(symbol, end)`` drops the query's own windows."""
+        if not len(self):
+            raise EmptyDataError("The analog index is empty")
+        query = np.asarray(values, dtype="float64")[-self.window:]
+        if len(query) < self.window:
+            raise EmptyDataError(f"A query needs {self.window} closes")
+        z = _znorm_windows(query, [self.window - 1], self.window)
+        point = (_paa(z, self.segments)[0] * self._scale()).astype(np.float32)
+        rows = np.unique(self._candidates(point, k * oversample))
+        names = {i: s for s, i in self._symbol_ids.items()}
+        zone = max(int(np.ceil(exclusion * self.window)), 1)
+        found = []
+        for sid in np.unique(self._keys[rows, 0]):
+            symbol = names[sid]
+            dates, close = self._series[symbol]
+            ends = self._keys[rows[self._keys[rows, 0] == sid], 1]
+            if exclude is not None and exclude[0] == symbol:
+                ends = ends[ends <= exclude[1] - self.window]
+            if not len(ends):
+                continue
+            distance = np.sqrt(((_znorm_windows(close, ends, self.window) - z) ** 2).sum(axis=1))
+            ahead = forward_returns(close, np.asarray(horizons))[ends]
+            for end, d, r in zip(ends, distance, ahead):
+                found.append((d, symbol, int(end), dates[end], r))
+        found.sort(key=lambda f: f[0])
+        picked = []
+        for d, symbol, end, date, r in found:
+            # Overlapping windows of one symbol are one analog
+            if any(p[1] == symbol and abs(p[2] - end) < zone for p in picked):
+                continue
+            picked.append((d, symbol, end, date, r))
+            if len(picked) == k:
+                break
+        matches = pd.DataFrame({"rank": np.arange(1, len(picked) + 1), "symbol": [p[1] for p in picked],
+                                "end": [p[2] for p in picked], "Date": pd.to_datetime([p[3] for p in picked]),
+                                "distance": [p[0] for p in picked]})
+        returns = pd.DataFrame([p[4] for p in picked], columns=[f"Return_+{h}" for h in horizons])
+        return pd.concat([matches, returns], axis=1)
+
+    def save(self, path: str):
+        symbols = list(self._series)
+        lengths = np.array([len(self._series[s][1]) for s in symbols], dtype=np.int64)
+        arrays = {
+            "meta": np.array([self.window, self.segments], dtype=np.int64),
+            "symbols": np.array(symbols, dtype=str), "ids": np.array([self._symbol_ids[s] for s in symbols]),
+            "lengths": lengths, "keys": self._keys, "paa": self._paa,
+            "dates": np.concatenate([self._series[s][0] for s in symbols]) if symbols else np.empty(0, np.int64),
+            "close": np.concatenate([self._series[s][1] for s in symbols]) if symbols else np.empty(0),
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".npz")
+        os.close(fd)
+        try:
+            np.savez(tmp, **arrays)
+            os.replace(tmp, path)
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp)
+
+    @classmethod
+    def load(cls, path: str) -> "AnalogIndex":
+        with np.load(path) as data:
+            window, segments = (int(v) for v in data["meta"])
+            index = cls(window, segments)
+            bounds = np.concatenate([[0], np.cumsum(data["lengths"])])
+            for symbol, sid, lo, hi in zip(data["symbols"], data["ids"], bounds[:-1], bounds[1:]):
+                index._series[str(symbol)] = (data["dates"][lo:hi].copy(), data["close"][lo:hi].copy())
+                index._symbol_ids[str(symbol)] = int(sid)
+            index._keys, index._paa = data["keys"].copy(), data["paa"].copy()
+        return index
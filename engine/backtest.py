@@ -0,0 +1,204 @@
+"""Vectorised backtests of model predictions on the test split.
+
+The split must be chronological (``SplitConfig(shuffle=False)``): with a
+shuffled one the model was fitted on bars that come after the ones it trades.
+Test rows are put in date order and each prediction becomes a score, using
+only what is known at that bar's close:
+- for a forward return target (``Return_t+h``), the predicted return itself;
+- for the same-bar price, the relative gap between the prediction and that
+  price (a forecast above today's price reads as undervalued);
+- for a classifier, +1 for the top class and -1 for the bottom class.
+Any other continuous target has no tradable reading and is rejected.
+
+A threshold on the score gives the position (long, flat or short). The position
+is held over the return to the next test bar, so a bar never trades on its own
+move. Costs and slippage are charged in basis points per unit of turnover.
+
+``sweep`` evaluates a grid of thresholds x costs as one array per chunk of
+thresholds. Chunks run on a thread pool; NumPy releases the GIL in the heavy
+reductions.
+"""
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from engine.errors import EmptyDataError
+from engine.horizons import target_horizon
+
+CHUNK_CELLS = 2_000_000  # float64 cells per sweep chunk (thresholds x costs x bars), ~16 MiB
+
+
+@dataclass
+class BacktestConfig:
+    threshold: float = 0.0  # minimum |score| to hold a position
+    cost_bps: float = 1.0  # commission per unit of turnover
+    slippage_bps: float = 0.0  # extra execution cost per unit of turnover
+    allow_short: bool = True
+
+
+@dataclass
+class BacktestInputs:
+    dates: np.ndarray
+    prices: np.ndarray
+    scores: np.ndarray
+    returns: np.ndarray  # price return from each bar to the next test bar; 0 on the last
+    periods_per_year: float
+
+
+@dataclass
+class BacktestResult:
+    frame: pd.DataFrame  # Date, Price, Score, Position, Gross, Net, Equity, Drawdown per bar
+    total_return: float
+    sharpe: float
+    max_drawdown: float
+    trades: int
+    exposure: float  # share of bars with a position
+
+
+def scorable(target, continuous: bool, price_column: str = "Close") -> bool:
+    """Whether predictions of ``target`` can size positions without looking ahead."""
+    return not continuous or target == price_column or target_horizon(target) > 0
+
+
+def prediction_scores(prediction, actual, continuous: bool, forward: bool = False) -> np.ndarray:
+    """Scores from the predictions; ``actual`` is read only as today's price (or for the class labels).
+
+    ``forward`` marks a forward return target, whose realised values lie in the future.
+    """
+    prediction = np.asarray(prediction, dtype="float64")
+    actual = np.asarray(actual, dtype="float64")
+    if continuous and forward:
+        return np.nan_to_num(prediction, nan=0.0, posinf=0.0, neginf=0.0)
+    if continuous:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = (prediction - actual) / np.abs(actual)
+        return np.nan_to_num(scores, nan=0.0, posinf=0.0, neginf=0.0)
+    classes = np.unique(actual[~np.isnan(actual)])
+    if len(classes) < 2:
+        return np.zeros_like(prediction)
+    return (prediction == classes[-1]).astype("float64") - (prediction == classes[0])
+
+
+def prepare(df_features: pd.DataFrame, y_test: pd.Series, prediction, continuous: bool,
+            price_column: str = "Close", target: str | None = None) -> BacktestInputs:
+    """Align one model's test predictions with dates and unscaled prices.
+
+    ``target`` names what was predicted; None means the price column itself.
+    """
+    if len(y_test) < 2:
+        raise EmptyDataError("A backtest needs at least two test rows")
+    target = price_column if target is None else target
+    if not scorable(target, continuous, price_column):
+        raise ValueError(f"Predictions of {target!r} cannot be traded: backtest the price ({price_column}), "
+                         f"a forward return or a classifier")
+    source = df_features.loc[y_test.index]
+    scores = pd.Series(prediction_scores(prediction, y_test, continuous, target_horizon(target) > 0),
+                       index=y_test.index)
+    if price_column not in source.columns and target != price_column:
+        raise EmptyDataError(f"A backtest of {target} needs a {price_column} column to trade")
+    price = source[price_column] if price_column in source.columns else y_test
+    frame = pd.DataFrame({"Price": price.astype("float64"), "Score": scores})
+    if "Date" in source.columns:
+        frame["Date"] = pd.to_datetime(source["Date"], errors="coerce")
+        frame = frame.sort_values("Date", kind="stable")
+    else:
+        frame["Date"] = frame.index
+        frame = frame.sort_index()
+    prices = frame["Price"].to_numpy()
+    returns = np.zeros(len(prices))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[:-1] = prices[1:] / prices[:-1] - 1
+    returns = np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+    return BacktestInputs(frame["Date"].to_numpy(), prices, frame["Score"].to_numpy(), returns,
+                          _periods_per_year(frame["Date"]))
+
+
+def _periods_per_year(dates: pd.Series) -> float:
+    # Annualise by how many test bars fall in a year, whatever the bar size
+    if pd.api.types.is_datetime64_any_dtype(dates) and dates.notna().sum() > 1:
+        years = (dates.max() - dates.min()).days / 365.25
+        if years > 0:
+            return (dates.notna().sum() - 1) / years
+    return 252.0
+
+
+def positions(scores: np.ndarray, thresholds, allow_short: bool = True) -> np.ndarray:
+    """Positions for every threshold at once: shape (len(thresholds), len(scores)) in {-1, 0, 1}."""
+    thresholds = np.atleast_1d(np.asarray(thresholds, dtype="float64"))[:, None]
+    pos = (scores > thresholds).astype(np.int8)
+    if allow_short:
+        pos -= scores < -thresholds
+    return pos
+
+
+def turnover(pos: np.ndarray) -> np.ndarray:
+    # Entering from flat at the first bar counts as a trade
+    return np.abs(np.diff(pos, axis=-1, prepend=0)).astype("float64")
+
+
+def _metrics(net: np.ndarray, periods_per_year: float):
+    # Reductions along the bar axis, so net can carry any leading grid dimensions
+    equity = np.cumprod(1 + net, axis=-1)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=-1), 1.0)
+    std = net.std(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(std > 0, net.mean(axis=-1) / std * np.sqrt(periods_per_year), 0.0)
+    return equity[..., -1] - 1, sharpe, (equity / peak - 1).min(axis=-1)
+
+
+def run(inputs: BacktestInputs, config: BacktestConfig = BacktestConfig()) -> BacktestResult:
+    pos = positions(inputs.scores, config.threshold, config.allow_short)[0]
+    turns = turnover(pos)
+    gross = pos * inputs.returns
+    net = gross - turns * (config.cost_bps + config.slippage_bps) / 1e4
+    total, sharpe, drawdown = _metrics(net, inputs.periods_per_year)
+    equity = np.cumprod(1 + net)
+    frame = pd.DataFrame({"Date": inputs.dates, "Price": inputs.prices, "Score": inputs.scores, "Position": pos,
+                          "Gross": gross, "Net": net, "Equity": equity,
+                          "Drawdown": equity / np.maximum(np.maximum.accumulate(equity), 1.0) - 1})
+    return BacktestResult(frame, float(total), float(sharpe), float(drawdown), int((turns > 0).sum()),
+                          float((pos != 0).mean()))
+
+
+def _sweep_chunk(inputs, thresholds, rates, allow_short):
+    pos = positions(inputs.scores, thresholds, allow_short)
+    turns = turnover(pos)
+    gross = pos * inputs.returns
+    net = gross[:, None, :] - turns[:, None, :] * rates[None, :, None]
+    total, sharpe, drawdown = _metrics(net, inputs.periods_per_year)
+    trades = np.broadcast_to((turns > 0).sum(axis=-1)[:, None], total.shape)
+    exposure = np.broadcast_to((pos != 0).mean(axis=-1)[:, None], total.shape)
+    return total, sharpe, drawdown, trades, exposure
+
+
+def sweep(inputs: BacktestInputs, thresholds, costs_bps, slippage_bps: float = 0.0, allow_short: bool = True,
+          workers: int | None = None, chunk_cells: int = CHUNK_CELLS) -> pd.DataFrame:
+    """Metrics for every (threshold, cost) pair, one row each."""
+    thresholds = np.asarray(thresholds, dtype="float64")
+    costs = np.asarray(costs_bps, dtype="float64")
+    rates = (costs + slippage_bps) / 1e4
+    per_threshold = max(len(costs) * len(inputs.returns), 1)
+    step = max(1, chunk_cells // per_threshold)
+    chunks = [thresholds[i:i + step] for i in range(0, len(thresholds), step)]
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="market-master-backtest") as pool:
+            parts = list(pool.map(lambda c: _sweep_chunk(inputs, c, rates, allow_short), chunks))
+    else:
+        parts = [_sweep_chunk(inputs, c, rates, allow_short) for c in chunks]
+    total, sharpe, drawdown, trades, exposure = (np.concatenate([p[i] for p in parts]) for i in range(5))
+    grid_t, grid_c = np.meshgrid(thresholds, costs, indexing="ij")
+    return pd.DataFrame({"threshold": grid_t.ravel(), "cost_bps": grid_c.ravel(), "total_return": total.ravel(),
+                         "sharpe": sharpe.ravel(), "max_drawdown": drawdown.ravel(),
+                         "trades": trades.ravel().astype("int64"), "exposure": exposure.ravel()})
+
+
+def default_thresholds(scores: np.ndarray, n: int = 50) -> np.ndarray:
+    # From always-in to roughly the strongest 5% of signals
+    top = float(np.quantile(np.abs(scores), 0.95)) if len(scores) else 0.0
+    return np.linspace(0.0, top, n)
@@ -0,0 +1,241 @@
+"""Cross-session, cross-process frame cache with single-flight loading.
+
+Entries are Arrow IPC files in a shared directory (``/dev/shm`` when available),
+read back through memory maps so every worker process maps the same pages. A
+miss takes a per-key thread lock and a per-key file lock, so N concurrent
+requests for the same key, in any number of threads or processes, result in
+one call to the loader. The directory is kept under ``max_bytes`` by evicting
+the least recently used entries, along with their lock files.
+
+An entry written with a ``ttl`` carries its expiry in the Arrow schema metadata
+and reads as a miss once it passes, so a history that runs up to today is
+fetched again instead of being served stale for good. Each process keeps the
+DataFrame it converted per entry and hands out copies; under pandas
+copy-on-write those are shallow, so a hit does not convert or copy the data.
+"""
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+
+try:
+    import fcntl
+except ImportError:  # Windows: coalescing is per process only
+    fcntl = None
+
+DEFAULT_MAX_BYTES = 512 * 2**20
+LIVE_TTL_SECONDS = 15 * 60
+EXPIRES = b"market_master_expires"
+
+
+def default_directory():
+    base = "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else tempfile.gettempdir()
+    return os.path.join(base, "market_master_cache")
+
+
+def range_ttl(end_date, ttl=LIVE_TTL_SECONDS):
+    """TTL for a history ending at ``end_date``: a range that reaches today is still growing, a past one never changes."""
+    return ttl if date.fromisoformat(str(end_date)[:10]) >= date.today() else None
+
+
+def _expired(table):
+    expires = (table.schema.metadata or {}).get(EXPIRES)
+    return expires is not None and float(expires) <= time.time()
+
+
+def _copy_on_write():
+    import pandas as pd
+    return int(pd.__version__.split(".")[0]) >= 3 or bool(getattr(pd.options.mode, "copy_on_write", False))
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    evictions: int = 0
+    bytes: int = 0
+    entries: int = 0
+
+
+class SharedFrameCache:
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or default_directory()
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        self._stats = CacheStats()
+        self._tables = {}
+        self._frames = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".arrow")
+
+    def _key_lock(self, path):
+        with self._lock:
+            return self._key_locks.setdefault(path, threading.Lock())
+
+    @contextlib.contextmanager
+    def _file_lock(self, path):
+        if fcntl is None:
+            yield
+            return
+        with open(path + ".lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read(self, key, path):
+        import pyarrow as pa
+        with self._lock:
+            table = self._tables.get(key)
+        if table is not None and os.path.exists(path) and not _expired(table):
+            return table
+        try:
+            table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return None
+        if _expired(table):
+            return None
+        with self._lock:
+            self._tables[key] = table
+        return table
+
+    def _touch(self, path):
+        with contextlib.suppress(OSError):
+            os.utime(path)
+
+    def _write(self, path, table):
+        import pyarrow as pa
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp, path)
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp)
+
+    def get_table(self, key, loader, ttl=None):
+        """Return the Arrow table for ``key``, calling ``loader()`` (returning a DataFrame) only on a true miss.
+
+        A table loaded with ``ttl`` seconds is loaded again once they have passed.
+        """
+        import pyarrow as pa
+        path = self._path(key)
+        table = self._read(key, path)
+        if table is not None:
+            self._touch(path)
+            with self._lock:
+                self._stats.hits += 1
+            return table
+        key_lock = self._key_lock(path)
+        waited = not key_lock.acquire(blocking=False)
+        if waited:
+            key_lock.acquire()
+        try:
+            with self._file_lock(path):
+                # Someone else may have filled it while we waited on either lock
+                table = self._read(key, path)
+                if table is not None:
+                    with self._lock:
+                        self._stats.hits += 1
+                        self._stats.coalesced += 1
+                    return table
+                with self._lock:
+                    self._stats.misses += 1
+                frame = loader()
+                if frame is None:
+                    return None
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                if ttl is not None:
+                    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                                           EXPIRES: str(time.time() + ttl).encode()})
+                self._write(path, table)
+            self._evict(keep=path)
+            return self._read(key, path)
+        finally:
+            key_lock.release()
+            if not os.path.exists(path):
+                # Nothing was stored (a probe, or the loader came back empty), so nothing needs the locks
+                self._drop_locks(path)
+
+    def get_frame(self, key, loader, ttl=None):
+        table = self.get_table(key, loader, ttl)
+        if table is None:
+            return None
+        with self._lock:
+            cached = self._frames.get(key)
+        if cached is None or cached[0] is not table:
+            cached = (table, table.to_pandas())
+            with self._lock:
+                self._frames[key] = cached
+        return cached[1].copy(deep=not _copy_on_write())
+
+    def _forget(self, path):
+        with self._lock:
+            self._tables = {k: t for k, t in self._tables.items() if self._path(k) != path}
+            self._frames = {k: f for k, f in self._frames.items() if self._path(k) != path}
+
+    def _drop_locks(self, path):
+        with self._lock:
+            lock = self._key_locks.get(path)
+            if lock is not None and not lock.locked():
+                del self._key_locks[path]
+        if fcntl is None:
+            return
+        with contextlib.suppress(OSError), open(path + ".lock", "a") as f:
+            # Only remove a lock file nobody holds; a process that opened it just before the unlink
+            # can at worst load the entry once more, never read a half-written one
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            if not os.path.exists(path):
+                os.remove(path + ".lock")
+
+    def invalidate(self, key):
+        path = self._path(key)
+        self._forget(path)
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+        self._drop_locks(path)
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".arrow"):
+                with contextlib.suppress(FileNotFoundError):
+                    st = os.stat(os.path.join(self.directory, name))
+                    entries.append((st.st_mtime, st.st_size, os.path.join(self.directory, name)))
+        return entries
+
+    def _evict(self, keep=None):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            with contextlib.suppress(FileNotFoundError):
+                # Processes that already mapped the file keep reading it after unlink
+                os.remove(path)
+                total -= size
+                with self._lock:
+                    self._stats.evictions += 1
+            self._forget(path)
+            self._drop_locks(path)
+
+    def stats(self):
+        entries = self._entries()
+        with self._lock:
+            return CacheStats(self._stats.hits, self._stats.misses, self._stats.coalesced, self._stats.evictions,
+                              sum(size for _, size, _ in entries), len(entries))
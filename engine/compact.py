@@ -0,0 +1,77 @@
+"""Opt-in compact dtypes for frames moving through the pipeline.
+
+Prices and engineered features are stored as float32, volume as uint32 (int64
+when it does not fit), dates as datetime64 (an int64 epoch array) and
+low-cardinality text such as symbols as categoricals. Models still see
+float64: ``widen`` casts their inputs back at fit and predict time.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+CATEGORY_MAX_RATIO = 0.5  # text columns with at most this share of distinct values become categoricals
+
+
+def memory_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def float64_bytes(df: pd.DataFrame) -> int:
+    """What ``df`` would take uncompacted: numbers as 8-byte values and categoricals as object columns."""
+    total = df.index.memory_usage(deep=True)
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+            total += 8 * len(values)
+        elif isinstance(values.dtype, pd.CategoricalDtype):
+            total += values.astype(object).memory_usage(deep=True, index=False)
+        else:
+            total += values.memory_usage(deep=True, index=False)
+    return int(total)
+
+
+def _integer_dtype(values: pd.Series):
+    if values.isna().any():
+        return None
+    if not (values == np.round(values)).all():
+        return None
+    lo, hi = values.min(), values.max()
+    if lo >= 0 and hi <= np.iinfo(np.uint32).max:
+        return "uint32"
+    return "int64"
+
+
+def compact_column(values: pd.Series) -> pd.Series:
+    dtype = values.dtype
+    if pd.api.types.is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+        return values
+    if pd.api.types.is_integer_dtype(dtype) or (values.name == "Volume" and pd.api.types.is_float_dtype(dtype)):
+        narrow = _integer_dtype(values)
+        if narrow:
+            return values.astype(narrow)
+    if pd.api.types.is_float_dtype(dtype):
+        return values.astype("float32")
+    if values.name == "Date" and not pd.api.types.is_datetime64_any_dtype(dtype):
+        parsed = pd.to_datetime(values, errors="coerce")
+        if parsed.notna().sum() == values.notna().sum():
+            return parsed
+    if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+        if values.nunique(dropna=True) <= CATEGORY_MAX_RATIO * max(len(values), 1):
+            return values.astype("category")
+    return values
+
+
+def compact_frame(df: pd.DataFrame, columns: list[str] | None = None) -> pd.DataFrame:
+    """Return a copy of ``df`` with ``columns`` (default: all) in their compact dtypes."""
+    df = df.copy()
+    for col in df.columns if columns is None else columns:
+        df[col] = compact_column(df[col])
+    return df
+
+
+def widen(X):
+    """Model input as float64, so estimators fit and predict at full precision."""
+    if isinstance(X, pd.DataFrame):
+        return X if (X.dtypes == np.float64).all() else X.astype("float64")
+    return np.asarray(X, dtype="float64")
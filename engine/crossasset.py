@@ -0,0 +1,218 @@
+"""Rolling covariance, correlation and beta across many symbols.
+
+A returns matrix (bars x N symbols) is turned into a time series of N x N
+covariance matrices over a trailing window. Each bar adds its outer product
+``x xᵀ`` and ``x`` to running window sums, and the bar leaving the window
+subtracts its own. A chunk of bars is handled with two cumulative sums: one
+over the bars entering the window, one over the bars leaving it. The cost is
+O(N²) per bar, whatever the window length, with no per-pair rolling calls.
+With ``stride`` k, the k bars between two outputs are summed in one small
+matrix product, so strided output is cheaper still.
+
+Symmetric matrices are stored packed: one float32 row per output bar, holding
+the upper triangle in ``np.triu_indices`` order. For 500 symbols that is
+125,250 values, about 0.5 MB per bar. ``stride`` keeps every k-th bar, and
+``path`` writes the tensor to a memory-mapped ``.npy`` file instead of RAM.
+Sums are accumulated in float64, and outputs are processed in chunks sized so
+the scratch memory stays near ``CHUNK_CELLS`` whatever the universe size.
+``sized_config`` picks the stride, and if need be the file, from the universe
+size so the tensor kept in memory stays under a byte budget.
+
+Bars where a symbol has no return (before listing, holidays on its exchange)
+count as zero-return bars. A symbol is reported only once it has at least
+``min_periods`` observed returns in the window.
+"""
+from __future__ import annotations
+
+import os
+import uuid
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+import pandas as pd
+
+from engine.errors import EmptyDataError
+
+CHUNK_CELLS = 4_000_000  # float64 cells per scratch array (~32 MiB)
+RESIDENT_BYTES = 256 * 2**20  # default budget for a covariance tensor kept in memory
+STRIDES = (1, 5, 21)  # every bar, weekly, monthly on daily bars
+
+
+@dataclass
+class CrossAssetConfig:
+    window: int = 60
+    min_periods: int | None = None  # observed returns a symbol needs in the window; default: the window
+    stride: int = 1  # keep every k-th bar of the output (5 ~ weekly on daily bars)
+    benchmark: str | None = None  # symbol to compute betas against
+    path: str | None = None  # write the packed covariance tensor to this .npy file (memory-mapped)
+
+
+@dataclass
+class CrossAssetResult:
+    dates: pd.Index  # one per output bar
+    symbols: list
+    covariance: np.ndarray  # (bars, N (N + 1) / 2) float32, packed upper triangles; NaN where not enough data
+    average_correlation: pd.Series  # mean pairwise correlation per bar: a one-line summary of co-movement
+    betas: pd.DataFrame | None = None  # (bars, N) against config.benchmark
+    config: CrossAssetConfig = field(default_factory=CrossAssetConfig)
+
+    def __post_init__(self):
+        n = len(self.symbols)
+        self._rows, self._cols = np.triu_indices(n)
+        self._position = np.empty((n, n), dtype=np.int64)
+        self._position[self._rows, self._cols] = np.arange(len(self._rows))
+        self._position[self._cols, self._rows] = np.arange(len(self._rows))
+
+    def _at(self, date) -> int:
+        return int(self.dates.get_indexer([date], method="pad")[0]) if not isinstance(date, (int, np.integer)) else int(date)
+
+    def covariance_matrix(self, date) -> pd.DataFrame:
+        """N x N covariance at ``date`` (the last output bar on or before it) or at an integer bar position."""
+        packed = np.asarray(self.covariance[self._at(date)], dtype="float64")
+        return pd.DataFrame(packed[self._position], index=self.symbols, columns=self.symbols)
+
+    def correlation_matrix(self, date) -> pd.DataFrame:
+        cov = self.covariance_matrix(date)
+        sd = np.sqrt(np.diag(cov.to_numpy()))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return cov / np.outer(sd, sd)
+
+    def pair(self, a: str, b: str) -> pd.DataFrame:
+        """Covariance, correlation and beta of ``a`` on ``b`` over time."""
+        i, j = self.symbols.index(a), self.symbols.index(b)
+        p = self._position
+        cov, var_a, var_b = (np.asarray(self.covariance[:, k], dtype="float64") for k in (p[i, j], p[i, i], p[j, j]))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return pd.DataFrame({"covariance": cov, "correlation": cov / np.sqrt(var_a * var_b), "beta": cov / var_b},
+                                index=self.dates)
+
+    def portfolio_volatility(self, weights) -> pd.Series:
+        """Per-bar volatility of a fixed-weight portfolio: sqrt(wᵀ Σ_t w) for every bar in one product."""
+        w = np.asarray(weights.reindex(self.symbols).fillna(0.0) if isinstance(weights, pd.Series) else weights,
+                       dtype="float64")
+        # Off-diagonal pairs appear twice in the full quadratic form
+        packed = w[self._rows] * w[self._cols] * np.where(self._rows == self._cols, 1.0, 2.0)
+        held = packed != 0
+        variance = np.asarray(self.covariance[:, held], dtype="float64") @ packed[held]
+        return pd.Series(np.sqrt(np.maximum(variance, 0.0)), index=self.dates, name="volatility")
+
+
+def returns_matrix(universe: dict, price_column: str = "Close", date_column: str = "Date") -> pd.DataFrame:
+    """Simple returns per symbol on the union of all dates: symbol -> DatasetHandle or DataFrame."""
+    from engine.datasets import materialize
+    columns = {}
+    for symbol, value in universe.items():
+        df = materialize(value, [c for c in (date_column, price_column)])
+        prices = pd.to_numeric(df[price_column], errors="coerce")
+        prices.index = pd.to_datetime(df[date_column], errors="coerce", utc=True).dt.tz_localize(None)
+        prices = prices[prices.index.notna()].groupby(level=0).last().sort_index()
+        columns[symbol] = prices.pct_change(fill_method=None).astype("float32")
+    if not columns:
+        raise EmptyDataError("Cross-asset analytics need at least one symbol")
+    return pd.DataFrame(columns).sort_index()
+
+
+def tensor_bytes(n_symbols: int, bars: int, window: int, stride: int = 1) -> int:
+    """Size of the packed float32 covariance tensor for ``bars`` bars of ``n_symbols`` returns."""
+    outputs = -(-max(bars - max(window, 2) + 1, 0) // max(stride, 1))
+    return outputs * (n_symbols * (n_symbols + 1) // 2) * 4
+
+
+def sized_config(config: CrossAssetConfig, n_symbols: int, bars: int, max_bytes: int = RESIDENT_BYTES,
+                 directory: str | None = None) -> CrossAssetConfig:
+    """The finest stride in ``STRIDES`` (no finer than ``config.stride``) whose tensor fits in ``max_bytes``.
+
+    When even the coarsest does not fit, the tensor is memory-mapped to a new
+    ``.npy`` file under ``directory`` (kept in memory if it is None).
+    """
+    for stride in STRIDES:
+        if stride >= config.stride and tensor_bytes(n_symbols, bars, config.window, stride) <= max_bytes:
+            return replace(config, stride=stride)
+    stride = max(config.stride, STRIDES[-1])
+    if directory is None:
+        return replace(config, stride=stride)
+    # A fresh name per run, so a tensor another session has mapped is never overwritten
+    return replace(config, stride=stride, path=os.path.join(directory, f"crossasset-{uuid.uuid4().hex}.npy"))
+
+
+def _block_sums(entering, leaving):
+    # Σ x xᵀ over the bars entering minus the bars leaving, for a batch of blocks: one batched matmul
+    stacked = np.concatenate([entering, leaving], axis=1)
+    signed = np.concatenate([entering, -leaving], axis=1)
+    return np.matmul(stacked.transpose(0, 2, 1), signed), entering.sum(axis=1) - leaving.sum(axis=1)
+
+
+def rolling_covariance(returns: pd.DataFrame, config: CrossAssetConfig = CrossAssetConfig()) -> CrossAssetResult:
+    if returns.shape[1] == 0 or len(returns) < 2:
+        raise EmptyDataError("Cross-asset analytics need returns for at least one symbol over two bars")
+    if config.benchmark is not None and config.benchmark not in returns.columns:
+        raise ValueError(f"Benchmark {config.benchmark!r} is not in the universe")
+    symbols = [str(c) for c in returns.columns]
+    values = returns.to_numpy(dtype="float64")
+    observed = np.isfinite(values)
+    X = np.where(observed, values, 0.0)
+    T, n = X.shape
+    w, stride = max(int(config.window), 2), max(int(config.stride), 1)
+    if T < w:
+        raise EmptyDataError(f"Cross-asset analytics need at least {w} bars for a {w}-bar window")
+    min_periods = config.min_periods or w
+    rows, cols = np.triu_indices(n)
+    P = len(rows)
+
+    # Observed returns per symbol in each window, from one cumulative sum over the (small) mask
+    counts = np.cumsum(observed, axis=0)
+    counts[w:] -= counts[:-w].copy()
+    keep = np.arange(w - 1, T, stride)
+    if config.path:
+        covariance = np.lib.format.open_memmap(config.path, mode="w+", dtype=np.float32, shape=(len(keep), P))
+    else:
+        covariance = np.empty((len(keep), P), dtype=np.float32)
+    average = np.full(len(keep), np.nan)
+
+    # Window sums at the first output bar, then one block of `stride` bars per later output: the bars after
+    # the previous output enter, the same bars w earlier leave. Both are plain reshapes of X, never copies.
+    sxx, sx = X[:w].T @ X[:w], X[:w].sum(axis=0)
+    blocks = len(keep) - 1
+    entering = X[w:w + blocks * stride].reshape(blocks, stride, n)
+    leaving = X[:blocks * stride].reshape(blocks, stride, n)
+    step = max(1, CHUNK_CELLS // (n * n + P))
+    for first in range(0, len(keep), step):
+        last = min(first + step, len(keep))
+        # Output k's sums are the first window's plus blocks 0..k-1
+        dxx, dx = _block_sums(entering[max(first - 1, 0):last - 1], leaving[max(first - 1, 0):last - 1])
+        if first == 0:
+            dxx = np.concatenate([np.zeros((1, n, n)), dxx])
+            dx = np.concatenate([np.zeros((1, n)), dx])
+        dxx = np.cumsum(dxx, axis=0, out=dxx)
+        dxx += sxx
+        dx = np.cumsum(dx, axis=0) + sx
+        sxx, sx = dxx[-1].copy(), dx[-1].copy()
+        # Full matrices in place (broadcasting is cheaper than gathering pairs), packed only for storage
+        dxx -= dx[:, :, None] * dx[:, None, :] / w
+        dxx /= w - 1
+        valid = counts[keep[first:last]] >= min_periods
+        sd = np.sqrt(np.maximum(np.diagonal(dxx, axis1=1, axis2=2), 0.0))
+        scale = np.where(valid & (sd > 0), 1 / np.where(sd > 0, sd, 1), 0.0)
+        # Mean off-diagonal correlation = (dᵀ C d - k) / (k (k - 1)) with d = 1 / sd over the k usable symbols
+        k = (scale > 0).sum(axis=1)
+        quadratic = np.einsum("bi,bi->b", np.matmul(dxx, scale[:, :, None])[:, :, 0], scale)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            average[first:last] = np.where(k > 1, (quadratic - k) / (k * (k - 1)), np.nan)
+        cov = dxx[:, rows, cols]
+        if not valid.all():
+            cov[~(valid[:, rows] & valid[:, cols])] = np.nan
+        covariance[first:last] = cov
+    if isinstance(covariance, np.memmap):
+        covariance.flush()
+
+    dates = returns.index[keep]
+    result = CrossAssetResult(dates, symbols, covariance, pd.Series(average, index=dates, name="average_correlation"),
+                              config=config)
+    if config.benchmark is not None:
+        b = symbols.index(config.benchmark)
+        position = result._position
+        cov = np.asarray(covariance[:, position[:, b]], dtype="float64")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result.betas = pd.DataFrame(cov / cov[:, [b]], index=dates, columns=symbols)
+    return result
+
@@ -0,0 +1,99 @@
+"""Data acquisition and cleaning: uploads, Yahoo Finance history and synthetic OHLCV."""
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from engine.errors import DataFetchError, EmptyDataError, JobCancelled
+
+OHLCV_COLUMNS = ["Date", "Open", "High", "Low", "Close", "Volume"]
+
+
+@dataclass
+class CleanResult:
+    df: pd.DataFrame
+    warnings: list[str] = field(default_factory=list)
+
+
+def clean_numeric_columns(df: pd.DataFrame) -> CleanResult:
+    warnings = []
+    for col in df.columns:
+        if df[col].dtype == 'object':
+            try:
+                df[col] = pd.to_numeric(df[col].astype(str).str.replace(r'[^\d.]', '', regex=True), errors='coerce')
+            except Exception as e:
+                warnings.append(f"Could not convert {col} to numeric: {e}")
+    return CleanResult(df, warnings)
+
+
+def read_table(file, name: str) -> pd.DataFrame:
+    return pd.read_csv(file) if name.endswith('.csv') else pd.read_excel(file)
+
+
+def fetch_ohlcv(symbol: str, start_date: str, end_date: str, job=None, interval: str = "1d") -> pd.DataFrame:
+    """OHLCV history (daily unless ``interval`` says otherwise); with an ``engine.jobs.Job``, retries back off on
+    the job and report progress to it. Intraday ranges longer than one request allows go through
+    ``engine.intraday.fetch_bars``."""
+    import yfinance as yf
+    from tenacity import retry, retry_if_exception_message, stop_after_attempt, wait_exponential
+
+    def before_sleep(state):
+        job.report(0.1 + 0.2 * state.attempt_number,
+                   f"Rate limited; retry {state.attempt_number} of 2 in {state.next_action.sleep:.0f}s")
+
+    hooks = {"sleep": job.sleep, "before_sleep": before_sleep} if job is not None else {}
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10),
+           retry=retry_if_exception_message(match='Too Many Requests'), reraise=True, **hooks)
+    def fetch():
+        if job is not None:
+            job.check()
+            job.report(message=f"Downloading {symbol}")
+        return yf.Ticker(symbol).history(start=start_date, end=end_date, interval=interval)
+
+    try:
+        df = fetch()
+    except JobCancelled:
+        raise
+    except Exception as e:
+        raise DataFetchError(f"Error fetching data: {e}") from e
+    if df.empty:
+        raise EmptyDataError(f"No data for {symbol}. Try AAPL, TSLA, MSFT.")
+    # Intraday bars come back indexed by "Datetime" rather than "Date"
+    df = df.reset_index()
+    return df.rename(columns={df.columns[0]: "Date"})[OHLCV_COLUMNS]
+
+
+def synthetic_ohlcv(n_rows: int, n_extra: int = 0, seed: int = 0, freq: str = "min",
+                    start: str = "2000-01-03") -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_rows)))
+    spread = np.abs(rng.normal(0, 0.005, n_rows))
+    df = pd.DataFrame({
+        "Date": pd.date_range(start, periods=n_rows, freq=freq),
+        "Open": close * (1 + rng.normal(0, 0.002, n_rows)),
+        "High": close * (1 + spread),
+        "Low": close * (1 - spread),
+        "Close": close,
+        "Volume": rng.integers(100_000, 5_000_000, n_rows).astype("float64"),
+    })
+    if n_extra:
+        extra = {f"Indicator_{i}": np.cumsum(rng.normal(0, 1, n_rows)) for i in range(n_extra)}
+        df = pd.concat([df, pd.DataFrame(extra, index=df.index)], axis=1)
+    # Sprinkle gaps so the fill stage has work to do
+    holes = rng.random(n_rows) < 0.001
+    df.loc[holes, "Volume"] = np.nan
+    return df
+
+
+def synthetic_history(symbol: str, start_date: str, end_date: str, job=None) -> pd.DataFrame:
+    """Offline stand-in for ``fetch_ohlcv``: deterministic daily bars per symbol over business days."""
+    days = pd.bdate_range(start_date, end_date, inclusive="left")
+    if days.empty:
+        raise EmptyDataError(f"No data for {symbol}. Try AAPL, TSLA, MSFT.")
+    seed = int(hashlib.sha1(symbol.encode("utf-8")).hexdigest()[:8], 16)
+    df = synthetic_ohlcv(len(days), seed=seed, freq="B", start=days[0])
+    return df[OHLCV_COLUMNS]
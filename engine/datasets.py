@@ -0,0 +1,156 @@
+"""Immutable, memory-mapped Arrow datasets shared by every session.
+
+Sessions keep a small ``DatasetHandle`` instead of a DataFrame. The data itself
+lives once on local disk as an uncompressed Arrow IPC file named by content
+hash, so identical frames from any number of sessions share one file and one
+set of page-cache pages. Columns are materialised into pandas only when a step
+asks for them.
+
+Every ``put`` prunes the directory: files unused for a day go, and so do the
+least recently used ones while the store is over ``max_bytes``. Reads refresh a
+file's modification time, so files that sessions still read count as used.
+``.npy`` tensors written into the directory (``crossasset.sized_config``) count
+toward the cap and are pruned the same way.
+"""
+from __future__ import annotations
+
+import contextlib
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+from engine.errors import EmptyDataError
+from engine.export import fingerprint
+
+MAX_BYTES = 2 * 2**30  # default size cap of the store's files
+MAX_AGE_SECONDS = 24 * 3600
+TOUCH_SECONDS = 60  # a read refreshes its file's mtime at most this often
+
+
+def default_directory():
+    return os.environ.get("MARKET_MASTER_DATA_DIR") or os.path.join(tempfile.gettempdir(), "market_master_datasets")
+
+
+_maps = {}
+_touched = {}
+_maps_lock = threading.Lock()
+
+
+def _forget(path):
+    with _maps_lock:
+        _maps.pop(path, None)
+        _touched.pop(path, None)
+
+
+def _open(path):
+    import pyarrow as pa
+    now = time.time()
+    with _maps_lock:
+        table = _maps.get(path)
+        touch = now - _touched.get(path, 0.0) > TOUCH_SECONDS
+        if touch:
+            _touched[path] = now
+    try:
+        if touch:
+            # Marks the file as in use for the least-recently-used pruning of every process sharing the store
+            os.utime(path)
+        if table is None:
+            table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+            with _maps_lock:
+                _maps[path] = table
+    except FileNotFoundError:
+        _forget(path)
+        raise EmptyDataError("This dataset was pruned from the local store; load the data again.") from None
+    return table
+
+
+@dataclass(frozen=True)
+class DatasetHandle:
+    path: str
+    fingerprint: str
+    columns: tuple
+    n_rows: int
+    nbytes: int
+
+    def table(self):
+        return _open(self.path)
+
+    def to_pandas(self, columns=None):
+        table = self.table()
+        if columns is not None:
+            index_cols = [c for c in table.column_names if c.startswith("__index_level_")]
+            table = table.select(list(dict.fromkeys(list(columns) + index_cols)))
+        return table.to_pandas()
+
+    def __len__(self):
+        return self.n_rows
+
+
+class DatasetStore:
+    def __init__(self, directory=None, max_bytes: int | None = MAX_BYTES, max_age_seconds: float = MAX_AGE_SECONDS):
+        self.directory = directory or default_directory()
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        os.makedirs(self.directory, exist_ok=True)
+
+    def put(self, df: pd.DataFrame) -> DatasetHandle:
+        import pyarrow as pa
+        digest = fingerprint(df.reset_index())
+        path = os.path.join(self.directory, f"{digest}.arrow")
+        if os.path.exists(path):
+            os.utime(path)
+        else:
+            table = pa.Table.from_pandas(df, preserve_index=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            os.close(fd)
+            try:
+                # Uncompressed, so readers can map the buffers without decoding
+                with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+                os.replace(tmp, path)
+            finally:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(tmp)
+        handle = DatasetHandle(path, digest, tuple(map(str, df.columns)), len(df), os.path.getsize(path))
+        self.prune(self.max_age_seconds, keep=(handle,), max_bytes=self.max_bytes)
+        return handle
+
+    def prune(self, max_age_seconds=MAX_AGE_SECONDS, keep=(), max_bytes=None):
+        """Remove files unused for ``max_age_seconds``, then the least recently used while over ``max_bytes``."""
+        keep = {h.path for h in keep}
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith((".arrow", ".npy")):
+                path = os.path.join(self.directory, name)
+                with contextlib.suppress(FileNotFoundError):
+                    stat = os.stat(path)
+                    files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        # Puts and reads touch their files, so the oldest mtime is the least recently used
+        for mtime, size, path in sorted(files):
+            if path in keep:
+                continue
+            if mtime >= cutoff and (max_bytes is None or total <= max_bytes):
+                break
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+                removed += 1
+            total -= size
+            # Drop this process's mapping too; without it the pages would stay mapped for the process's lifetime
+            _forget(path)
+        return removed
+
+
+def materialize(value, columns=None):
+    """Return a DataFrame for either a handle or a plain DataFrame (always a private copy)."""
+    if isinstance(value, DatasetHandle):
+        return value.to_pandas(columns)
+    if value is None:
+        return None
+    return (value[list(columns)] if columns is not None else value).copy()
@@ -0,0 +1,24 @@
+"""Exceptions raised by the compute engine; the UI maps them to themed messages."""
+
+
+class PipelineError(Exception):
+    pass
+
+
+class DataFetchError(PipelineError):
+    pass
+
+
+class EmptyDataError(DataFetchError):
+    pass
+
+
+class JobCancelled(PipelineError):
+    pass
+
+
+class ModelSelectionError(PipelineError):
+    # code is one of "linear_needs_continuous", "logistic_needs_categorical"
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
@@ -0,0 +1,137 @@
+"""Results export: one combined file per run in Parquet, Arrow IPC or (compressed) CSV.
+
+Files are encoded chunk by chunk straight to disk and cached under a fingerprint
+of the results frame, so asking for the same export twice reuses the first file.
+Each new file prunes the cache directory: files unused for a day go first, then
+the least recently used while the directory is over its size cap.
+"""
+from __future__ import annotations
+
+import contextlib
+import gzip
+import hashlib
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+CHUNK_ROWS = 100_000
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "market_master_exports")
+MAX_BYTES = 1 * 2**30
+MAX_AGE_SECONDS = 24 * 3600
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    label: str
+    extension: str
+    mime: str
+
+
+FORMATS = {
+    "parquet": ExportFormat("Parquet", ".parquet", "application/vnd.apache.parquet"),
+    "arrow": ExportFormat("Arrow IPC", ".arrow", "application/vnd.apache.arrow.file"),
+    "csv.gz": ExportFormat("CSV (gzip)", ".csv.gz", "application/gzip"),
+    "csv": ExportFormat("CSV", ".csv", "text/csv"),
+}
+
+
+def combined_results(df_features: pd.DataFrame, features: list[str], y_test: pd.Series, y_preds: dict,
+                     actual_label: str = "Actual", predicted_label: str = "Predicted ({model})") -> pd.DataFrame:
+    # Rows follow the test split; Date and features come from the engineered frame by index
+    source = df_features.loc[y_test.index]
+    out = pd.DataFrame(index=y_test.index)
+    if 'Date' in source.columns:
+        out['Date'] = source['Date']
+    for col in features:
+        out[col] = source[col]
+    out[actual_label] = y_test
+    for model_type, yp in y_preds.items():
+        label = "Cluster (K-Means)" if model_type == "K-Means Clustering" else predicted_label.format(model=model_type)
+        out[label] = yp
+    return out.sort_index().reset_index(drop=True)
+
+
+def fingerprint(frame: pd.DataFrame) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update("\x1f".join(map(str, frame.columns)).encode("utf-8"))
+    # Equal values hash alike whatever their width, so int64 and uint32 copies would otherwise collide
+    h.update("\x1f".join(map(str, frame.dtypes)).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _chunks(frame, chunk_rows):
+    for start in range(0, max(len(frame), 1), chunk_rows):
+        yield start, frame.iloc[start:start + chunk_rows]
+
+
+def write(frame: pd.DataFrame, fmt: str, path: str, chunk_rows: int = CHUNK_ROWS) -> str:
+    if fmt in ("parquet", "arrow"):
+        import pyarrow as pa
+        schema = pa.Schema.from_pandas(frame, preserve_index=False)
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            writer = pq.ParquetWriter(path, schema, compression="zstd")
+        else:
+            writer = pa.ipc.new_file(path, schema, options=pa.ipc.IpcWriteOptions(compression="zstd"))
+        with writer:
+            for _, chunk in _chunks(frame, chunk_rows):
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    elif fmt in ("csv", "csv.gz"):
+        opener = gzip.open if fmt == "csv.gz" else open
+        with opener(path, "wt", encoding="utf-8", newline="") as f:
+            for start, chunk in _chunks(frame, chunk_rows):
+                chunk.to_csv(f, index=False, header=start == 0)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return path
+
+
+def prune(cache_dir: str = CACHE_DIR, max_bytes: int | None = MAX_BYTES, max_age_seconds: float = MAX_AGE_SECONDS,
+          keep=()) -> int:
+    """Remove exports unused for ``max_age_seconds``, then the least recently used while over ``max_bytes``."""
+    extensions = tuple(f.extension for f in FORMATS.values())
+    files = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(extensions):
+            path = os.path.join(cache_dir, name)
+            with contextlib.suppress(FileNotFoundError):
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in files)
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    # Every export request touches its file, so the oldest mtime is the least recently used
+    for mtime, size, path in sorted(files):
+        if path in keep:
+            continue
+        if mtime >= cutoff and (max_bytes is None or total <= max_bytes):
+            break
+        with contextlib.suppress(FileNotFoundError):
+            # A download already reading the file keeps its handle after the unlink
+            os.remove(path)
+            total -= size
+            removed += 1
+    return removed
+
+
+def export_file(frame: pd.DataFrame, fmt: str, cache_dir: str = CACHE_DIR, max_bytes: int | None = MAX_BYTES) -> str:
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{fingerprint(frame)}{FORMATS[fmt].extension}")
+    if os.path.exists(path):
+        os.utime(path)
+    else:
+        # Write under a temporary name so a concurrent reader never sees a half-written file
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=FORMATS[fmt].extension)
+        os.close(fd)
+        try:
+            write(frame, fmt, tmp)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        prune(cache_dir, max_bytes, keep=(path,))
+    return path
@@ -0,0 +1,158 @@
+"""Multi-horizon direct forecasting.
+
+Future targets for every horizon are built at once from a strided view of the
+price series: a ``(rows, H + 1)`` window per row gives the return to t+1..t+H
+without a Python loop per horizon. Up/down labels are the sign of those
+returns. Rows whose horizon runs past the end of the data get NaN.
+
+``forecast_horizons`` trains one direct model per horizon in parallel:
+- LinearRegression on returns;
+- LogisticRegression on direction.
+The split is chronological and purged. Each model trains on the rows before
+the test block, minus the last ``h`` rows, whose future returns would overlap
+the test period. It then reports how skill decays as the horizon grows.
+"""
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from engine.compact import widen
+from engine.errors import EmptyDataError
+
+KINDS = ("return", "direction")
+RETURN_PREFIX, DIRECTION_PREFIX = "Return_t+", "Up_t+"
+
+
+def return_column(h: int) -> str:
+    return f"{RETURN_PREFIX}{h}"
+
+
+def direction_column(h: int) -> str:
+    return f"{DIRECTION_PREFIX}{h}"
+
+
+def is_target_column(name) -> bool:
+    """Future targets must never be offered as features."""
+    return str(name).startswith((RETURN_PREFIX, DIRECTION_PREFIX))
+
+
+def target_horizon(name) -> int:
+    """How many bars ahead a future target looks (``Return_t+5`` -> 5); 0 for any other column."""
+    if not is_target_column(name):
+        return 0
+    suffix = str(name).rpartition("+")[2]
+    return int(suffix) if suffix.isdigit() else 0
+
+
+def forward_returns(prices, horizons) -> np.ndarray:
+    """Returns from t to t+h for each h in ``horizons``: shape (rows, len(horizons)), NaN past the end."""
+    prices = np.asarray(prices, dtype="float64")
+    horizons = np.asarray(horizons, dtype=np.int64)
+    out = np.full((len(prices), len(horizons)), np.nan)
+    H = int(horizons.max()) if len(horizons) else 0
+    if H == 0 or len(prices) <= 1:
+        return out
+    # Pad the tail so every row has a full window; padded prices are NaN and give NaN returns
+    padded = np.concatenate([prices, np.full(H, np.nan)])
+    windows = np.lib.stride_tricks.sliding_window_view(padded, H + 1)[:len(prices)]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[:] = windows[:, horizons] / windows[:, :1] - 1
+    return out
+
+
+def add_targets(df: pd.DataFrame, max_horizon: int, price_column: str = "Close") -> tuple[pd.DataFrame, list[str]]:
+    """Append ``Return_t+h`` and ``Up_t+h`` for h = 1..max_horizon; returns the frame and the added columns."""
+    if max_horizon < 1 or price_column not in df.columns:
+        return df, []
+    horizons = np.arange(1, max_horizon + 1)
+    returns = forward_returns(df[price_column], horizons)
+    up = np.where(np.isnan(returns), np.nan, (returns > 0).astype("float64"))
+    targets = pd.DataFrame(np.hstack([returns, up]), index=df.index,
+                           columns=[return_column(h) for h in horizons] + [direction_column(h) for h in horizons])
+    return pd.concat([df, targets], axis=1), list(targets.columns)
+
+
+@dataclass
+class HorizonConfig:
+    horizons: tuple = tuple(range(1, 11))
+    kind: str = "return"  # return: LinearRegression on returns; direction: LogisticRegression on up/down
+    test_size: float = 0.2  # the last share of rows, in time order
+    workers: int | None = None
+
+
+@dataclass
+class HorizonResult:
+    scores: pd.DataFrame  # one row per horizon
+    models: dict = field(default_factory=dict)  # horizon -> fitted model
+    predictions: pd.DataFrame | None = None  # test-block predictions, one column per horizon
+
+
+def _fit_horizon(X, target, h, cut, kind):
+    from sklearn.linear_model import LinearRegression, LogisticRegression
+    from sklearn.metrics import accuracy_score, r2_score, roc_auc_score
+    train = np.zeros(len(X), dtype=bool)
+    train[:max(cut - h, 0)] = True
+    train &= ~np.isnan(target)
+    test = np.zeros(len(X), dtype=bool)
+    test[cut:] = True
+    test &= ~np.isnan(target)
+    if train.sum() < 2 or test.sum() < 2:
+        return {"horizon": h, "train_rows": int(train.sum()), "test_rows": int(test.sum())}, None, None
+    y_train, y_test = target[train], target[test]
+    row = {"horizon": h, "train_rows": int(train.sum()), "test_rows": int(test.sum())}
+    if kind == "direction":
+        if len(np.unique(y_train)) < 2:
+            return row, None, None
+        model = LogisticRegression(max_iter=1000).fit(X[train], y_train)
+        proba = model.predict_proba(X[test])[:, 1]
+        pred = (proba > 0.5).astype("float64")
+        base = max(y_test.mean(), 1 - y_test.mean())
+        row.update({"accuracy": accuracy_score(y_test, pred), "base_rate": base,
+                    "auc": roc_auc_score(y_test, proba) if len(np.unique(y_test)) > 1 else np.nan})
+        row["skill"] = row["accuracy"] - base
+        return row, model, proba
+    model = LinearRegression().fit(X[train], y_train)
+    pred = model.predict(X[test])
+    row.update({"rmse": float(np.sqrt(np.mean((y_test - pred) ** 2))), "r2": r2_score(y_test, pred),
+                "hit_rate": float(np.mean(np.sign(pred) == np.sign(y_test))),
+                "ic": float(np.corrcoef(pred, y_test)[0, 1]) if pred.std() > 0 and y_test.std() > 0 else np.nan})
+    row["skill"] = row["r2"]
+    return row, model, pred
+
+
+def forecast_horizons(df: pd.DataFrame, features: list[str], config: HorizonConfig = HorizonConfig(),
+                      price_column: str = "Close", prices=None) -> HorizonResult:
+    """One direct model per horizon.
+
+    ``prices`` (default: ``df[price_column]``, aligned on the index) gives the
+    future returns to forecast. Pass the unscaled prices when the frame's
+    columns were standardised.
+    """
+    if config.kind not in KINDS:
+        raise ValueError(f"Unknown kind {config.kind!r}; expected one of {', '.join(KINDS)}")
+    if prices is None:
+        if price_column not in df.columns:
+            raise EmptyDataError(f"Multi-horizon forecasting needs a {price_column} column")
+        prices = df[price_column]
+    data = df[list(dict.fromkeys(features))].dropna(subset=features)
+    if len(data) < 10:
+        raise EmptyDataError("Not enough rows with all features present to forecast")
+    horizons = sorted({int(h) for h in config.horizons if int(h) >= 1})
+    returns = forward_returns(pd.Series(prices).reindex(data.index), horizons)
+    targets = returns if config.kind == "return" else np.where(np.isnan(returns), np.nan, (returns > 0).astype("float64"))
+    X = np.asarray(widen(data[features]))
+    cut = int(round(len(data) * (1 - config.test_size)))
+    workers = min(config.workers or os.cpu_count() or 1, len(horizons))
+    jobs = [(h, targets[:, i]) for i, h in enumerate(horizons)]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="market-master-horizon") as pool:
+        outcomes = list(pool.map(lambda job: _fit_horizon(X, job[1], job[0], cut, config.kind), jobs))
+    scores = pd.DataFrame([row for row, _, _ in outcomes])
+    models = {h: model for (row, model, _), h in zip(outcomes, horizons) if model is not None}
+    predictions = pd.DataFrame({h: pd.Series(pred, index=data.index[cut:][~np.isnan(targets[cut:, i])])
+                                for i, (h, (_, _, pred)) in enumerate(zip(horizons, outcomes)) if pred is not None})
+    return HorizonResult(scores, models, predictions)
@@ -0,0 +1,212 @@
+"""Intraday bars: windowed parallel downloads and OHLCV resampling.
+
+Yahoo serves intraday history in short pieces. Each request may cover only a
+few days (``Interval.window``), and only the last ``Interval.lookback`` days
+are kept at all. ``fetch_bars`` clips a range to the lookback, splits it into
+request-sized windows and downloads them on a thread pool. The pieces are then
+concatenated, sorted and de-duplicated, because neighbouring windows can both
+return the bar on their shared boundary.
+
+``resample`` turns fine bars into any coarser bar size without going back to
+the network. Each bar gets the label of the bin it falls in: fixed sizes
+(``"5min"``, ``"1h"``, ``"D"``) floor the wall-clock time from midnight of the
+first day, as ``DataFrame.resample`` does, and calendar periods (``"W"``,
+``"M"``, ``"Q"``) use the start of their period. Bins are contiguous runs of
+one sorted array, so every column aggregates in a single ``reduceat`` pass
+with no groupby. Empty bins (nights, weekends) produce no bar.
+"""
+from __future__ import annotations
+
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from engine.data import OHLCV_COLUMNS, fetch_ohlcv, synthetic_history
+from engine.errors import EmptyDataError
+
+
+@dataclass(frozen=True)
+class Interval:
+    step: str  # bar size as a pandas offset
+    window: int  # days one request may cover
+    lookback: int  # days of history the provider keeps
+
+
+# Yahoo's limits per bar size
+INTERVALS = {
+    "1m": Interval("1min", 7, 30),
+    "2m": Interval("2min", 60, 60),
+    "5m": Interval("5min", 60, 60),
+    "15m": Interval("15min", 60, 60),
+    "30m": Interval("30min", 60, 60),
+    "1h": Interval("1h", 730, 730),
+}
+# Bar sizes resample can build, finest first; asking for one finer than the data returns the bars unchanged
+BAR_SIZES = {"5m": "5min", "15m": "15min", "30m": "30min", "1h": "1h", "4h": "4h", "1d": "D", "1wk": "W", "1mo": "M"}
+SESSION = ("09:30", "16:00", "America/New_York")  # regular session of the synthetic feed
+
+
+def windows(start_date, end_date, interval: str, now=None, clip: bool = True) -> list[tuple[pd.Timestamp, pd.Timestamp]]:
+    """Request-sized ``[start, end)`` windows covering the range; ``clip`` drops days older than the lookback."""
+    spec = INTERVALS[interval]
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    if clip:
+        now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+        # One day of slack: the provider counts the lookback from its own clock
+        start = max(start, (now - pd.Timedelta(days=spec.lookback - 1)).normalize())
+    if start >= end:
+        return []
+    edges = list(pd.date_range(start, end, freq=f"{spec.window}D")) + [end]
+    return [(a, b) for a, b in zip(edges[:-1], edges[1:]) if a < b]
+
+
+def fetch_bars(symbol: str, start_date, end_date, interval: str = "5m", job=None, fetch=fetch_ohlcv,
+               workers: int = 4, clip: bool = True) -> pd.DataFrame:
+    """Intraday OHLCV for the range, downloaded window by window on ``workers`` threads.
+
+    ``fetch`` has the signature of ``engine.fetch_ohlcv``. A window without
+    bars (a holiday week) is skipped; the range fails only if none has any.
+    """
+    if interval not in INTERVALS:
+        raise ValueError(f"Unknown interval {interval!r}; choose one of {', '.join(INTERVALS)}")
+    spans = windows(start_date, end_date, interval, clip=clip)
+    if not spans:
+        raise EmptyDataError(f"Yahoo keeps {interval} bars for the last {INTERVALS[interval].lookback} days only; "
+                             f"move the start date forward.")
+
+    def load(span):
+        if job is not None:
+            job.check()
+        return fetch(symbol, span[0].strftime("%Y-%m-%d"), span[1].strftime("%Y-%m-%d"), job=job, interval=interval)
+
+    pieces, empty = [], 0
+    # Downloads wait on the network, so threads are enough
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(spans))), thread_name_prefix="market-master-bars") as pool:
+        futures = [pool.submit(load, span) for span in spans]
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                try:
+                    pieces.append(future.result())
+                except EmptyDataError:
+                    empty += 1
+                if job is not None:
+                    job.report(0.9 * done / len(spans), f"Downloaded {done} of {len(spans)} windows of {symbol}")
+        finally:
+            for future in futures:
+                future.cancel()
+    if not pieces:
+        raise EmptyDataError(f"No {interval} data for {symbol} in this range. Try AAPL, TSLA, MSFT.")
+    df = pd.concat(pieces, ignore_index=True)
+    # Windows share their boundary bar; the later download wins
+    df = df.drop_duplicates("Date", keep="last").sort_values("Date", kind="stable")
+    return df.reset_index(drop=True)
+
+
+def synthetic_bars(symbol: str, start_date: str, end_date: str, job=None, interval: str = "5m") -> pd.DataFrame:
+    """Offline stand-in for ``fetch_ohlcv`` at an intraday interval.
+
+    Bars cover the regular session on business days. Each day's path is a
+    Brownian bridge from the previous to the current close of
+    ``synthetic_history``, seeded by symbol and day. Any window of the same
+    symbol therefore returns the same bars, and daily resamples track the
+    daily feed.
+    """
+    if interval not in INTERVALS:
+        raise ValueError(f"Unknown interval {interval!r}; choose one of {', '.join(INTERVALS)}")
+    days = pd.bdate_range(start_date, end_date, inclusive="left")
+    if days.empty:
+        raise EmptyDataError(f"No data for {symbol}. Try AAPL, TSLA, MSFT.")
+    daily = synthetic_history(symbol, min(pd.Timestamp("2000-01-03"), days[0] - pd.offsets.BDay()), days[-1] + pd.Timedelta(days=1))
+    closes = daily.set_index("Date")["Close"].reindex(days).to_numpy()
+    previous = daily.set_index("Date")["Close"].shift(1).reindex(days).to_numpy()
+
+    opening, closing, tz = SESSION
+    step = pd.Timedelta(INTERVALS[interval].step)
+    session = pd.Timedelta(closing + ":00") - pd.Timedelta(opening + ":00")
+    n = int(np.ceil(session / step))
+    seeds = [int(hashlib.sha1(f"{symbol}:{d.date()}:{interval}".encode("utf-8")).hexdigest()[:8], 16) for d in days]
+    noise = np.stack([np.random.default_rng(seed).normal(0, 0.002, 3 * n) for seed in seeds]).reshape(len(days), 3, n)
+    walk = np.cumsum(noise[:, 0], axis=1)
+    t = np.arange(1, n + 1) / n
+    bridge = walk - t * walk[:, -1:]
+    log_close = np.log(previous)[:, None] + t * np.log(closes / previous)[:, None] + bridge
+    close = np.exp(log_close)
+    open_ = np.concatenate([previous[:, None], close[:, :-1]], axis=1)
+    spread = np.abs(noise[:, 1])
+    offsets = pd.Timedelta(opening + ":00").value + step.value * np.arange(n)
+    stamps = (days.as_unit("ns").asi8[:, None] + offsets[None, :]).ravel().astype("datetime64[ns]")
+    df = pd.DataFrame({
+        "Date": pd.DatetimeIndex(stamps).tz_localize(tz),
+        "Open": open_.ravel(),
+        "High": (np.maximum(open_, close) * (1 + spread)).ravel(),
+        "Low": (np.minimum(open_, close) * (1 - spread)).ravel(),
+        "Close": close.ravel(),
+        "Volume": np.floor(np.abs(noise[:, 2]) * 5e7 / n + 1_000).ravel(),
+    })
+    if job is not None:
+        job.check()
+    return df[np.isfinite(df["Close"].to_numpy())][OHLCV_COLUMNS].reset_index(drop=True)
+
+
+def _bins(dates: pd.Series, rule: str) -> np.ndarray:
+    # Bin label per bar as int64 wall-clock time, in the dates' own unit (converting units costs more than binning)
+    wall = (dates.dt.tz_localize(None) if dates.dt.tz is not None else dates).to_numpy()
+    unit = np.datetime_data(wall.dtype)[0]
+    try:
+        offset = pd.tseries.frequencies.to_offset(rule)
+    except ValueError:
+        offset = None
+    if isinstance(offset, (pd.offsets.Tick, pd.offsets.Day)):
+        day = np.timedelta64(1, "D").astype(f"m8[{unit}]").astype(np.int64)
+        size = offset.n * day if isinstance(offset, pd.offsets.Day) else \
+            np.timedelta64(offset.nanos, "ns").astype(f"m8[{unit}]").astype(np.int64)
+        values = wall.view(np.int64)
+        # Origin at midnight of the first day, like DataFrame.resample's default
+        origin = values[0] - values[0] % day
+        return origin + (values - origin) // size * size
+    return pd.Series(wall).dt.to_period(rule).dt.start_time.to_numpy().astype(f"M8[{unit}]").view(np.int64)
+
+
+def resample(df: pd.DataFrame, rule: str, date_column: str = "Date") -> pd.DataFrame:
+    """Coarser OHLCV bars: first Open, highest High, lowest Low, last Close, summed Volume per bin.
+
+    Other numeric columns keep their last value in the bin. Rows are sorted by
+    date first if they are not already.
+    """
+    if df.empty:
+        raise EmptyDataError("No bars to resample")
+    dates = pd.to_datetime(df[date_column], errors="coerce")
+    keep = dates.notna().to_numpy()
+    if not keep.all():
+        df, dates = df[keep], dates[keep]
+    if not dates.is_monotonic_increasing:
+        order = np.argsort(dates.to_numpy(), kind="stable")
+        df, dates = df.iloc[order], dates.iloc[order]
+    labels = _bins(dates, rule)
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    ends = np.r_[starts[1:], len(labels)] - 1
+
+    unit = np.datetime_data(dates.dt.tz_localize(None).dtype if dates.dt.tz is not None else dates.dtype)[0]
+    stamps = pd.DatetimeIndex(labels[starts].view(f"M8[{unit}]"))
+    if dates.dt.tz is not None:
+        stamps = stamps.tz_localize(dates.dt.tz, ambiguous=True, nonexistent="shift_forward")
+    out = {date_column: stamps}
+    for column in df.columns:
+        if column == date_column or not pd.api.types.is_numeric_dtype(df[column]):
+            continue
+        values = df[column].to_numpy(dtype="float64")
+        if column == "Open":
+            out[column] = values[starts]
+        elif column == "High":
+            out[column] = np.fmax.reduceat(values, starts)
+        elif column == "Low":
+            out[column] = np.fmin.reduceat(values, starts)
+        elif column == "Volume":
+            out[column] = np.add.reduceat(np.where(np.isnan(values), 0.0, values), starts)
+        else:
+            out[column] = values[ends]
+    return pd.DataFrame(out)
+
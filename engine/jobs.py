@@ -0,0 +1,120 @@
+"""Background jobs for slow, cancellable work such as market data downloads.
+
+``JobRunner.submit`` starts a function on a worker thread and returns a ``Job``
+handle straight away. The function receives the handle, reports progress on it
+and sleeps through ``job.sleep``, so retry back-off happens off the script
+thread and a cancelled job stops at its next wait instead of finishing.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from engine.errors import JobCancelled
+
+PENDING, RUNNING, DONE, FAILED, CANCELLED = "pending", "running", "done", "failed", "cancelled"
+
+
+class Job:
+    def __init__(self, key):
+        self.key = key
+        self.state = PENDING
+        self.progress = 0.0
+        self.message = "Queued"
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.watchers = 0
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._finished.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def report(self, progress=None, message=None):
+        if progress is not None:
+            self.progress = min(max(float(progress), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+
+    def sleep(self, seconds):
+        # Used as the retry sleep: returns early and raises as soon as the job is cancelled
+        if self._cancel.wait(seconds) or self.cancelled:
+            raise JobCancelled(f"{self.key} was cancelled")
+
+    def check(self):
+        if self.cancelled:
+            raise JobCancelled(f"{self.key} was cancelled")
+
+    def wait(self, timeout=None) -> bool:
+        return self._finished.wait(timeout)
+
+    def _finish(self, state, result=None, error=None):
+        self.state, self.result, self.error = state, result, error
+        self.finished_at = time.time()
+        if state == DONE:
+            self.report(1.0, "Done")
+        self._finished.set()
+
+
+class JobRunner:
+    def __init__(self, max_workers=4, keep_seconds=120):
+        self.keep_seconds = keep_seconds
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="market-master-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn) -> Job:
+        """Run ``fn(job)`` in the background; a live job with the same key is shared instead."""
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(key)
+            if job is not None and not job.cancelled and job.state not in (FAILED, CANCELLED):
+                job.watchers += 1
+                return job
+            job = self._jobs[key] = Job(key)
+            job.watchers = 1
+        self._pool.submit(self._run, job, fn)
+        return job
+
+    def release(self, job):
+        """Drop one caller's interest in ``job``; it is cancelled once nobody is waiting on it."""
+        with self._lock:
+            job.watchers -= 1
+            if job.watchers <= 0 and not job.done:
+                job.cancel()
+            # Finished jobs hold their results; drop the expired ones even when nothing new is submitted
+            self._prune()
+
+    def get(self, key):
+        with self._lock:
+            return self._jobs.get(key)
+
+    def _run(self, job, fn):
+        if job.cancelled:
+            job._finish(CANCELLED)
+            return
+        job.state = RUNNING
+        try:
+            result = fn(job)
+            job.check()
+        except JobCancelled:
+            job._finish(CANCELLED)
+        except Exception as e:
+            job._finish(FAILED, error=e)
+        else:
+            job._finish(DONE, result)
+
+    def _prune(self):
+        cutoff = time.time() - self.keep_seconds
+        self._jobs = {k: j for k, j in self._jobs.items() if not (j.done and j.finished_at < cutoff)}
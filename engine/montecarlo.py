@@ -0,0 +1,219 @@
+"""Monte Carlo price paths for forward risk scenarios.
+
+Three generators of per-step log returns, all seeded from the loaded history:
+- ``gbm``: geometric Brownian motion with the historical drift and volatility;
+- ``bootstrap``: a circular block bootstrap of historical daily returns, which
+  keeps short-range autocorrelation and volatility clustering;
+- ``residual``: a forecast drift plus resampled model residuals (the app uses
+  the Linear Regression forecast and its test residuals). Only return targets
+  qualify, scaled from their horizon to one bar.
+
+Paths are generated in chunks; each chunk has its own RNG stream, spawned from
+one ``SeedSequence``, so results do not depend on how chunks are spread over
+workers. Chunks are run on a process pool. A chunk never returns its paths.
+It returns each path's terminal return and maximum drawdown, and a histogram of
+log returns per step on shared bin edges. Merging those is enough for VaR/CVaR,
+distribution summaries and fan-chart quantiles. Memory is bounded by
+``chunk_paths x horizon`` per worker, not by the number of paths.
+"""
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from engine.errors import EmptyDataError
+from engine.horizons import target_horizon
+
+MODELS = ("gbm", "bootstrap", "residual")
+BINS = 2_000  # per-step histogram resolution for the fan chart
+POOL_MIN_PATHS = 200_000  # below this, starting worker processes costs more than it saves
+
+
+@dataclass
+class SimulationConfig:
+    model: str = "gbm"
+    n_paths: int = 100_000
+    horizon: int = 20  # steps (bars) ahead
+    chunk_paths: int = 25_000
+    block: int = 5  # bootstrap block length in bars
+    alpha: float = 0.05  # VaR/CVaR tail probability
+    quantiles: tuple = (0.05, 0.25, 0.5, 0.75, 0.95)
+    seed: int = 42
+    workers: int | None = None  # default: one process per core for large runs; 1 runs in this process
+
+
+@dataclass
+class SimulationInputs:
+    s0: float  # last price
+    returns: np.ndarray  # historical per-bar log returns
+    residuals: np.ndarray | None = None  # residual pool in log-return units (residual model)
+    drift: float | np.ndarray = 0.0  # per-step expected log return (residual model)
+
+
+@dataclass
+class SimulationResult:
+    fan: pd.DataFrame  # price quantiles per step (rows: step 0..horizon, columns: quantiles)
+    terminal_returns: np.ndarray  # simple return at the horizon, one per path
+    max_drawdowns: np.ndarray  # worst peak-to-trough fall along each path (<= 0)
+    var: float  # loss at the alpha quantile of terminal returns, as a positive fraction
+    cvar: float  # mean loss beyond VaR
+    summary: dict = field(default_factory=dict)
+
+
+def seed_inputs(df: pd.DataFrame, price_column: str = "Close", returns_column: str = "Daily_Return",
+                residuals=None, drift=0.0) -> SimulationInputs:
+    """Last price and historical log returns from the loaded OHLCV (or engineered) frame."""
+    if price_column not in df.columns:
+        raise EmptyDataError(f"Simulation needs a {price_column} column")
+    prices = pd.to_numeric(df[price_column], errors="coerce").dropna()
+    prices = prices[prices > 0]
+    if len(prices) < 3:
+        raise EmptyDataError("Simulation needs at least three positive prices")
+    if returns_column in df.columns:
+        # The first Daily_Return is a filled-in 0, not an observed return
+        simple = pd.to_numeric(df[returns_column], errors="coerce").to_numpy()[1:]
+        simple = simple[np.isfinite(simple) & (simple > -1)]
+        returns = np.log1p(simple)
+    else:
+        returns = np.diff(np.log(prices.to_numpy()))
+    if residuals is not None:
+        residuals = np.asarray(residuals, dtype="float64")
+        residuals = residuals[np.isfinite(residuals)]
+    return SimulationInputs(float(prices.iloc[-1]), returns, residuals, drift)
+
+
+def residual_horizon(target: str) -> int:
+    """Bars a return target spans (``Daily_Return``: 1, ``Return_t+h``: h); 0 when it is not a return.
+
+    Only returns become per-step shocks. A price target's error is a gap in
+    level, and adding it on every step would compound it over the horizon.
+    """
+    if str(target) == "Daily_Return":
+        return 1
+    return target_horizon(target) if str(target).startswith("Return") else 0
+
+
+def forecast_residuals(target: str, y_test, prediction) -> tuple[np.ndarray | None, float]:
+    """Residual pool and per-step drift, in one-bar log-return units, around a return forecast.
+
+    The residuals are ``log1p(y) - log1p(ŷ)`` and the drift is the latest
+    forecast log return. An h-bar target is brought to one bar by dividing the
+    drift by h and the residuals by √h (independent per-bar shocks add up to
+    h times the variance). Any other target gives no residuals (None), so the
+    simulation falls back to demeaned historical returns.
+    """
+    h = residual_horizon(target)
+    if not h:
+        return None, 0.0
+    y = pd.Series(np.asarray(y_test, dtype="float64"), index=getattr(y_test, "index", None))
+    pred = pd.Series(np.asarray(prediction, dtype="float64"), index=y.index)
+    # The test split may be shuffled; "latest" is the last forecast row in time order
+    scored = pred.notna()
+    y, pred = y[scored].sort_index(), pred[scored].sort_index()
+    if pred.empty:
+        return None, 0.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        residuals, drift = np.log1p(y) - np.log1p(pred), np.log1p(pred.iloc[-1])
+    residuals = residuals.to_numpy()
+    residuals = residuals[np.isfinite(residuals)] / np.sqrt(h)
+    return (residuals - residuals.mean(), float(drift) / h) if len(residuals) else (None, 0.0)
+
+
+def _log_returns(inputs, config, n, rng):
+    if config.model == "gbm":
+        mu, sigma = inputs.returns.mean(), inputs.returns.std()
+        return rng.normal(mu, sigma, size=(n, config.horizon))
+    if config.model == "bootstrap":
+        pool, block = inputs.returns, max(1, min(config.block, len(inputs.returns)))
+        blocks = -(-config.horizon // block)
+        starts = rng.integers(0, len(pool), size=(n, blocks, 1))
+        idx = (starts + np.arange(block)) % len(pool)
+        return pool[idx.reshape(n, blocks * block)[:, :config.horizon]]
+    pool = inputs.residuals if inputs.residuals is not None and len(inputs.residuals) else inputs.returns - inputs.returns.mean()
+    drift = np.broadcast_to(np.asarray(inputs.drift, dtype="float64"), (config.horizon,))
+    return drift + pool[rng.integers(0, len(pool), size=(n, config.horizon))]
+
+
+def _run_chunk(inputs, config, n, seed, edges):
+    rng = np.random.default_rng(seed)
+    cum = np.cumsum(_log_returns(inputs, config, n, rng), axis=1)
+    # Per-step histograms on shared, evenly spaced edges in one bincount; bins 0 and -1 catch under/overflow
+    width = edges[1] - edges[0]
+    bins = np.clip(np.ceil((cum - edges[0]) / width), 0, len(edges)).astype(np.int64)
+    bins += np.arange(config.horizon) * (len(edges) + 1)
+    counts = np.bincount(bins.ravel(), minlength=config.horizon * (len(edges) + 1)).reshape(config.horizon, -1)
+    peak = np.maximum(np.maximum.accumulate(cum, axis=1), 0.0)
+    drawdown = np.expm1((cum - peak).min(axis=1))
+    return np.expm1(cum[:, -1]), drawdown, counts
+
+
+def _edges(inputs, config):
+    # Wide enough for the fattest tail any of the generators can produce over the horizon
+    pool = inputs.returns if config.model != "residual" or inputs.residuals is None else inputs.residuals
+    spread = max(np.abs(pool).max() if len(pool) else 0.0, 8 * pool.std() if len(pool) else 0.0, 1e-6)
+    drift = np.abs(np.asarray(inputs.drift, dtype="float64")).max() + abs(inputs.returns.mean())
+    if config.model == "gbm":
+        reach = 8 * pool.std() * np.sqrt(config.horizon) + config.horizon * drift
+    else:
+        reach = config.horizon * (spread + drift)
+    reach = min(max(reach, 1e-6), 20.0)
+    return np.linspace(-reach, reach, BINS + 1)
+
+
+def _histogram_quantiles(counts, edges, quantiles):
+    # Quantiles from the merged per-step histograms, interpolated inside the bin that crosses each level
+    total = counts.sum(axis=1, keepdims=True)
+    cdf = np.cumsum(counts, axis=1) / total
+    centers = np.concatenate([[edges[0]], edges, [edges[-1]]])
+    out = np.empty((counts.shape[0], len(quantiles)))
+    for j, q in enumerate(quantiles):
+        k = (cdf < q).sum(axis=1)
+        lo = np.where(k > 0, cdf[np.arange(len(k)), np.maximum(k - 1, 0)], 0.0)
+        hi = cdf[np.arange(len(k)), k]
+        frac = np.where(hi > lo, (q - lo) / np.where(hi > lo, hi - lo, 1), 0.5)
+        out[:, j] = centers[k] + frac * (centers[k + 1] - centers[k])
+    return out
+
+
+def simulate(inputs: SimulationInputs, config: SimulationConfig = SimulationConfig()) -> SimulationResult:
+    if config.model not in MODELS:
+        raise ValueError(f"Unknown model {config.model!r}; expected one of {', '.join(MODELS)}")
+    if len(inputs.returns) < 2:
+        raise EmptyDataError("Simulation needs at least two historical returns")
+    sizes = [min(config.chunk_paths, config.n_paths - start) for start in range(0, config.n_paths, config.chunk_paths)]
+    seeds = np.random.SeedSequence(config.seed).spawn(len(sizes))
+    edges = _edges(inputs, config)
+    workers = config.workers or (os.cpu_count() or 1 if config.n_paths >= POOL_MIN_PATHS else 1)
+    workers = min(workers, len(sizes))
+    if workers > 1:
+        import multiprocessing
+        # spawn: forking a process that runs Streamlit's threads is not safe
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            parts = list(pool.map(_run_chunk, [inputs] * len(sizes), [config] * len(sizes), sizes, seeds,
+                                  [edges] * len(sizes)))
+    else:
+        parts = [_run_chunk(inputs, config, n, seed, edges) for n, seed in zip(sizes, seeds)]
+
+    terminal = np.concatenate([p[0] for p in parts])
+    drawdowns = np.concatenate([p[1] for p in parts])
+    counts = sum(p[2] for p in parts)
+    log_q = _histogram_quantiles(counts, edges, config.quantiles)
+    fan = pd.DataFrame(inputs.s0 * np.exp(np.vstack([np.zeros(len(config.quantiles)), log_q])),
+                       columns=[f"p{round(q * 100):g}" for q in config.quantiles])
+    fan.index.name = "step"
+    cutoff = np.quantile(terminal, config.alpha)
+    var = float(-cutoff)
+    cvar = float(-terminal[terminal <= cutoff].mean())
+    centred = terminal - terminal.mean()
+    std = terminal.std()
+    summary = {"paths": len(terminal), "horizon": config.horizon, "mean_return": float(terminal.mean()),
+               "median_return": float(np.median(terminal)), "std_return": float(std),
+               "skew": float((centred ** 3).mean() / std ** 3) if std > 0 else 0.0,
+               "excess_kurtosis": float((centred ** 4).mean() / std ** 4 - 3) if std > 0 else 0.0,
+               "prob_loss": float((terminal < 0).mean()), "median_max_drawdown": float(np.median(drawdowns)),
+               "worst_max_drawdown": float(drawdowns.min())}
+    return SimulationResult(fan, terminal, drawdowns, var, cvar, summary)
@@ -0,0 +1,93 @@
+"""Headless end-to-end pipeline: the 8 Streamlit steps without a UI runtime."""
+from __future__ import annotations
+
+import dataclasses
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from engine import compact, stages
+from engine.preprocessing import PreprocessConfig
+
+
+@dataclass
+class PipelineConfig:
+    target: str = "Close"
+    features: list[str] | None = None  # None: the first two numeric columns other than the target, like the UI
+    preprocess_config: PreprocessConfig = field(default_factory=PreprocessConfig)
+    features_config: stages.FeatureConfig = field(default_factory=stages.FeatureConfig)
+    split_config: stages.SplitConfig = field(default_factory=stages.SplitConfig)
+    train_config: stages.TrainConfig = field(default_factory=stages.TrainConfig)
+    compact: bool = False  # float32 features, narrow volume, categorical symbols (see engine.compact)
+
+
+@dataclass
+class PipelineResult:
+    df_processed: pd.DataFrame
+    df_features: pd.DataFrame
+    target: str
+    features: list[str]
+    split: stages.SplitResult
+    models: dict
+    evaluation: stages.EvaluationResult
+    timings: dict = field(default_factory=dict)
+    memory: dict = field(default_factory=dict)  # stage -> bytes held by that stage's output
+
+
+def default_features(df: pd.DataFrame, target: str, n: int = 2) -> list[str]:
+    return [c for c in stages.numeric_columns(df) if c != target][:n]
+
+
+def run_pipeline(df: pd.DataFrame, config: PipelineConfig = PipelineConfig()) -> PipelineResult:
+    timings = {}
+
+    def timed(name, fn, *args):
+        t0 = time.perf_counter()
+        out = fn(*args)
+        timings[name] = time.perf_counter() - t0
+        return out
+
+    memory = {}
+
+    def held(name, *frames):
+        memory[name] = sum(compact.memory_bytes(f.to_frame() if isinstance(f, pd.Series) else f) for f in frames)
+
+    if config.compact:
+        df = compact.compact_frame(df)
+    held("input", df)
+    processed = timed("preprocess", stages.preprocess, df, config.preprocess_config).df
+    held("preprocess", processed)
+    result = timed("features", stages.add_rolling_features, processed, config.features_config.window)
+    featured = compact.compact_frame(result.df, result.added) if config.compact else result.df
+    features = config.features or default_features(featured, config.target)
+    if config.features_config.scale:
+        timed("scale", stages.scale_features, featured, features)
+    held("features", featured)
+    data = timed("split", stages.split, featured, features, config.target, config.split_config)
+    held("split", data.X_train, data.X_test, data.y_train, data.y_test)
+    models = timed("train", stages.train, data, config.train_config)
+    evaluation = timed("evaluate", stages.evaluate, models, data.X_test, data.y_test)
+    return PipelineResult(processed, featured, config.target, features, data, models, evaluation, timings, memory)
+
+
+def results_frame(y_test, y_pred, actual_label: str = "Actual", predicted_label: str = "Predicted") -> pd.DataFrame:
+    return pd.DataFrame({actual_label: y_test, predicted_label: y_pred})
+
+
+def compact_report(df: pd.DataFrame, config: PipelineConfig = PipelineConfig()) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Run the pipeline in full and compact precision; returns (memory per stage, metric drift per model)."""
+    full = run_pipeline(df, dataclasses.replace(config, compact=False))
+    small = run_pipeline(df, dataclasses.replace(config, compact=True))
+    memory = pd.DataFrame({"float64_bytes": full.memory, "compact_bytes": small.memory})
+    memory["saved"] = 1 - memory["compact_bytes"] / memory["float64_bytes"]
+    drift = full.evaluation.metrics.merge(small.evaluation.metrics, on="Model", suffixes=("", " (compact)"))
+    for metric in ["RMSE", "R²"]:
+        drift[f"{metric} drift"] = drift[f"{metric} (compact)"] - drift[metric]
+    drift["max |Δ prediction|"] = [
+        float(np.max(np.abs(np.asarray(full.evaluation.y_preds[m], dtype="float64")
+                            - np.asarray(small.evaluation.y_preds[m], dtype="float64"))))
+        for m in drift["Model"]
+    ]
+    return memory.rename_axis("stage"), drift
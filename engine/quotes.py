@@ -0,0 +1,124 @@
+"""Live last-price quotes shared by every session in the process.
+
+``QuoteService`` keeps the set of symbols currently on screen and refreshes all
+of them with one batched feed call per interval. Readers only ever hit the TTL
+cache, so N sessions watching AAPL cost one upstream request per interval.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+import threading
+import time
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Quote:
+    symbol: str
+    price: float
+    as_of: float
+    previous: float | None = None
+
+    @property
+    def change(self) -> float | None:
+        return None if self.previous is None else self.price - self.previous
+
+
+class YahooQuoteFeed:
+    """Last trade prices for many symbols from one ``yf.download`` call on 1-minute bars."""
+
+    def fetch(self, symbols):
+        import yfinance as yf
+        bars = yf.download(sorted(symbols), period="1d", interval="1m", progress=False, group_by="column",
+                           auto_adjust=False, threads=False)
+        if bars is None or bars.empty:
+            return {}
+        close = bars["Close"]
+        if not hasattr(close, "columns"):
+            close = close.to_frame(next(iter(symbols)))
+        prices = {}
+        for symbol in symbols:
+            if symbol in close.columns:
+                series = close[symbol].dropna()
+                if not series.empty:
+                    prices[symbol] = float(series.iloc[-1])
+        return prices
+
+
+class SyntheticQuoteFeed:
+    """Offline stand-in: a deterministic random walk per symbol, moving on every call."""
+
+    def __init__(self, volatility=0.002):
+        self.volatility = volatility
+        self._prices = {}
+        self._ticks = 0
+
+    def fetch(self, symbols):
+        self._ticks += 1
+        prices = {}
+        for symbol in symbols:
+            seed = int(hashlib.sha1(symbol.encode()).hexdigest()[:8], 16)
+            start = self._prices.get(symbol, 20 + seed % 480)
+            shock = math.sin(seed + self._ticks * 1.618) * self.volatility
+            prices[symbol] = self._prices[symbol] = round(start * (1 + shock), 4)
+        return prices
+
+
+class QuoteService:
+    def __init__(self, feed, ttl=15.0, idle_after=300.0):
+        self.feed = feed
+        self.ttl = ttl
+        self.idle_after = idle_after
+        self.upstream_calls = 0
+        self._quotes = {}
+        self._watched = {}
+        self._fetched_at = 0.0
+        self._attempted = set()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def watch(self, *symbols):
+        now = time.time()
+        with self._lock:
+            for symbol in symbols:
+                self._watched[symbol.upper()] = now
+
+    def _due(self, now):
+        with self._lock:
+            missing = any(s not in self._attempted for s in self._watched)
+        return missing or now - self._fetched_at >= self.ttl
+
+    def refresh(self, force=False):
+        now = time.time()
+        if not force and not self._due(now):
+            return
+        # Only one thread talks to the feed; the rest wait and then read its result
+        with self._refresh_lock:
+            if not force and not self._due(time.time()):
+                return
+            with self._lock:
+                self._watched = {s: t for s, t in self._watched.items() if now - t < self.idle_after}
+                symbols = list(self._watched)
+            if not symbols:
+                return
+            self.upstream_calls += 1
+            try:
+                prices = self.feed.fetch(symbols)
+            finally:
+                # A failed or partial fetch still waits out the TTL instead of hammering the feed
+                fetched_at = time.time()
+                with self._lock:
+                    self._attempted.update(symbols)
+                    self._fetched_at = fetched_at
+            with self._lock:
+                for symbol, price in prices.items():
+                    old = self._quotes.get(symbol)
+                    self._quotes[symbol] = Quote(symbol, price, fetched_at, old.price if old else None)
+
+    def get(self, symbol):
+        symbol = symbol.upper()
+        self.watch(symbol)
+        self.refresh()
+        with self._lock:
+            return self._quotes.get(symbol)
@@ -0,0 +1,115 @@
+"""Market-regime discovery: K-Means over a range of cluster counts.
+
+Every K is fitted in parallel on a thread pool from one shared k-means++
+seeding. k-means++ picks centres one after another, so the first K centres of a
+seeding for the largest K are a valid k-means++ start for K. Above
+``minibatch_rows`` rows the fits use MiniBatchKMeans. The scores are computed on
+controlled subsamples: one random row per equal-width block of time, so every
+stretch of the history is represented and reruns draw the same rows. Frames are
+put back in index (time) order first, since a shuffled training split is not.
+- Inertia and Davies-Bouldin use the fit sample.
+- Silhouette, which is quadratic in rows, uses a smaller sample.
+"""
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from engine.compact import widen
+
+
+@dataclass
+class RegimeSweepConfig:
+    k_min: int = 2
+    k_max: int = 10
+    fit_rows: int = 200_000  # rows the models are fitted on
+    silhouette_rows: int = 3_000  # rows the silhouette is scored on
+    minibatch_rows: int = 50_000  # fit samples at least this large use MiniBatchKMeans
+    random_state: int = 42
+    workers: int | None = None  # default: one per core, at most one per K
+
+
+@dataclass
+class RegimeSweepResult:
+    scores: pd.DataFrame  # k, inertia, silhouette, davies_bouldin, fit_s
+    models: dict = field(default_factory=dict)  # k -> fitted estimator
+    best_k: int = 0  # highest silhouette
+
+    @property
+    def best_model(self):
+        return self.models[self.best_k]
+
+
+def stratified_sample(n_rows: int, size: int, random_state: int = 42) -> np.ndarray:
+    """Sorted row positions: one random row from each of ``size`` equal blocks (all rows when n_rows <= size)."""
+    if n_rows <= size:
+        return np.arange(n_rows)
+    edges = np.linspace(0, n_rows, size + 1).astype(np.int64)
+    rng = np.random.default_rng(random_state)
+    return edges[:-1] + (rng.random(size) * np.diff(edges)).astype(np.int64)
+
+
+def _take(X, rows):
+    # DataFrames keep their column names so the fitted models accept the same frames at predict time
+    return X.iloc[rows] if isinstance(X, pd.DataFrame) else X[rows]
+
+
+def _fit(X, k, init, config):
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+    if len(X) >= config.minibatch_rows:
+        model = MiniBatchKMeans(n_clusters=k, init=init, n_init=1, batch_size=4096, random_state=config.random_state)
+    else:
+        model = KMeans(n_clusters=k, init=init, n_init=1, random_state=config.random_state)
+    return model.fit(X)
+
+
+def _score(X, X_sil, sil_rows, k, init, config):
+    from sklearn.metrics import davies_bouldin_score, silhouette_score
+    t0 = time.perf_counter()
+    model = _fit(X, k, init, config)
+    fit_s = time.perf_counter() - t0
+    labels = model.labels_ if hasattr(model, "labels_") else model.predict(X)
+    sil_labels = labels[sil_rows]
+    silhouette = silhouette_score(X_sil, sil_labels) if len(np.unique(sil_labels)) > 1 else np.nan
+    davies_bouldin = davies_bouldin_score(np.asarray(X), labels) if len(np.unique(labels)) > 1 else np.nan
+    row = {"k": k, "inertia": float(model.inertia_), "silhouette": float(silhouette),
+           "davies_bouldin": float(davies_bouldin), "fit_s": fit_s}
+    return row, model
+
+
+def sweep(X, config: RegimeSweepConfig = RegimeSweepConfig()) -> RegimeSweepResult:
+    from sklearn.cluster import kmeans_plusplus
+    from threadpoolctl import threadpool_limits
+    X = widen(X)
+    if isinstance(X, pd.DataFrame) and not X.index.is_monotonic_increasing:
+        # A shuffled training split: back in time order, so the sample's blocks are stretches of time
+        X = X.sort_index()
+    X = _take(X, stratified_sample(len(X), config.fit_rows, config.random_state))
+    k_max = min(config.k_max, len(X) - 1)
+    ks = list(range(config.k_min, k_max + 1))
+    if not ks:
+        raise ValueError(f"Need more than {config.k_min} rows to sweep cluster counts")
+    seeds, _ = kmeans_plusplus(np.asarray(X), n_clusters=k_max, random_state=config.random_state)
+    sil_rows = stratified_sample(len(X), config.silhouette_rows, config.random_state + 1)
+    X_sil = np.asarray(_take(X, sil_rows))
+    workers = min(config.workers or os.cpu_count() or 1, len(ks))
+    # Split the cores between the concurrent fits instead of every fit spawning a thread per core
+    with threadpool_limits(limits=max(1, (os.cpu_count() or 1) // workers), user_api="openmp"):
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="market-master-kmeans") as pool:
+            outcomes = list(pool.map(lambda k: _score(X, X_sil, sil_rows, k, seeds[:k], config), ks))
+    scores = pd.DataFrame([row for row, _ in outcomes])
+    models = {row["k"]: model for row, model in outcomes}
+    best = scores.loc[scores["silhouette"].fillna(-np.inf).idxmax(), "k"]
+    return RegimeSweepResult(scores, models, int(best))
+
+
+def label_rows(model, X, chunk_rows: int = 500_000) -> np.ndarray:
+    """Cluster label for every row, predicted in chunks so millions of rows stay within memory."""
+    X = widen(X)
+    return np.concatenate([model.predict(_take(X, slice(i, i + chunk_rows))) for i in range(0, len(X), chunk_rows)] or
+                          [np.empty(0, dtype=np.int32)])
@@ -0,0 +1,337 @@
+"""Feature relevance: permutation importance, mutual information and greedy subset selection.
+
+Selection scores a subset by the cross-validated R² of a least-squares fit on
+it, with contiguous time-ordered folds. All the data the fits need is in one
+Gram matrix per fold of ``[1, X, y]``, built once in row batches. A fold's
+training Gram is the total minus its own. After that, no fit touches the rows
+again:
+- forward selection scores every candidate for the next slot from one inverse
+  of the current subset (a Schur-complement update), all candidates in a few
+  matrix products;
+- backward elimination gets every "all but j" refit from one inverse, because
+  dropping j moves the coefficients by ``A[:, j] * beta_j / A_jj``.
+Candidate blocks and folds are scored on a thread pool (the work is BLAS, which
+releases the GIL). Steps stop at ``max_features``, at a gain below
+``tolerance``, or when ``time_budget`` runs out, so hundreds of indicator
+columns select in bounded time. Categorical targets are fitted the same way, as
+a linear probability model, so their score is a Brier skill score.
+
+Permutation importance works with any fitted model. It shuffles one column at
+a time, ``repeats`` times, and reports the drop in R² (accuracy for
+categorical targets). Many permuted copies are stacked into each ``predict``
+call, and batches run in parallel. Linear models (anything with ``coef_`` and
+``intercept_``) skip ``predict``: shuffling column j moves every decision value
+by ``coef_j`` times the change in ``x_j``. A walk-forward ``RollingOLS`` takes the
+same shortcut with each row's own coefficients, the ones fitted on earlier rows
+that its forecasts use. Its ``coef_`` are fitted over the rows being scored, so
+using them would make the importance in-sample.
+
+Mutual information uses scikit-learn's nearest-neighbour estimators on a
+time-stratified row sample, with column blocks in parallel.
+"""
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from engine.compact import widen
+from engine.errors import EmptyDataError
+from engine.regimes import stratified_sample
+from engine.stages import is_continuous
+
+METHODS = ("forward", "backward")
+CHUNK_CELLS = 4_000_000  # float64 cells per stacked batch or row block (~32 MiB)
+
+
+@dataclass
+class SelectionConfig:
+    method: str = "forward"
+    folds: int = 5
+    max_features: int | None = None  # forward: stop here; backward: always eliminate down to here
+    tolerance: float = 1e-4  # smallest R² gain (forward) or largest R² loss (backward) a step may make
+    time_budget: float = 30.0  # seconds; the best subset so far is returned when it runs out
+    alpha: float = 1e-6  # ridge on the standardised features, relative to rows; keeps collinear indicators solvable
+    workers: int | None = None  # default: one per core
+
+
+@dataclass
+class FoldGrams:
+    features: list
+    grams: np.ndarray  # (folds, p + 2, p + 2): Gram of [1, X, y] over each fold's rows
+    rows: int
+
+    @property
+    def total(self) -> np.ndarray:
+        return self.grams.sum(axis=0)
+
+
+@dataclass
+class SelectionResult:
+    selected: list
+    score: float  # cross-validated R² of the selected subset
+    path: pd.DataFrame  # step, action, feature, score, seconds
+    complete: bool = True  # False when the time budget stopped the search
+    seconds: float = 0.0
+
+
+def _workers(workers, tasks):
+    return max(1, min(workers or os.cpu_count() or 1, tasks))
+
+
+def fold_grams(df: pd.DataFrame, features: list[str], target: str, folds: int = 5) -> FoldGrams:
+    """Per-fold Grams of the standardised features, an intercept column and the target (rows in time order)."""
+    data = df[list(dict.fromkeys(features + [target]))].apply(pd.to_numeric, errors="coerce").dropna()
+    folds = int(folds)
+    if folds < 2 or len(data) < 2 * folds:
+        raise EmptyDataError(f"Need at least {2 * max(folds, 2)} rows with every feature and the target present")
+    X = data[features].to_numpy(dtype="float64")
+    sd = X.std(axis=0)
+    X = (X - X.mean(axis=0)) / np.where(sd > 0, sd, 1.0)
+    y = data[target].to_numpy(dtype="float64")
+    p = len(features)
+    edges = np.linspace(0, len(data), folds + 1).astype(np.int64)
+    grams = np.zeros((folds, p + 2, p + 2))
+    step = max(1, CHUNK_CELLS // (p + 2))
+    for f in range(folds):
+        for lo in range(edges[f], edges[f + 1], step):
+            hi = min(lo + step, edges[f + 1])
+            Z = np.column_stack([np.ones(hi - lo), X[lo:hi], y[lo:hi]])
+            grams[f] += Z.T @ Z
+    return FoldGrams(list(features), grams, len(data))
+
+
+def _fold_terms(grams: FoldGrams, alpha):
+    # Per fold: training Gram with the ridge on the feature diagonal, and the validation Gram
+    total = grams.total
+    q = total.shape[0]
+    ridge = np.zeros(q)
+    ridge[1:q - 1] = alpha
+    out = []
+    for val in grams.grams:
+        train = total - val
+        train[np.diag_indices(q)] += ridge * train[0, 0]
+        # Validation spread around the training mean: the baseline R² compares against
+        mean = train[0, q - 1] / train[0, 0]
+        sst = val[q - 1, q - 1] - 2 * mean * val[0, q - 1] + val[0, 0] * mean ** 2
+        out.append((train, val, sst))
+    return out
+
+
+def _sse(val, y, S, B_S):
+    # Validation SSE for coefficient columns B_S over the subset S: yᵀy - 2 cᵀβ + βᵀ H β
+    H, c = val[np.ix_(S, S)], val[S, y]
+    return val[y, y] - 2 * (c @ B_S) + np.einsum("ij,ij->j", B_S, H @ B_S)
+
+
+def _forward_sse(train, val, S, C):
+    # SSE of S + {j} for every candidate j in C, from one inverse of the S system
+    y = train.shape[0] - 1
+    A = np.linalg.inv(train[np.ix_(S, S)])
+    beta = A @ train[S, y]
+    G_SC = train[np.ix_(S, C)]
+    U = A @ G_SC
+    d = train[C, C] - np.einsum("ij,ij->j", G_SC, U)
+    r = (train[C, y] - G_SC.T @ beta) / d
+    B_S = beta[:, None] - U * r
+    H_SC = val[np.ix_(S, C)]
+    return _sse(val, y, S, B_S) - 2 * r * val[C, y] + 2 * r * np.einsum("ij,ij->j", H_SC, B_S) + r ** 2 * val[C, C]
+
+
+def _backward_sse(train, val, S):
+    # SSE of S - {j} for every j in S (the intercept at position 0 included, and ignored by the caller)
+    y = train.shape[0] - 1
+    A = np.linalg.inv(train[np.ix_(S, S)])
+    beta = A @ train[S, y]
+    B = beta[:, None] - A * (beta / np.diag(A))[None, :]
+    return _sse(val, y, S, B)
+
+
+def cv_score(grams: FoldGrams, subset: list[str], alpha: float = 1e-6) -> float:
+    """Cross-validated R² of a least-squares fit on ``subset``."""
+    S = [0] + [1 + grams.features.index(f) for f in subset]
+    y = grams.grams.shape[1] - 1
+    sse = sst = 0.0
+    for train, val, fold_sst in _fold_terms(grams, alpha):
+        beta = np.linalg.solve(train[np.ix_(S, S)], train[S, y])
+        sse += float(_sse(val, y, S, beta[:, None])[0])
+        sst += fold_sst
+    return 1 - sse / sst
+
+
+def select(grams: FoldGrams, config: SelectionConfig = SelectionConfig()) -> SelectionResult:
+    """Greedy forward selection or backward elimination over ``grams.features``."""
+    from threadpoolctl import threadpool_limits
+    if config.method not in METHODS:
+        raise ValueError(f"Unknown method {config.method!r}; expected one of {', '.join(METHODS)}")
+    p = len(grams.features)
+    terms = _fold_terms(grams, config.alpha)
+    sst = sum(t[2] for t in terms)
+    workers = _workers(config.workers, max(p, 1))
+    start = time.perf_counter()
+    chosen = [] if config.method == "forward" else list(range(1, p + 1))
+    score = cv_score(grams, [grams.features[j - 1] for j in chosen], config.alpha)
+    path = [{"step": 0, "action": "start", "feature": None, "score": score, "seconds": 0.0}]
+    limit = config.max_features or p
+    complete = True
+    # Split the cores between the concurrent scorers instead of every BLAS call spawning a thread per core
+    with threadpool_limits(limits=max(1, (os.cpu_count() or 1) // workers), user_api="blas"), \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="market-master-select") as pool:
+        while True:
+            if time.perf_counter() - start > config.time_budget:
+                complete = False
+                break
+            S = [0] + chosen
+            if config.method == "forward":
+                if len(chosen) >= limit:
+                    break
+                candidates = [j for j in range(1, p + 1) if j not in chosen]
+                if not candidates:
+                    break
+                blocks = [list(b) for b in np.array_split(np.array(candidates), min(workers, len(candidates)))]
+                sse = np.concatenate(list(pool.map(
+                    lambda block: sum(_forward_sse(train, val, S, block) for train, val, _ in terms), blocks)))
+                best = int(np.argmin(sse))
+                new_score = 1 - sse[best] / sst
+                if new_score - score < config.tolerance:
+                    break
+                feature = candidates[best]
+                chosen.append(feature)
+                action = "add"
+            else:
+                if not chosen:
+                    break
+                sse = sum(pool.map(lambda t: _backward_sse(t[0], t[1], S), terms))[1:]
+                best = int(np.argmin(sse))
+                new_score = 1 - sse[best] / sst
+                if len(chosen) <= limit and score - new_score > config.tolerance:
+                    break
+                feature = chosen.pop(best)
+                action = "drop"
+            score = new_score
+            path.append({"step": len(path), "action": action, "feature": grams.features[feature - 1], "score": score,
+                         "seconds": time.perf_counter() - start})
+    return SelectionResult([grams.features[j - 1] for j in chosen], score, pd.DataFrame(path), complete,
+                           time.perf_counter() - start)
+
+
+def mutual_information(df: pd.DataFrame, features: list[str], target: str, rows: int = 5_000,
+                       random_state: int = 42, workers: int | None = None) -> pd.Series:
+    """Mutual information of each feature with the target, on a time-stratified sample of ``rows`` rows."""
+    from sklearn.feature_selection import mutual_info_classif, mutual_info_regression
+    data = df[list(dict.fromkeys(features + [target]))].apply(pd.to_numeric, errors="coerce").dropna()
+    if len(data) < 10:
+        raise EmptyDataError("Not enough rows with every feature and the target present")
+    data = data.iloc[stratified_sample(len(data), rows, random_state)]
+    y = data[target].to_numpy()
+    estimator = mutual_info_regression if is_continuous(data[target]) else mutual_info_classif
+    blocks = [list(b) for b in np.array_split(np.array(features, dtype=object), _workers(workers, len(features)))]
+    with ThreadPoolExecutor(max_workers=len(blocks), thread_name_prefix="market-master-mi") as pool:
+        parts = pool.map(lambda block: estimator(data[block].to_numpy(dtype="float64"), y,
+                                                 random_state=random_state), blocks)
+        values = np.concatenate(list(parts))
+    return pd.Series(values, index=features, name="mutual_information").sort_values(ascending=False)
+
+
+def _scorer(y):
+    from sklearn.metrics import accuracy_score, r2_score
+    return r2_score if is_continuous(pd.Series(y)) else accuracy_score
+
+
+def permutation_importance(model, X, y, repeats: int = 5, random_state: int = 42,
+                           workers: int | None = None) -> pd.DataFrame:
+    """Drop in score when each column is shuffled, over ``repeats`` shuffles; larger means the model leans on it more."""
+    X = widen(X)
+    columns = list(X.columns) if isinstance(X, pd.DataFrame) else [f"x{i}" for i in range(np.shape(X)[1])]
+    named = isinstance(X, pd.DataFrame) and hasattr(model, "feature_names_in_")
+    values = np.asarray(X, dtype="float64")
+    y = np.asarray(y)
+    walk_forward = isinstance(X, pd.DataFrame) and hasattr(model, "walk_forward_coefficients")
+    if walk_forward:
+        # Rows too early to have a forecast are not scored, as in evaluation
+        intercept, slopes = model.walk_forward_coefficients(X)
+        rows = np.isfinite(intercept) & np.isfinite(slopes).all(axis=1)
+        values, y, intercept, slopes = values[rows], y[rows], intercept[rows], slopes[rows]
+    n, p = values.shape
+    if n < 2 or p == 0:
+        raise EmptyDataError("Permutation importance needs at least two rows and one feature")
+    scorer = _scorer(y)
+    if walk_forward:
+        rng = np.random.default_rng(random_state)
+        orders = [rng.permutation(n) for _ in range(repeats)]
+        return _walk_forward_importance(intercept, slopes, values, y, columns, orders, scorer, workers)
+
+    def predict(matrix):
+        return np.asarray(model.predict(pd.DataFrame(matrix, columns=columns, copy=False) if named else matrix))
+
+    base = scorer(y, predict(values))
+    rng = np.random.default_rng(random_state)
+    orders = [rng.permutation(n) for _ in range(repeats)]
+    if hasattr(model, "coef_") and hasattr(model, "intercept_"):
+        return _linear_importance(model, values, y, columns, orders, base, scorer, workers)
+    # (column, repeat) pairs, as many stacked copies per predict call as fit in one chunk
+    pairs = [(j, r) for j in range(p) for r in range(repeats)]
+    workers = _workers(workers, len(pairs))
+    per_call = max(1, min(CHUNK_CELLS // (n * p), -(-len(pairs) // workers)))
+    groups = [pairs[i::workers] for i in range(workers)]
+
+    def run(group):
+        # One stacked buffer per worker, copied once; each pair rewrites only its own column and then restores it
+        buffer = np.tile(values, (per_call, 1))
+        drops = []
+        for i in range(0, len(group), per_call):
+            batch = group[i:i + per_call]
+            for slot, (j, r) in enumerate(batch):
+                buffer[slot * n:(slot + 1) * n, j] = values[orders[r], j]
+            predictions = predict(buffer).reshape(per_call, n)
+            for slot, (j, r) in enumerate(batch):
+                drops.append(((j, r), base - scorer(y, predictions[slot])))
+                buffer[slot * n:(slot + 1) * n, j] = values[:, j]
+        return drops
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="market-master-perm") as pool:
+        scores = dict(d for part in pool.map(run, groups) for d in part)
+    drops = np.array([[scores[j, r] for r in range(repeats)] for j in range(p)])
+    return pd.DataFrame({"Feature": columns, "importance": drops.mean(axis=1), "std": drops.std(axis=1)}) \
+        .sort_values("importance", ascending=False, ignore_index=True)
+
+
+def _walk_forward_importance(intercept, slopes, values, y, columns, orders, scorer, workers):
+    # Row t's forecast is intercept_t + x_t · slopes_t, so shuffling column j moves it by slopes_tj * (x_j[perm] - x_j)
+    decision = intercept + np.einsum("ij,ij->i", values, slopes)
+    base = scorer(y, decision)
+
+    def column(j):
+        shifted = decision[None, :] + (values[np.array(orders), j] - values[:, j]) * slopes[:, j]
+        return [base - scorer(y, prediction) for prediction in shifted]
+
+    with ThreadPoolExecutor(max_workers=_workers(workers, len(columns)), thread_name_prefix="market-master-perm") as pool:
+        drops = np.array(list(pool.map(column, range(len(columns)))))
+    return pd.DataFrame({"Feature": columns, "importance": drops.mean(axis=1), "std": drops.std(axis=1)}) \
+        .sort_values("importance", ascending=False, ignore_index=True)
+
+
+def _linear_importance(model, values, y, columns, orders, base, scorer, workers):
+    # Shuffling column j moves every decision value by coef_j * (x_j[perm] - x_j), so no predict call is needed
+    coef = np.atleast_2d(np.asarray(model.coef_, dtype="float64"))
+    decision = values @ coef.T + np.asarray(model.intercept_, dtype="float64")
+    classes = getattr(model, "classes_", None)
+
+    def column(j):
+        shifted = decision[None, :, :] + (values[np.array(orders), j] - values[:, j])[:, :, None] * coef[:, j]
+        if classes is None:
+            predictions = shifted[:, :, 0]
+        elif coef.shape[0] == 1:
+            predictions = classes[(shifted[:, :, 0] > 0).astype(np.int64)]
+        else:
+            predictions = classes[shifted.argmax(axis=2)]
+        return [base - scorer(y, prediction) for prediction in predictions]
+
+    with ThreadPoolExecutor(max_workers=_workers(workers, len(columns)), thread_name_prefix="market-master-perm") as pool:
+        drops = np.array(list(pool.map(column, range(len(columns)))))
+    return pd.DataFrame({"Feature": columns, "importance": drops.mean(axis=1), "std": drops.std(axis=1)}) \
+        .sort_values("importance", ascending=False, ignore_index=True)
@@ -0,0 +1,190 @@
+"""Rolling, expanding and recursive least squares in one vectorised pass.
+
+Each row contributes its outer products ``x xᵀ`` and ``x y`` (with an intercept
+term) to the normal equations. A fit at time t solves the normal equations
+summed over:
+- rolling: the last ``window`` rows (differences of a cumulative sum);
+- expanding: every row so far;
+- rls: every row so far, an observation k steps old weighted by
+  ``forgetting ** k``. This is the problem recursive least squares with a
+  forgetting factor solves; here it runs as a first-order IIR filter over the
+  sums.
+
+All timestamps are then solved at once as a batch of small p x p systems.
+Rows are processed in chunks that carry their running sums, so memory stays
+bounded on long histories. Inputs are centred first to keep the sums well
+conditioned. Rows with missing values contribute nothing.
+
+``RollingOLS`` wraps this behind ``fit``/``predict`` so it can stand in for
+LinearRegression in the pipeline. It predicts each row from coefficients fitted
+on earlier rows only (a walk-forward forecast).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from engine.compact import widen
+
+METHODS = ("rolling", "expanding", "rls")
+
+
+@dataclass
+class RollingOLSConfig:
+    method: str = "rolling"
+    window: int = 60  # rolling only
+    forgetting: float = 0.99  # rls only: weight of an observation one step older
+    min_periods: int | None = None  # default: the window for rolling, features + 2 otherwise
+    rcond: float = 1e-10  # windows this close to singular (e.g. a flat feature) get the minimum-norm solution
+    chunk_rows: int = 200_000
+
+
+@dataclass
+class RollingOLSResult:
+    coefficients: pd.DataFrame  # Intercept + one column per feature at every timestamp; NaN before min_periods
+    fitted: pd.Series  # x_t · beta_t
+    forecast: pd.Series  # x_t · beta_(t-1): one step ahead, out of sample
+    residuals: pd.Series  # y - forecast
+    config: RollingOLSConfig = field(default_factory=RollingOLSConfig)
+
+
+def _row_terms(X, y, mask):
+    # Per row: vec(x xᵀ), x y, and 1 for counting; zero for rows with missing values
+    n, p = X.shape
+    terms = np.empty((n, p * p + p + 1))
+    terms[:, :p * p] = (X[:, :, None] * X[:, None, :]).reshape(n, p * p)
+    terms[:, p * p:p * p + p] = X * y[:, None]
+    terms[:, -1] = 1.0
+    terms[~mask] = 0.0
+    return terms
+
+
+def _window_sums(X, y, mask, config):
+    """Yield (start, stop, summed terms) chunk by chunk."""
+    n = len(X)
+    step = max(config.chunk_rows, 1)
+    carry = None
+    for start in range(0, n, step):
+        stop = min(start + step, n)
+        if config.method == "rolling":
+            # Reach back one window so every row's sum is a difference within this chunk
+            lo = max(0, start - config.window)
+            cs = np.cumsum(_row_terms(X[lo:stop], y[lo:stop], mask[lo:stop]), axis=0)
+            cs = np.vstack([np.zeros((1, cs.shape[1])), cs])
+            t = np.arange(start, stop) - lo
+            sums = cs[t + 1] - cs[np.maximum(t + 1 - config.window, 0)]
+        elif config.method == "expanding":
+            sums = np.cumsum(_row_terms(X[start:stop], y[start:stop], mask[start:stop]), axis=0)
+            if carry is not None:
+                sums += carry
+            carry = sums[-1]
+        else:
+            from scipy.signal import lfilter
+            terms = _row_terms(X[start:stop], y[start:stop], mask[start:stop])
+            zi = (config.forgetting * carry if carry is not None else np.zeros(terms.shape[1]))[None, :]
+            sums, _ = lfilter([1.0], [1.0, -config.forgetting], terms, axis=0, zi=zi)
+            carry = sums[-1]
+        yield start, stop, sums
+
+
+def _solve(xtx, xty, rcond):
+    # Batched LU for well-posed systems; the few near-singular ones fall back to a pseudo-inverse.
+    # The determinant of the unit-diagonal rescaling is a cheap, scale-free singularity test.
+    d = np.sqrt(np.diagonal(xtx, axis1=1, axis2=2))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        det = np.linalg.det(xtx / (d[:, :, None] * d[:, None, :]))
+    bad = ~(det > rcond)
+    beta = np.empty(xty.shape)
+    if (~bad).any():
+        beta[~bad] = np.linalg.solve(xtx[~bad], xty[~bad][:, :, None])[:, :, 0]
+    if bad.any():
+        beta[bad] = (np.linalg.pinv(xtx[bad], rcond=rcond, hermitian=True) @ xty[bad][:, :, None])[:, :, 0]
+    return beta
+
+
+def rolling_ols(X, y, config: RollingOLSConfig = RollingOLSConfig()) -> RollingOLSResult:
+    """Coefficients, fits and one-step forecasts for every row of time-ordered ``X`` and ``y``."""
+    if config.method not in METHODS:
+        raise ValueError(f"Unknown method {config.method!r}; expected one of {', '.join(METHODS)}")
+    X = widen(X)
+    index = X.index if isinstance(X, pd.DataFrame) else pd.RangeIndex(len(X))
+    names = list(X.columns) if isinstance(X, pd.DataFrame) else [f"x{i}" for i in range(X.shape[1])]
+    X = np.asarray(X, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    mask = np.isfinite(X).all(axis=1) & np.isfinite(y)
+    x_mean = X[mask].mean(axis=0) if mask.any() else np.zeros(X.shape[1])
+    y_mean = y[mask].mean() if mask.any() else 0.0
+    Xc = np.hstack([np.ones((len(X), 1)), np.where(mask[:, None], X - x_mean, 0.0)])
+    yc = np.where(mask, y - y_mean, 0.0)
+    p = Xc.shape[1]
+    min_periods = config.min_periods or (config.window if config.method == "rolling" else p + 1)
+    observed = np.cumsum(mask)
+
+    beta = np.full((len(X), p), np.nan)
+    for start, stop, sums in _window_sums(Xc, yc, mask, config):
+        xtx = sums[:, :p * p].reshape(-1, p, p)
+        xty = sums[:, p * p:p * p + p]
+        count = sums[:, -1] if config.method == "rolling" else observed[start:stop]
+        ok = count >= min_periods
+        if not ok.any():
+            continue
+        beta[start:stop][ok] = _solve(xtx[ok], xty[ok], config.rcond)
+
+    # Back to the original scale: only the intercept moves
+    slopes = beta[:, 1:]
+    intercept = beta[:, 0] + y_mean - slopes @ x_mean
+    coefficients = pd.DataFrame(np.column_stack([intercept, slopes]), index=index, columns=["Intercept"] + names)
+    design = np.hstack([np.ones((len(X), 1)), X])
+    fitted = np.einsum("ij,ij->i", design, coefficients.to_numpy())
+    previous = np.vstack([np.full((1, p), np.nan), coefficients.to_numpy()[:-1]])
+    forecast = np.einsum("ij,ij->i", design, previous)
+    return RollingOLSResult(coefficients, pd.Series(fitted, index=index), pd.Series(forecast, index=index),
+                            pd.Series(y - forecast, index=index), config)
+
+
+class RollingOLS:
+    """LinearRegression stand-in with time-varying coefficients.
+
+    ``fit`` takes the full time-ordered history. ``predict`` returns the
+    walk-forward forecast for rows it has seen, NaN for those with too few
+    earlier rows to have one, and uses the latest coefficients for new rows only.
+    """
+
+    def __init__(self, config: RollingOLSConfig = RollingOLSConfig()):
+        self.config = config
+        self.result_ = None
+
+    def fit(self, X, y):
+        self.result_ = rolling_ols(X, y, self.config)
+        latest = self.result_.coefficients.dropna()
+        latest = latest.iloc[-1] if len(latest) else pd.Series(0.0, index=self.result_.coefficients.columns)
+        self.intercept_ = np.array([latest["Intercept"]])
+        self.coef_ = latest.drop("Intercept").to_numpy()
+        return self
+
+    def predict(self, X):
+        X = widen(X)
+        if isinstance(X, pd.DataFrame):
+            values = self.result_.forecast.reindex(X.index).to_numpy().copy()
+            # The latest coefficients were fitted on later rows, so they may only forecast rows after the history
+            fresh = ~X.index.isin(self.result_.forecast.index)
+            values[fresh] = X.to_numpy()[fresh] @ self.coef_ + self.intercept_[0]
+            return values
+        return np.asarray(X) @ self.coef_ + self.intercept_[0]
+
+    def walk_forward_coefficients(self, X):
+        """Per-row ``(intercept, slopes)`` behind ``predict(X)`` for a DataFrame: the previous row's fit for rows
+        in the history (NaN before there is one), the latest fit for new rows."""
+        X = widen(X)
+        coefficients = self.result_.coefficients
+        rows = coefficients.shift(1).reindex(X.index).to_numpy(copy=True)
+        fresh = ~X.index.isin(coefficients.index)
+        rows[fresh] = np.concatenate([self.intercept_, self.coef_])
+        return rows[:, 0], rows[:, 1:]
+
+    def __repr__(self):
+        c = self.config
+        detail = {"rolling": f"window={c.window}", "rls": f"forgetting={c.forgetting}", "expanding": ""}[c.method]
+        return f"RollingOLS(method={c.method!r}{', ' + detail if detail else ''})"
@@ -0,0 +1,233 @@
+"""Run one pipeline configuration across a universe of symbols.
+
+Each symbol's history lives once in the local ``DatasetStore``, and a universe is
+a mapping of symbol to ``DatasetHandle``. Workers receive only the handles and
+memory-map the data themselves. A handle's fingerprint is a hash of its
+content, so the fingerprint changes exactly when the data does.
+
+Per symbol, these are cached in the shared frame cache:
+- the preprocessed frame, keyed by fingerprint and preprocessing config;
+- the engineered frame, keyed by fingerprint, preprocessing config and window;
+- the finished ranking rows, keyed by fingerprint and the whole config.
+
+A re-run, or a universe refresh in which most symbols did not change, runs the
+pipeline only for the symbols whose data or configuration changed. Those run
+on a process pool. Everything else is read back from the cache.
+"""
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from engine import backtest, compact, horizons, stages
+from engine.cache import SharedFrameCache, range_ttl
+from engine.datasets import DatasetStore
+from engine.errors import EmptyDataError
+from engine.pipeline import PipelineConfig, default_features
+
+# Ranking metric -> sort ascending (lower is better)
+METRICS = {"R²": False, "RMSE": True, "Sharpe": False}
+POOL_MIN_SYMBOLS = 16  # fewer changed symbols than this run in-process; worker start-up would dominate
+COLUMNS = ["Symbol", "Model", "R²", "RMSE", "Sharpe", "Total return", "Max drawdown", "Rows", "Fingerprint"]
+
+
+@dataclass
+class ScreenerConfig:
+    pipeline: PipelineConfig = field(default_factory=PipelineConfig)
+    max_horizon: int = 0  # also build Return_t+h / Up_t+h targets up to this horizon (see engine.horizons)
+    backtest: backtest.BacktestConfig = field(default_factory=backtest.BacktestConfig)
+    workers: int | None = None  # default: one process per core for large runs; 1 runs in this process
+    cache_dir: str | None = None  # shared frame cache directory (default: engine.cache.default_directory())
+
+
+@dataclass
+class ScreenerResult:
+    table: pd.DataFrame  # one row per symbol and regression model, best first
+    errors: dict = field(default_factory=dict)  # symbol -> why it could not be screened
+    recomputed: list = field(default_factory=list)  # symbols that ran the pipeline (the rest came from the cache)
+    seconds: float = 0.0
+
+    @property
+    def symbols_per_minute(self) -> float:
+        symbols = self.table["Symbol"].nunique() + len(self.errors)
+        return symbols / self.seconds * 60 if self.seconds > 0 else float("inf")
+
+
+def _digest(*parts) -> str:
+    # Config dataclasses have deterministic reprs, which is all a cache key needs
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:16]
+
+
+_caches = {}
+
+
+def _cache(directory) -> SharedFrameCache:
+    # One instance per directory and process; worker processes build their own
+    if directory not in _caches:
+        _caches[directory] = SharedFrameCache(directory)
+    return _caches[directory]
+
+
+def rank(table: pd.DataFrame, metric: str = "R²") -> pd.DataFrame:
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric {metric!r}; expected one of {', '.join(METRICS)}")
+    return table.sort_values(metric, ascending=METRICS[metric], na_position="last", kind="stable").reset_index(drop=True)
+
+
+def load_universe(symbols, start_date: str, end_date: str, fetch, cache: SharedFrameCache | None = None,
+                  store: DatasetStore | None = None, refresh: bool = False, workers: int = 8, job=None):
+    """Download (or reuse) each symbol's history and put it in the dataset store.
+
+    ``fetch`` has the signature of ``engine.fetch_ohlcv``. Histories are cached
+    under the same ``ohlcv:`` keys the app uses, so symbols a session already
+    loaded are not downloaded again. ``refresh`` drops those entries first.
+    Returns ``(handles, errors)``.
+    """
+    cache = cache or SharedFrameCache()
+    store = store or DatasetStore()
+    symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
+
+    def load(symbol):
+        if job is not None:
+            job.check()
+        key = f"ohlcv:{symbol}:{start_date}:{end_date}"
+        if refresh:
+            cache.invalidate(key)
+        df = cache.get_frame(key, lambda: fetch(symbol, start_date, end_date), range_ttl(end_date))
+        if df is None or df.empty:
+            raise EmptyDataError(f"No data for {symbol}")
+        return store.put(df)
+
+    handles, errors = {}, {}
+    # Downloads wait on the network, so threads are enough
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(symbols) or 1)),
+                            thread_name_prefix="market-master-universe") as pool:
+        futures = {pool.submit(load, symbol): symbol for symbol in symbols}
+        for done, future in enumerate(as_completed(futures), 1):
+            symbol = futures[future]
+            try:
+                handles[symbol] = future.result()
+            except Exception as e:
+                errors[symbol] = str(e)
+            if job is not None:
+                job.report(0.5 * done / len(symbols), f"Loaded {done} of {len(symbols)} symbols")
+    return {s: handles[s] for s in symbols if s in handles}, errors
+
+
+def _stages(handle, config, cache):
+    pipeline = config.pipeline
+    pre_key = _digest(pipeline.preprocess_config)
+    processed = cache.get_frame(f"screener:preprocess:{handle.fingerprint}:{pre_key}",
+                                lambda: stages.preprocess(handle.to_pandas(), pipeline.preprocess_config).df
+                                .reset_index(drop=True))
+
+    def engineer():
+        featured = stages.add_rolling_features(processed, pipeline.features_config.window).df
+        return horizons.add_targets(featured, config.max_horizon)[0] if config.max_horizon else featured
+
+    featured = cache.get_frame(f"screener:features:{handle.fingerprint}:"
+                               f"{_digest(pre_key, pipeline.features_config.window, config.max_horizon)}", engineer)
+    return compact.compact_frame(featured) if pipeline.compact else featured
+
+
+def _screen(symbol, handle, config) -> pd.DataFrame:
+    pipeline = config.pipeline
+    featured = _stages(handle, config, _cache(config.cache_dir))
+    target = pipeline.target
+    if target not in featured.columns:
+        raise EmptyDataError(f"{symbol} has no {target} column")
+    features = pipeline.features or [c for c in default_features(featured, target) if not horizons.is_target_column(c)]
+    missing = [c for c in features if c not in featured.columns]
+    if missing:
+        raise EmptyDataError(f"{symbol} has no {', '.join(missing)} column")
+    modelled = featured.copy()
+    if pipeline.features_config.scale:
+        stages.scale_features(modelled, features)
+    # Always the latest rows: the backtest behind the Sharpe column must not trade bars the model was fitted after
+    data = stages.split(modelled, features, target, dataclasses.replace(pipeline.split_config, shuffle=False))
+    models = stages.train(data, pipeline.train_config)
+    evaluation = stages.evaluate(models, data.X_test, data.y_test)
+    continuous = stages.is_continuous(data.y_test)
+    # Prices for the backtest come from the unscaled frame
+    prices = featured[[c for c in ("Date", "Close") if c in featured.columns]]
+    # A target with no tradable reading (e.g. Volume) is still ranked by R² and RMSE, without backtest columns
+    tradable = backtest.scorable(target, continuous) and "Close" in prices.columns
+    rows = []
+    for metrics in evaluation.metrics.to_dict("records"):
+        result = None
+        if tradable:
+            inputs = backtest.prepare(prices, data.y_test, evaluation.y_preds[metrics["Model"]], continuous,
+                                      target=target)
+            result = backtest.run(inputs, config.backtest)
+        rows.append({"Symbol": symbol, "Model": metrics["Model"], "R²": metrics["R²"], "RMSE": metrics["RMSE"],
+                     "Sharpe": result.sharpe if result else np.nan,
+                     "Total return": result.total_return if result else np.nan,
+                     "Max drawdown": result.max_drawdown if result else np.nan, "Rows": len(featured),
+                     "Fingerprint": handle.fingerprint})
+    if not rows:
+        raise EmptyDataError("No regression model to rank; K-Means alone has no R², RMSE or Sharpe")
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def _row_key(handle, config) -> str:
+    return f"screener:rows:v2:{handle.fingerprint}:{_digest(config.pipeline, config.max_horizon, config.backtest)}"
+
+
+def _screen_symbol(symbol, handle, config):
+    # Runs in a worker process; failures come back as values so one bad symbol never stops the universe
+    try:
+        cache = _cache(config.cache_dir)
+        return symbol, cache.get_frame(_row_key(handle, config), lambda: _screen(symbol, handle, config)), None
+    except Exception as e:
+        return symbol, None, f"{type(e).__name__}: {e}"
+
+
+def screen(universe: dict, config: ScreenerConfig = ScreenerConfig(), metric: str = "R²", job=None) -> ScreenerResult:
+    """Rank every symbol in ``universe`` (symbol -> DatasetHandle) by ``metric``."""
+    started = time.perf_counter()
+    cache = _cache(config.cache_dir)
+    frames, errors, todo = [], {}, []
+    for symbol, handle in universe.items():
+        # Unchanged symbols never reach the pool
+        rows = cache.get_frame(_row_key(handle, config), lambda: None)
+        if rows is None:
+            todo.append(symbol)
+        else:
+            frames.append(rows)
+
+    def finished(done, symbol, rows, error):
+        if rows is not None:
+            frames.append(rows)
+        else:
+            errors[symbol] = error
+        if job is not None:
+            job.check()
+            job.report(0.5 + 0.5 * done / len(todo), f"Screened {done} of {len(todo)} changed symbols")
+
+    workers = config.workers or (os.cpu_count() or 1 if len(todo) >= POOL_MIN_SYMBOLS else 1)
+    workers = min(workers, len(todo))
+    if workers > 1:
+        import multiprocessing
+        # spawn: forking a process that runs Streamlit's threads is not safe
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(_screen_symbol, symbol, universe[symbol], config) for symbol in todo]
+            try:
+                for done, future in enumerate(as_completed(futures), 1):
+                    finished(done, *future.result())
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+    else:
+        for done, symbol in enumerate(todo, 1):
+            finished(done, *_screen_symbol(symbol, universe[symbol], config))
+
+    table = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=COLUMNS)
+    return ScreenerResult(rank(table, metric), errors, todo, time.perf_counter() - started)
@@ -0,0 +1,252 @@
+"""Per-process memory governor for the artifacts that Streamlit sessions keep alive.
+
+Each session registers the plain dicts in its session state that hold large
+values (splits, fitted models, predictions, memoised stage outputs). Between
+reruns the governor knows how many bytes every session holds and when it last
+ran. Sessions idle for longer than ``idle_seconds`` are spilled: their
+artifacts are pickled to local disk and dropped from memory. When the total
+goes over ``max_bytes``, the least recently used sessions are spilled until it
+fits. A spilled session is restored transparently the next time it runs.
+
+Spilling runs on one background thread after a session's run ends, so no
+session's script thread waits on pickling another session's artifacts. Requests
+that arrive while a pass is still queued share that pass.
+"""
+from __future__ import annotations
+
+import contextlib
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_BYTES = 1024 * 2**20
+DEFAULT_IDLE_SECONDS = 600
+
+
+def default_directory():
+    return os.path.join(tempfile.gettempdir(), "market_master_sessions")
+
+
+def deep_sizeof(obj, _depth=0, _seen=None) -> int:
+    """Rough bytes held by ``obj``: exact for pandas/numpy, recursive for containers and plain objects."""
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if obj is None or isinstance(obj, (bool, int, float, str, bytes)) or _depth > 6:
+        return sys.getsizeof(obj)
+    _seen = set() if _seen is None else _seen
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(deep_sizeof(v, _depth + 1, _seen) for v in obj.values())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(deep_sizeof(v, _depth + 1, _seen) for v in obj)
+    if hasattr(obj, "__dict__"):
+        return sys.getsizeof(obj) + sum(deep_sizeof(v, _depth + 1, _seen) for v in vars(obj).values())
+    return sys.getsizeof(obj)
+
+
+@dataclass
+class SessionEntry:
+    session_id: str
+    stores: list = field(default_factory=list)  # [(dict, keys or None for every key)]
+    last_seen: float = field(default_factory=time.time)
+    nbytes: int = 0
+    spilled_path: str | None = None
+    spilled_bytes: int = 0
+    spill_targets: list = field(default_factory=list)  # [(dict, key)] in the order they were pickled
+    notice: str | None = None  # shown to the session on its next run
+    lock: threading.RLock = field(default_factory=threading.RLock)  # re-entered by fragment runs inside a full run
+
+    def items(self):
+        for store, keys in self.stores:
+            for key in (list(store) if keys is None else keys):
+                if store.get(key) is not None:
+                    yield store, key
+
+
+@dataclass
+class GovernorStats:
+    sessions: int = 0
+    resident_bytes: int = 0
+    spilled_sessions: int = 0
+    spilled_bytes: int = 0
+    spills: int = 0
+    restores: int = 0
+
+
+class SessionGovernor:
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES, idle_seconds=DEFAULT_IDLE_SECONDS,
+                 forget_after=24 * 3600):
+        self.directory = directory or default_directory()
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.forget_after = forget_after
+        os.makedirs(self.directory, exist_ok=True)
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._spills = 0
+        self._restores = 0
+        self._enforcer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="market-master-governor")
+        self._queued = False
+
+    def _entry(self, session_id):
+        with self._lock:
+            return self._entries.setdefault(session_id, SessionEntry(session_id))
+
+    @contextlib.contextmanager
+    def session(self, session_id, stores, on_lost=None):
+        """Wrap one run of a session: restores spilled artifacts and yields a notice to show (or None).
+
+        If the spilled artifacts cannot be read back, their keys are removed from
+        the stores and ``on_lost()`` is called, so the caller can reset whatever
+        depended on them. On exit ``stores()`` returns ``[(dict, keys or None for every key)]`` to re-measure, then the
+        limits are enforced on the other sessions in the background.
+        """
+        entry = self._entry(session_id)
+        acquired = entry.lock.acquire(timeout=60)
+        try:
+            entry.last_seen = time.time()
+            if entry.spilled_path:
+                self._restore(entry, on_lost)
+            notice, entry.notice = entry.notice, None
+            yield notice
+        finally:
+            try:
+                entry.stores = list(stores())
+                entry.nbytes = sum(deep_sizeof(store[key]) for store, key in entry.items())
+                entry.last_seen = time.time()
+            finally:
+                if acquired:
+                    entry.lock.release()
+        self.enforce_later(skip=session_id)
+
+    def enforce_later(self, skip=None):
+        """Queue an ``enforce`` pass on the governor's thread; a no-op while one is already queued."""
+        with self._lock:
+            if self._queued:
+                return
+            self._queued = True
+        self._enforcer.submit(self._enforce_queued, skip)
+
+    def _enforce_queued(self, skip):
+        with self._lock:
+            self._queued = False
+        # An exception stays in the discarded future: the pass leaves memory resident and the next run queues another
+        self.enforce(skip=skip)
+
+    def enforce(self, now=None, skip=None):
+        now = now or time.time()
+        self.forget(self.forget_after)
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda e: e.last_seen)
+        resident = sum(e.nbytes for e in entries if not e.spilled_path)
+        for entry in entries:
+            idle = now - entry.last_seen >= self.idle_seconds
+            if entry.session_id == skip or entry.spilled_path or entry.nbytes == 0 or not (idle or resident > self.max_bytes):
+                continue
+            # A session that is running right now is never touched
+            if not entry.lock.acquire(blocking=False):
+                continue
+            try:
+                # Check again under the lock: the session may have run since the snapshot
+                idle = now - entry.last_seen >= self.idle_seconds
+                if entry.spilled_path or entry.nbytes == 0 or not (idle or resident > self.max_bytes):
+                    continue
+                reason = "idle" if idle else "memory"
+                freed = self._spill(entry, reason)
+                resident -= freed
+            finally:
+                entry.lock.release()
+
+    def _spill(self, entry, reason):
+        targets = list(entry.items())
+        if not targets:
+            return 0
+        path = os.path.join(self.directory, f"{entry.session_id}.pkl")
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump([store[key] for store, key in targets], f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except Exception:
+            # Unpicklable or disk full: leave the session resident rather than lose its results
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp)
+            return 0
+        entry.spill_targets = targets
+        for store, key in targets:
+            store[key] = None
+        entry.spilled_path, entry.spilled_bytes = path, entry.nbytes
+        entry.notice = (f"Your session was {'idle' if reason == 'idle' else 'parked to free server memory'}; "
+                        f"{entry.nbytes / 2**20:.1f} MiB of results were moved to disk and have been restored.")
+        freed, entry.nbytes = entry.nbytes, 0
+        with self._lock:
+            self._spills += 1
+        return freed
+
+    def _restore(self, entry, on_lost=None):
+        lost = False
+        try:
+            with open(entry.spilled_path, "rb") as f:
+                values = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            # The stores still hold the None placeholders; a key that is gone reads as never computed
+            for store, key in entry.spill_targets:
+                if store.get(key) is None:
+                    store.pop(key, None)
+            entry.notice = "Your session's parked results could not be restored; please rerun the affected steps."
+            entry.nbytes, lost = 0, True
+        else:
+            for (store, key), value in zip(entry.spill_targets, values):
+                # Keep anything the session produced since it was spilled
+                if store.get(key) is None:
+                    store[key] = value
+            entry.nbytes = entry.spilled_bytes
+            with self._lock:
+                self._restores += 1
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(entry.spilled_path)
+        entry.spilled_path, entry.spilled_bytes, entry.spill_targets = None, 0, []
+        # Last, once the entry is consistent: the callback may end the run (e.g. to rerun the app)
+        if lost and on_lost is not None:
+            on_lost()
+
+    def discard(self, session_id):
+        """Forget a session for good (e.g. after a reset), deleting its spill file."""
+        self._drop(lambda e: e.session_id == session_id)
+
+    def forget(self, max_age_seconds):
+        """Drop sessions not seen for ``max_age_seconds`` (closed tabs), including their spill files."""
+        cutoff = time.time() - max_age_seconds
+        return self._drop(lambda e: e.last_seen < cutoff)
+
+    def _drop(self, predicate):
+        with self._lock:
+            stale = [e for e in self._entries.values() if predicate(e)]
+            for entry in stale:
+                del self._entries[entry.session_id]
+        for entry in stale:
+            if entry.spilled_path:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(entry.spilled_path)
+        return len(stale)
+
+    def stats(self) -> GovernorStats:
+        with self._lock:
+            entries = list(self._entries.values())
+            spills, restores = self._spills, self._restores
+        return GovernorStats(len(entries), sum(e.nbytes for e in entries if not e.spilled_path),
+                             sum(1 for e in entries if e.spilled_path), sum(e.spilled_bytes for e in entries),
+                             spills, restores)
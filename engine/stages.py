@@ -0,0 +1,234 @@
+"""Pure pipeline stages: preprocessing, features, split, training and evaluation.
+
+Every stage takes plain pandas/numpy inputs plus a small config dataclass and
+returns a result dataclass, so the same code runs under Streamlit, in batch
+jobs, in worker processes and in the benchmarks.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from engine.compact import widen
+from engine.errors import ModelSelectionError
+from engine.horizons import target_horizon
+from engine.preprocessing import PreprocessConfig, process_frame
+from engine.rolling_ols import RollingOLS, RollingOLSConfig
+
+MODEL_TYPES = ["Linear Regression", "Logistic Regression", "K-Means Clustering"]
+REGRESSORS = ["Linear Regression", "Logistic Regression"]
+
+
+def is_continuous(series) -> bool:
+    return pd.api.types.is_numeric_dtype(series) and len(series.unique()) > 10
+
+
+# Step 2: preprocessing
+@dataclass
+class PreprocessResult:
+    df: pd.DataFrame
+    missing: pd.Series
+    clipped_columns: list[str] = field(default_factory=list)
+
+    @property
+    def had_missing(self) -> bool:
+        return bool(self.missing.sum())
+
+
+def fill_missing(df: pd.DataFrame, strategy: str = "mean") -> pd.DataFrame:
+    process_frame(df, PreprocessConfig(fill=strategy), clip=False)
+    return df
+
+
+def clip_outliers(df: pd.DataFrame, k: float = 1.5, config: PreprocessConfig | None = None) -> list[str]:
+    config = config or PreprocessConfig(iqr_k=k)
+    return process_frame(df, config, fill=False)[2]
+
+
+def preprocess(df: pd.DataFrame, config: PreprocessConfig | None = None) -> PreprocessResult:
+    config = config or PreprocessConfig()
+    df = df.copy()
+    missing = df.isnull().sum()
+    # One pass over one numeric block: fill (only when something is missing) then clip
+    _, _, cols = process_frame(df, config, fill=bool(missing.sum()))
+    return PreprocessResult(df, missing, cols)
+
+
+# Step 3: feature engineering
+@dataclass
+class FeatureConfig:
+    window: int = 20
+    scale: bool = True
+
+
+@dataclass
+class FeatureResult:
+    df: pd.DataFrame
+    added: list[str] = field(default_factory=list)
+
+
+def add_rolling_features(df: pd.DataFrame, window: int = 20) -> FeatureResult:
+    df = df.copy()
+    if 'Close' not in df.columns:
+        return FeatureResult(df)
+    df[f'MA_{window}'] = df['Close'].rolling(window=window).mean().fillna(df['Close'])
+    df[f'Volatility_{window}'] = df['Close'].rolling(window=window).std().fillna(df['Close'].std())
+    df['Daily_Return'] = df['Close'].pct_change().fillna(0)
+    return FeatureResult(df, [f'MA_{window}', f'Volatility_{window}', 'Daily_Return'])
+
+
+def numeric_columns(df: pd.DataFrame) -> list[str]:
+    return df.select_dtypes(np.number).columns.tolist()
+
+
+def scale_features(df: pd.DataFrame, features: list[str]) -> pd.DataFrame:
+    from sklearn.preprocessing import StandardScaler
+    df[features] = StandardScaler().fit_transform(df[features])
+    return df
+
+
+def correlation(df: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+    return df[columns].corr()
+
+
+# Step 4: train/test split
+@dataclass
+class SplitConfig:
+    test_size: float = 0.2
+    random_state: int = 42
+    shuffle: bool = True  # False: hold out the latest test_size of rows, in time order (always so for t+h targets)
+
+
+@dataclass
+class SplitResult:
+    X_train: pd.DataFrame
+    X_test: pd.DataFrame
+    y_train: pd.Series
+    y_test: pd.Series
+
+
+def split(df: pd.DataFrame, features: list[str], target: str, config: SplitConfig = SplitConfig()) -> SplitResult:
+    from sklearn.model_selection import train_test_split
+    X = df[features].dropna()
+    # Future targets (engine.horizons) are missing for the last rows
+    y = df[target].loc[X.index].dropna()
+    X = X.loc[y.index]
+    h = target_horizon(target)
+    if not config.shuffle or h:
+        # Rows are in time order, so no model is trained on bars that come after a test bar. A t+h target
+        # spans the next h bars: the last h training rows would share price moves with the test block, so
+        # they are purged (a shuffled split would mix such overlapping rows all through train and test)
+        cut = len(X) - int(np.ceil(len(X) * config.test_size))
+        train = slice(0, max(cut - h, 0))
+        return SplitResult(X.iloc[train], X.iloc[cut:], y.iloc[train], y.iloc[cut:])
+    return SplitResult(*train_test_split(X, y, test_size=config.test_size, random_state=config.random_state))
+
+
+def is_chronological(data: SplitResult) -> bool:
+    """True when every test row comes after every training row, as a backtest needs."""
+    if data.X_train is None or not len(data.X_train) or not len(data.X_test):
+        return True
+    return data.X_train.index.max() < data.X_test.index.min()
+
+
+# Step 5: training
+@dataclass
+class TrainConfig:
+    model_types: list[str] = field(default_factory=lambda: ["Linear Regression"])
+    n_clusters: int = 3
+    k_range: tuple[int, int] | None = None  # sweep K-Means over this range and keep the best K (see engine.regimes)
+    linear_fit: RollingOLSConfig | None = None  # time-varying Linear Regression (see engine.rolling_ols)
+
+
+def validate_model_types(model_types: list[str], y_train: pd.Series) -> None:
+    target_is_continuous = is_continuous(y_train)
+    if "Linear Regression" in model_types and not target_is_continuous:
+        raise ModelSelectionError("linear_needs_continuous", "Linear Regression needs a continuous target")
+    if "Logistic Regression" in model_types and target_is_continuous:
+        raise ModelSelectionError("logistic_needs_categorical", "Logistic Regression needs a categorical target")
+
+
+def build_models(config: TrainConfig) -> dict:
+    from sklearn.cluster import KMeans
+    from sklearn.linear_model import LinearRegression, LogisticRegression
+    models = {}
+    if "K-Means Clustering" in config.model_types:
+        models["K-Means Clustering"] = KMeans(n_clusters=config.n_clusters, random_state=42)
+    if "Linear Regression" in config.model_types:
+        models["Linear Regression"] = RollingOLS(config.linear_fit) if config.linear_fit else LinearRegression()
+    if "Logistic Regression" in config.model_types:
+        models["Logistic Regression"] = LogisticRegression(max_iter=1000)
+    return models
+
+
+def full_history(data: SplitResult) -> tuple[pd.DataFrame, pd.Series]:
+    """Train and test rows back in the engineered frame's row order, for fits that walk through time."""
+    X = pd.concat([data.X_train, data.X_test]).sort_index()
+    return X, pd.concat([data.y_train, data.y_test]).loc[X.index]
+
+
+def fit_model(model_type: str, model, X_train, y_train, history=None):
+    if isinstance(model, RollingOLS):
+        # Coefficients evolve over the whole history; test rows are scored by walk-forward forecasts
+        X, y = history if history is not None else (X_train.sort_index(), y_train.sort_index())
+        return model.fit(X, y)
+    X_train = widen(X_train)
+    return model.fit(X_train, y_train if model_type != "K-Means Clustering" else X_train)
+
+
+def train(data: SplitResult, config: TrainConfig) -> dict:
+    validate_model_types(config.model_types, data.y_train)
+    models = build_models(config)
+    for model_type, model in models.items():
+        if model_type == "K-Means Clustering" and config.k_range:
+            from engine.regimes import RegimeSweepConfig, sweep
+            models[model_type] = sweep(data.X_train, RegimeSweepConfig(*config.k_range)).best_model
+        else:
+            fit_model(model_type, model, data.X_train, data.y_train, full_history(data))
+    return models
+
+
+def model_details(model_type: str, model, features: list[str]) -> pd.DataFrame:
+    if model_type in REGRESSORS:
+        return pd.DataFrame({
+            'Feature': ['Intercept'] + list(features),
+            'Coefficient': list(np.ravel(model.intercept_))[:1] + list(model.coef_.flatten())
+        })
+    return pd.DataFrame(model.cluster_centers_, columns=features)
+
+
+# Step 6: evaluation
+@dataclass
+class EvaluationResult:
+    y_preds: dict
+    metrics: pd.DataFrame
+
+
+def predict(models: dict, X_test) -> dict:
+    X_test = widen(X_test)
+    return {mt: m.predict(X_test) for mt, m in models.items()}
+
+
+def score(y_test, y_preds: dict) -> pd.DataFrame:
+    from sklearn.metrics import mean_squared_error, r2_score
+    rows = []
+    for mt, yp in y_preds.items():
+        if mt == "K-Means Clustering":
+            continue
+        # Walk-forward fits (RollingOLS) have no forecast for rows before their first full window
+        yp = np.asarray(yp)
+        scored = pd.notna(yp)
+        y = np.asarray(y_test)[scored]
+        rows.append({'Model': mt, 'RMSE': np.sqrt(mean_squared_error(y, yp[scored])), 'R²': r2_score(y, yp[scored])})
+    return pd.DataFrame(rows, columns=['Model', 'RMSE', 'R²'])
+
+
+def evaluate(models: dict, X_test, y_test) -> EvaluationResult:
+    y_preds = predict(models, X_test)
+    return EvaluationResult(y_preds, score(y_test, y_preds))
+
+
+def regression_predictions(y_preds: dict) -> dict:
+    return {mt: yp for mt, yp in y_preds.items() if mt != "K-Means Clustering"}
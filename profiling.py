@@ -0,0 +1,170 @@
+"""Per-stage timing and memory instrumentation.
+
+A ``Profiler`` records wall time, CPU time, peak traced-memory delta and payload
+bytes for each pipeline step, sub-stage and chart render. Records are kept per
+session and also folded into process-wide totals for Prometheus scraping.
+
+tracemalloc slows every allocation in the process, so it runs only while at
+least one memory-tracing profiler is alive. The last one to close (or be
+garbage collected with its session) stops it, unless something else started it.
+"""
+import contextlib
+import functools
+import json
+import threading
+import time
+import tracemalloc
+import weakref
+
+MAX_RECORDS = 500
+
+_totals = {}
+_totals_lock = threading.Lock()
+_tracers = 0
+_started_tracing = False
+_tracing_lock = threading.Lock()
+
+
+def _start_tracing():
+    global _tracers, _started_tracing
+    with _tracing_lock:
+        if _tracers == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        _tracers += 1
+
+
+def _stop_tracing():
+    global _tracers, _started_tracing
+    with _tracing_lock:
+        _tracers -= 1
+        if _tracers == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+def _add_to_totals(record):
+    key = (record["kind"], record["stage"])
+    with _totals_lock:
+        t = _totals.setdefault(key, {"count": 0, "wall_s": 0.0, "cpu_s": 0.0, "payload_bytes": 0,
+                                     "peak_mem_bytes": 0})
+        t["count"] += 1
+        t["wall_s"] += record["wall_s"]
+        t["cpu_s"] += record["cpu_s"]
+        t["payload_bytes"] += record["payload_bytes"]
+        t["peak_mem_bytes"] = max(t["peak_mem_bytes"], record["peak_mem_bytes"])
+
+
+def process_totals():
+    with _totals_lock:
+        return {k: dict(v) for k, v in _totals.items()}
+
+
+class Profiler:
+    def __init__(self, trace_memory=True):
+        self.records = []
+        self.trace_memory = trace_memory
+        self._peaks = []
+        # Runs on close() or when the session drops the profiler, whichever comes first
+        self._finalizer = weakref.finalize(self, _stop_tracing) if trace_memory else None
+        if trace_memory:
+            _start_tracing()
+
+    def close(self):
+        if self._finalizer is not None:
+            self._finalizer()
+
+    @contextlib.contextmanager
+    def stage(self, name, kind="stage"):
+        # Yields a dict; callers may set "payload_bytes" on it
+        extra = {"payload_bytes": 0}
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            # tracemalloc and its peak are process-wide, so concurrent sessions can inflate each other's peaks.
+            # Nested stages reset the peak, so hand the parent what it has seen so far first.
+            mem_start, peak = tracemalloc.get_traced_memory()
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            tracemalloc.reset_peak()
+        self._peaks.append(0)
+        wall0, cpu0 = time.perf_counter(), time.thread_time()
+        try:
+            yield extra
+        finally:
+            wall, cpu = time.perf_counter() - wall0, time.thread_time() - cpu0
+            peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1]) if tracing else 0
+            if tracing and self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            record = {
+                "stage": name, "kind": kind, "depth": len(self._peaks), "started_at": time.time() - wall,
+                "wall_s": wall, "cpu_s": cpu, "peak_mem_bytes": max(peak - mem_start, 0) if tracing else 0,
+                "payload_bytes": int(extra["payload_bytes"]),
+            }
+            self.records.append(record)
+            del self.records[:-MAX_RECORDS]
+            _add_to_totals(record)
+
+    def wrap(self, fn, name=None, kind="step"):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with self.stage(name or fn.__name__, kind):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    def summary(self):
+        rows = {}
+        for r in self.records:
+            row = rows.setdefault((r["kind"], r["stage"]), {"kind": r["kind"], "stage": r["stage"], "calls": 0,
+                                                            "wall_s": 0.0, "cpu_s": 0.0, "peak_mem_bytes": 0,
+                                                            "payload_bytes": 0, "last_wall_s": 0.0})
+            row["calls"] += 1
+            row["wall_s"] += r["wall_s"]
+            row["cpu_s"] += r["cpu_s"]
+            row["peak_mem_bytes"] = max(row["peak_mem_bytes"], r["peak_mem_bytes"])
+            row["payload_bytes"] += r["payload_bytes"]
+            row["last_wall_s"] = r["wall_s"]
+        return sorted(rows.values(), key=lambda row: -row["wall_s"])
+
+    def clear(self):
+        self.records.clear()
+
+    def to_json(self):
+        return json.dumps({"records": self.records, "summary": self.summary()}, indent=2)
+
+
+class NullProfiler:
+    records = []
+
+    @contextlib.contextmanager
+    def stage(self, name, kind="stage"):
+        yield {"payload_bytes": 0}
+
+    def wrap(self, fn, name=None, kind="step"):
+        return fn
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def to_prometheus(totals=None, prefix="market_master", gauges=None):
+    totals = process_totals() if totals is None else totals
+    metrics = [
+        ("stage_calls_total", "counter", "Number of profiled stage executions", "count"),
+        ("stage_wall_seconds_total", "counter", "Wall-clock time spent in the stage", "wall_s"),
+        ("stage_cpu_seconds_total", "counter", "Thread CPU time spent in the stage", "cpu_s"),
+        ("stage_payload_bytes_total", "counter", "Bytes serialised for the browser", "payload_bytes"),
+        ("stage_peak_memory_bytes", "gauge", "Largest traced-memory peak above the stage's starting point",
+         "peak_mem_bytes"),
+    ]
+    lines = []
+    for name, mtype, help_text, field in metrics:
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} {mtype}")
+        for (kind, stage), values in sorted(totals.items()):
+            lines.append(f'{prefix}_{name}{{kind="{_label(kind)}",stage="{_label(stage)}"}} {values[field]}')
+    for name, value in (gauges or {}).items():
+        mtype = "counter" if name.endswith("_total") else "gauge"
+        lines.append(f"# TYPE {prefix}_{name} {mtype}")
+        lines.append(f"{prefix}_{name} {value}")
+    return "\n".join(lines) + "\n"
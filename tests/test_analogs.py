@@ -0,0 +1,44 @@
+import numpy as np
+
+from engine import analogs
+
+
+def brute_force(series, query):
+    m = len(query)
+    q = (query - query.mean()) / query.std()
+    out = np.empty(len(series) - m + 1)
+    for i in range(len(out)):
+        w = series[i:i + m]
+        out[i] = (((w - w.mean()) / w.std() - q) ** 2).sum()
+    return out
+
+
+def random_walk(rows, seed=0):
+    return 100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.01, rows)))
+
+
+def test_sliding_dot_matches_numpy():
+    series, query = random_walk(500), random_walk(25, seed=1)
+    expected = np.array([query @ series[i:i + 25] for i in range(len(series) - 24)])
+    np.testing.assert_allclose(analogs.sliding_dot(query, series), expected, rtol=1e-9)
+
+
+def test_distance_profile_matches_brute_force():
+    series = random_walk(2_000)
+    for query in (series[-30:], random_walk(50, seed=2)):
+        np.testing.assert_allclose(analogs.distance_profile(series, query), brute_force(series, query), atol=1e-6)
+
+
+def test_distance_profile_is_level_and_scale_free():
+    series = random_walk(400)
+    query = series[100:140]
+    np.testing.assert_allclose(analogs.distance_profile(series, query * 3 + 50),
+                               analogs.distance_profile(series, query), atol=1e-6)
+    assert analogs.distance_profile(series, query)[100] < 1e-6
+
+
+def test_flat_windows():
+    series = np.r_[np.full(20, 5.0), random_walk(50)]
+    profile = analogs.distance_profile(series, np.full(10, 7.0))
+    assert profile[0] == 0
+    assert (profile[20:] == 10).all()
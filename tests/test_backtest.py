@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine import backtest
+
+
+def make_frame(rows=50, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    return pd.DataFrame({"Date": pd.date_range("2024-01-01", periods=rows, freq="B"), "Close": close})
+
+
+def test_forward_target_scores_ignore_the_realised_values():
+    df = make_frame()
+    y_test = pd.Series(np.random.default_rng(1).normal(size=20), index=df.index[30:])
+    prediction = np.random.default_rng(2).normal(size=20)
+    inputs = backtest.prepare(df, y_test, prediction, True, target="Return_t+5")
+    shuffled = backtest.prepare(df, y_test.sample(frac=1, random_state=0).set_axis(y_test.index), prediction, True,
+                                target="Return_t+5")
+    np.testing.assert_array_equal(inputs.scores, prediction)
+    np.testing.assert_array_equal(inputs.scores, shuffled.scores)
+
+
+def test_positions_earn_the_next_bars_return():
+    df = make_frame()
+    y_test = df["Close"].iloc[30:]
+    inputs = backtest.prepare(df, y_test, y_test * 1.01, True)
+    np.testing.assert_allclose(inputs.returns[:-1], y_test.to_numpy()[1:] / y_test.to_numpy()[:-1] - 1)
+    assert inputs.returns[-1] == 0
+    result = backtest.run(inputs, backtest.BacktestConfig(cost_bps=0.0))
+    np.testing.assert_allclose(result.frame["Gross"], result.frame["Position"] * inputs.returns)
+
+
+def test_later_prices_do_not_change_earlier_positions():
+    df = make_frame()
+    y_test = df["Close"].iloc[30:]
+    prediction = y_test.to_numpy() * np.random.default_rng(3).normal(1, 0.01, len(y_test))
+    base = backtest.run(backtest.prepare(df, y_test, prediction, True))
+    changed = df.copy()
+    changed.loc[40:, "Close"] *= 2
+    moved = backtest.run(backtest.prepare(changed, changed["Close"].iloc[30:], prediction, True))
+    # Bar 39's position was set before bar 40 existed; only its return (to bar 40) may differ
+    np.testing.assert_array_equal(base.frame["Position"].iloc[:10], moved.frame["Position"].iloc[:10])
+    np.testing.assert_allclose(base.frame["Net"].iloc[:9], moved.frame["Net"].iloc[:9])
+
+
+def test_untradable_targets_are_rejected():
+    df = make_frame()
+    df["Volume"] = np.arange(len(df), dtype="float64")
+    assert not backtest.scorable("Volume", True)
+    assert backtest.scorable("Volume", False)
+    with pytest.raises(ValueError):
+        backtest.prepare(df, df["Volume"].iloc[30:], df["Volume"].iloc[30:], True, target="Volume")
+
+
+def test_sweep_agrees_with_single_runs():
+    df = make_frame(rows=200)
+    y_test = df["Close"].iloc[100:]
+    prediction = y_test.to_numpy() * np.random.default_rng(4).normal(1, 0.01, len(y_test))
+    inputs = backtest.prepare(df, y_test, prediction, True)
+    thresholds = backtest.default_thresholds(inputs.scores, 5)
+    grid = backtest.sweep(inputs, thresholds, [0.0, 5.0], workers=2, chunk_cells=400)
+    for row in grid.itertuples():
+        single = backtest.run(inputs, backtest.BacktestConfig(row.threshold, row.cost_bps))
+        assert np.isclose(row.sharpe, single.sharpe)
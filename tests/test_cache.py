@@ -0,0 +1,48 @@
+import threading
+import time
+
+import pandas as pd
+
+from engine.cache import SharedFrameCache
+
+
+def test_concurrent_misses_call_the_loader_once(tmp_path):
+    cache = SharedFrameCache(str(tmp_path))
+    calls = []
+    start = threading.Barrier(8)
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.2)
+        return pd.DataFrame({"Close": [1.0, 2.0, 3.0]})
+
+    frames = []
+
+    def fetch():
+        start.wait()
+        frames.append(cache.get_frame("AAPL", loader))
+
+    threads = [threading.Thread(target=fetch) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert all(frame["Close"].tolist() == [1.0, 2.0, 3.0] for frame in frames)
+    stats = cache.stats()
+    assert stats.misses == 1 and stats.hits == 7 and stats.coalesced == 7
+
+
+def test_hits_are_shared_across_instances(tmp_path):
+    SharedFrameCache(str(tmp_path)).get_frame("MSFT", lambda: pd.DataFrame({"Close": [1.0]}))
+    other = SharedFrameCache(str(tmp_path))
+    frame = other.get_frame("MSFT", lambda: None)
+    assert frame["Close"].tolist() == [1.0]
+    assert other.stats().hits == 1
+
+
+def test_ttl_expires(tmp_path):
+    cache = SharedFrameCache(str(tmp_path))
+    cache.get_frame("SPY", lambda: pd.DataFrame({"Close": [1.0]}), ttl=-1)
+    frame = cache.get_frame("SPY", lambda: pd.DataFrame({"Close": [2.0]}))
+    assert frame["Close"].tolist() == [2.0]
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from engine import horizons
+from engine.stages import SplitConfig, split
+
+
+def test_target_horizon():
+    assert horizons.target_horizon("Return_t+5") == 5
+    assert horizons.target_horizon(horizons.direction_column(3)) == 3
+    assert horizons.target_horizon("Close") == 0
+
+
+def test_forward_returns_are_nan_past_the_end():
+    prices = np.array([100.0, 110.0, 99.0, 99.0])
+    out = horizons.forward_returns(prices, [1, 2])
+    np.testing.assert_allclose(out[:, 0], [0.1, -0.1, 0.0, np.nan], equal_nan=True)
+    np.testing.assert_allclose(out[:, 1], [-0.01, -0.1, np.nan, np.nan], equal_nan=True)
+
+
+def test_fit_horizon_purges_the_rows_before_the_test_block():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(100, 2))
+    target = rng.normal(size=100)
+    for h in (1, 5, 10):
+        row, _, _ = horizons._fit_horizon(X, target, h, 80, "return")
+        assert row["train_rows"] == 80 - h
+        assert row["test_rows"] == 20
+
+
+def test_split_purges_a_future_target_even_when_shuffled():
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(1).normal(0, 0.01, 200)))
+    df, _ = horizons.add_targets(pd.DataFrame({"Close": close, "x": np.arange(200.0)}), 5)
+    data = split(df, ["x"], "Return_t+5", SplitConfig(test_size=0.2, shuffle=True))
+    # The last five rows have no target; of the remaining 195, the latest 39 are held out
+    assert data.X_test.index.min() == 156
+    assert data.X_train.index.max() == 156 - 5 - 1
+    assert data.X_train.index.is_monotonic_increasing
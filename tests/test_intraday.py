@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine import intraday
+from engine.errors import EmptyDataError
+
+AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+
+def minute_bars(rows, start="2024-01-02 09:30", seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, rows)))
+    spread = np.abs(rng.normal(0, 0.001, rows))
+    return pd.DataFrame({"Date": pd.date_range(start, periods=rows, freq="min"), "Open": close,
+                         "High": close * (1 + spread), "Low": close * (1 - spread), "Close": close,
+                         "Volume": rng.integers(100, 10_000, rows).astype("float64")})
+
+
+@pytest.mark.parametrize("rule", ["5min", "15min", "1h", "D", "W"])
+def test_resample_matches_pandas(rule):
+    bars = minute_bars(20_000)
+    got = intraday.resample(bars, rule)
+    reference = bars.set_index("Date").resample(rule).agg(AGG).dropna(subset=["Close"])
+    np.testing.assert_allclose(got[list(AGG)].to_numpy(), reference.to_numpy())
+    if rule != "W":
+        # Weekly periods start on Monday, pandas labels W bins by their Sunday end
+        assert (pd.DatetimeIndex(got["Date"]) == reference.index).all()
+
+
+def test_resample_with_gaps_and_unsorted_rows():
+    bars = minute_bars(3_000)
+    bars = bars[(bars["Date"].dt.hour < 12) | (bars["Date"].dt.hour >= 14)]
+    shuffled = bars.sample(frac=1, random_state=0)
+    got = intraday.resample(shuffled, "30min")
+    reference = bars.set_index("Date").resample("30min").agg(AGG).dropna(subset=["Close"])
+    np.testing.assert_allclose(got[list(AGG)].to_numpy(), reference.to_numpy())
+
+
+def test_resample_keeps_the_timezone():
+    bars = minute_bars(600)
+    bars["Date"] = bars["Date"].dt.tz_localize("America/New_York")
+    got = intraday.resample(bars, "1h")
+    reference = bars.set_index("Date").resample("1h").agg(AGG).dropna(subset=["Close"])
+    assert (pd.DatetimeIndex(got["Date"]) == reference.index).all()
+
+
+def test_resample_empty():
+    with pytest.raises(EmptyDataError):
+        intraday.resample(minute_bars(0), "5min")
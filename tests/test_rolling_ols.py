@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from engine.rolling_ols import RollingOLS, RollingOLSConfig, rolling_ols
+
+
+def make_data(rows=300, features=3, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(rows, features)), columns=[f"f{i}" for i in range(features)])
+    beta = 1 + np.sin(np.linspace(0, 6, rows))[:, None] * np.arange(1, features + 1)
+    y = pd.Series((X.to_numpy() * beta).sum(axis=1) + rng.normal(scale=0.1, size=rows))
+    return X, y
+
+
+def test_rolling_matches_sklearn_per_window():
+    X, y = make_data()
+    window = 40
+    got = rolling_ols(X, y, RollingOLSConfig(window=window, chunk_rows=70)).coefficients.to_numpy()
+    assert np.isnan(got[:window - 1]).all()
+    for t in range(window - 1, len(X)):
+        model = LinearRegression().fit(X.iloc[t - window + 1:t + 1], y.iloc[t - window + 1:t + 1])
+        np.testing.assert_allclose(got[t], np.r_[model.intercept_, model.coef_], atol=1e-8)
+
+
+def test_expanding_matches_sklearn_on_the_history():
+    X, y = make_data(rows=120)
+    got = rolling_ols(X, y, RollingOLSConfig("expanding", chunk_rows=50)).coefficients.to_numpy()
+    for t in (10, 49, 50, 119):
+        model = LinearRegression().fit(X.iloc[:t + 1], y.iloc[:t + 1])
+        np.testing.assert_allclose(got[t], np.r_[model.intercept_, model.coef_], atol=1e-8)
+
+
+def test_forecast_uses_the_previous_rows_coefficients():
+    X, y = make_data(rows=100)
+    result = rolling_ols(X, y, RollingOLSConfig(window=30))
+    previous = result.coefficients.shift(1).to_numpy()
+    expected = previous[:, 0] + (X.to_numpy() * previous[:, 1:]).sum(axis=1)
+    np.testing.assert_allclose(result.forecast.to_numpy(), expected, equal_nan=True)
+
+
+def test_walk_forward_coefficients_reproduce_predict():
+    X, y = make_data(rows=100)
+    model = RollingOLS(RollingOLSConfig(window=30)).fit(X.iloc[:80], y.iloc[:80])
+    new = X.iloc[80:].set_axis(range(1000, 1020))
+    frame = pd.concat([X.iloc[:80], new])
+    intercept, slopes = model.walk_forward_coefficients(frame)
+    expected = intercept + (frame.to_numpy() * slopes).sum(axis=1)
+    np.testing.assert_allclose(model.predict(frame), expected, equal_nan=True)
+
+
+def test_unknown_method():
+    X, y = make_data(rows=20)
+    with pytest.raises(ValueError):
+        rolling_ols(X, y, RollingOLSConfig("kalman"))